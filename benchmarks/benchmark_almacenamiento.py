@@ -0,0 +1,83 @@
+"""
+Compara los formatos de los archivos intermedios de `src/soporte_almacenamiento.py` (pickle, feather sin comprimir,
+feather con zstd y parquet con zstd): tiempo de escritura, tiempo de lectura completa, tiempo de lectura de dos
+columnas y tamaño del archivo, sobre los archivos de la carpeta `data`.
+
+Con `--factor` se replican las filas de cada DataFrame para medir tamaños mayores.
+
+Uso:
+    python benchmarks/benchmark_almacenamiento.py --factor 100 --repeticiones 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from src.soporte_almacenamiento import EXTENSIONES_FORMATOS, guardar_dataframe, leer_dataframe
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data")
+ARCHIVOS = {
+    "reservas_limpio": os.path.join(DATA, "reservas_hoteles_limpio.pickle"),
+    "hoteles_competencia": os.path.join(DATA, "datos_extraidos", "nombre_estrellas_precio.pickle"),
+    "eventos": os.path.join(DATA, "datos_extraidos", "tabla_eventos.pickle"),
+}
+# (formato, compresion) de cada variante medida
+VARIANTES = {
+    "pickle": ("pickle", None),
+    "feather": ("feather", "uncompressed"),
+    "feather_zstd": ("feather", "zstd"),
+    "parquet_zstd": ("parquet", "zstd"),
+}
+
+
+def medir(funcion, repeticiones):
+    """
+    Devuelve el mejor tiempo de `repeticiones` ejecuciones de la función, en segundos.
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+
+def benchmark(nombre, dataframe, directorio, repeticiones):
+    """
+    Mide cada variante de `VARIANTES` sobre un DataFrame.
+
+    Returns:
+        list: Una lista de diccionarios con el archivo, la variante, los tiempos en milisegundos y el tamaño en MB.
+    """
+    columnas = list(dataframe.columns[:2])
+    resultados = []
+    for variante, (formato, compresion) in VARIANTES.items():
+        ruta = os.path.join(directorio, f"{nombre}_{variante}{EXTENSIONES_FORMATOS[formato]}")
+        escritura = medir(lambda: guardar_dataframe(dataframe, ruta, formato, compresion), repeticiones)
+        lectura = medir(lambda: leer_dataframe(ruta, formato=formato), repeticiones)
+        proyeccion = medir(lambda: leer_dataframe(ruta, columnas, formato=formato), repeticiones)
+        resultados.append({"archivo": nombre, "variante": variante, "filas": len(dataframe),
+                           "escritura_ms": round(escritura * 1000, 1), "lectura_ms": round(lectura * 1000, 1),
+                           "lectura_2_col_ms": round(proyeccion * 1000, 1), "tamano_mb": round(os.path.getsize(ruta) / 1e6, 2)})
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--factor", type=int, default=1, help="Número de veces que se replican las filas de cada DataFrame.")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as directorio:
+        for nombre, ruta in ARCHIVOS.items():
+            dataframe = pd.read_pickle(ruta)
+            if args.factor > 1:
+                dataframe = pd.concat([dataframe] * args.factor, ignore_index=True)
+            resultados.extend(benchmark(nombre, dataframe, directorio, args.repeticiones))
+
+    print(pd.DataFrame(resultados).to_string(index=False))
@@ -0,0 +1,102 @@
+"""
+Compara la velocidad de carga (filas/segundo) de las funciones `creacion_tabla_*` con cada método de carga
+disponible en `src/soporte_carga.py` ("copy", "execute_values" y "executemany").
+
+Utiliza los datos de la carpeta `data` y la misma configuración de conexión que `main.py` (archivo .env).
+Las tablas deben existir previamente (ver `planteamiento_proyecto.md`). ¡Atención! El benchmark vacía las
+tablas antes de cada método, por lo que debe ejecutarse contra una base de datos de pruebas.
+
+Uso:
+    python benchmarks/benchmark_carga.py --factor 10 --metodos copy execute_values
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from src.soporte_carga import (METODOS_CARGA, conex_bd_creacion_cursor, creacion_tabla_ciudad, creacion_tabla_clientes,
+                               creacion_tabla_eventos, creacion_tabla_hoteles, creacion_tabla_reservas,
+                               vaciado_cache_dimensiones)
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data")
+
+
+def replicar_reservas(dataframe, factor):
+    """
+    Replica el DataFrame de reservas `factor` veces, haciendo únicos `id_reserva`, `id_cliente` y `mail`
+    para que las réplicas no violen las claves de la base de datos.
+
+    Args:
+        dataframe (pd.DataFrame): El DataFrame de reservas limpio.
+        factor (int): El número de copias.
+
+    Returns:
+        pd.DataFrame: El DataFrame replicado.
+    """
+    copias = []
+    id_clientes = dataframe["id_cliente"].astype("int64")
+    for i in range(factor):
+        copia = dataframe.copy()
+        copia["id_reserva"] = copia["id_reserva"] + f"-{i}"
+        copia["id_cliente"] = id_clientes + i * int(id_clientes.max())
+        copia["mail"] = f"{i}." + copia["mail"]
+        copias.append(copia)
+    return pd.concat(copias, ignore_index=True)
+
+
+def benchmark(conn, cur, df, df_eventos, df_hoteles_competencia, metodo):
+    """
+    Vacía las tablas y mide el tiempo de carga de cada tabla con el método indicado.
+
+    Returns:
+        list: Una lista de diccionarios con la tabla, el método, las filas cargadas, los segundos y las filas por segundo.
+    """
+    cur.execute("TRUNCATE reservas, clientes, hoteles, eventos, ciudad RESTART IDENTITY CASCADE")
+    conn.commit()
+    vaciado_cache_dimensiones()
+
+    cargas = [
+        ("ciudad", lambda: creacion_tabla_ciudad(conn, cur, df, metodo)),
+        ("eventos", lambda: creacion_tabla_eventos(conn, cur, df_eventos, metodo)),
+        ("hoteles", lambda: creacion_tabla_hoteles(conn, cur, df, df_hoteles_competencia, metodo)),
+        ("clientes", lambda: creacion_tabla_clientes(conn, cur, df, metodo)),
+        ("reservas", lambda: creacion_tabla_reservas(conn, cur, df, metodo)),
+    ]
+    resultados = []
+    for tabla, carga in cargas:
+        inicio = time.perf_counter()
+        carga()
+        segundos = time.perf_counter() - inicio
+        cur.execute(f"SELECT count(*) FROM {tabla}")
+        filas = cur.fetchone()[0]
+        resultados.append({"tabla": tabla, "metodo": metodo, "filas": filas, "segundos": round(segundos, 3),
+                           "filas_segundo": round(filas / segundos) if segundos else None})
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--factor", type=int, default=1, help="Número de veces que se replican las reservas.")
+    parser.add_argument("--metodos", nargs="+", default=list(METODOS_CARGA), choices=METODOS_CARGA)
+    args = parser.parse_args()
+
+    load_dotenv()
+    df = replicar_reservas(pd.read_pickle(os.path.join(DATA, "reservas_hoteles_limpio.pickle")), args.factor)
+    df_eventos = pd.read_pickle(os.path.join(DATA, "datos_extraidos", "tabla_eventos.pickle"))
+    df_hoteles_competencia = pd.read_pickle(os.path.join(DATA, "datos_extraidos", "nombre_estrellas_precio.pickle"))
+
+    conn, cur = conex_bd_creacion_cursor(os.getenv("DB_NAME"), os.getenv("DB_USER"), os.getenv("DB_PASSWORD"),
+                                         os.getenv("DB_HOST"), os.getenv("DB_PORT"))
+    try:
+        resultados = []
+        for metodo in args.metodos:
+            resultados.extend(benchmark(conn, cur, df, df_eventos, df_hoteles_competencia, metodo))
+    finally:
+        cur.close()
+        conn.close()
+
+    print(pd.DataFrame(resultados).pivot(index="tabla", columns="metodo", values="filas_segundo").to_string())
@@ -0,0 +1,85 @@
+"""
+Compara el procesado de la respuesta de la API de eventos con `parseo_eventos` (lectura incremental del JSON
+y filtrado vectorizado de fechas) frente al bucle original (`response.json()` y dos `pd.to_datetime` por evento),
+sobre un JSON sintético con la estructura de la API de eventos de Madrid.
+
+Uso:
+    python benchmarks/benchmark_eventos.py --eventos 500000
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from src.soporte_scrapeo import lectura_eventos_json, parseo_eventos
+
+
+def generar_json_eventos(num_eventos, semilla=42):
+    """
+    Genera un JSON con `num_eventos` eventos repartidos entre 2024 y 2026.
+
+    Returns:
+        bytes: El documento JSON codificado.
+    """
+    rng = np.random.default_rng(semilla)
+    inicios = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 730, num_eventos), unit="D")
+    duraciones = pd.to_timedelta(rng.integers(0, 60, num_eventos), unit="D")
+    eventos = [{
+        "title": f"Evento {i}",
+        "link": f"http://www.madrid.es/evento/{i}",
+        "dtstart": f"{inicio:%Y-%m-%d} 10:00:00.0",
+        "dtend": f"{inicio + duracion:%Y-%m-%d} 20:00:00.0",
+        "time": "10:00" if i % 3 else "",
+        "address": {"area": {"postal-code": str(28000 + i % 60), "street-address": f"CALLE {i} 1"}},
+        "organization": {"organization-name": f"Centro {i % 100}"},
+    } for i, (inicio, duracion) in enumerate(zip(inicios, duraciones))]
+    return json.dumps({"@context": {}, "@graph": eventos}).encode()
+
+
+def parseo_original(contenido):
+    """
+    Implementación original de `scrap_info_eventos` a partir del contenido de la respuesta.
+    """
+    data = json.loads(contenido)
+    info_eventos = {clave: [] for clave in ["nombre_evento", "url_evento", "codigo_postal", "direccion", "horario",
+                                            "organizacion", "inicio_evento", "fin_evento", "ciudad"]}
+    for evento in data["@graph"]:
+        start_date = pd.to_datetime(evento.get('dtstart'))
+        end_date = pd.to_datetime(evento.get('dtend'))
+        if start_date <= pd.to_datetime("2025-03-02 23:59:00") and end_date >= pd.to_datetime("2025-03-01 00:00:00"):
+            info_eventos["nombre_evento"].append(evento.get('title', None))
+            info_eventos["url_evento"].append(evento.get('link', None))
+            area = evento.get("address", {}).get("area", {})
+            info_eventos["codigo_postal"].append(area.get("postal-code", None))
+            info_eventos["direccion"].append(area.get("street-address", None))
+            info_eventos["horario"].append(evento.get("time", "") or None)
+            info_eventos["organizacion"].append(evento.get('organization', {}).get('organization-name', None))
+            info_eventos["inicio_evento"].append(evento.get("dtstart", None).split(" ")[0] if evento.get("dtstart") else None)
+            info_eventos["fin_evento"].append(evento.get("dtend", None).split(" ")[0] if evento.get("dtend") else None)
+            info_eventos["ciudad"].append("Madrid")
+    return info_eventos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--eventos", type=int, default=500_000)
+    parser.add_argument("--sin-original", action="store_true", help="No mide el bucle original.")
+    args = parser.parse_args()
+
+    contenido = generar_json_eventos(args.eventos)
+    print(f"{args.eventos} eventos, {len(contenido) / 1e6:.1f} MB")
+
+    inicio = time.perf_counter()
+    nuevo = parseo_eventos(lectura_eventos_json(io.BytesIO(contenido)))
+    print(f"parseo_eventos: {time.perf_counter() - inicio:.2f} s, {len(nuevo['nombre_evento'])} eventos seleccionados")
+
+    if not args.sin_original:
+        inicio = time.perf_counter()
+        original = parseo_original(contenido)
+        print(f"original:       {time.perf_counter() - inicio:.2f} s, mismo resultado: {original == nuevo}")
@@ -0,0 +1,73 @@
+"""
+Compara el tiempo de `limpieza_transformacion` con el motor pandas y con el motor polars sobre el archivo de reservas
+de la carpeta `data` replicado `--factor` veces, con y sin filtros y con el archivo particionado por `competencia` e
+`id_hotel`. La equivalencia de los DataFrames y de los informes de duplicados de los dos motores se comprueba en
+`tests/test_limpieza_transf.py`.
+
+Uso:
+    python benchmarks/benchmark_motores.py --factor 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from benchmarks.benchmark_paralelo import replicar_reservas_sin_limpiar
+from src.soporte_limpieza_transf import limpieza_transformacion
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data")
+# argumentos de cada caso comparado, además del archivo de entrada
+CASOS = {
+    "completo": {},
+    "filtros": {"filtros": [("competencia", "==", False), ("fecha_reserva", ">=", "2025-02-05")]},
+    "clave_id_reserva": {"clave_duplicados": ["id_reserva"], "columnas": None},
+}
+
+
+def ejecutar(archivo_entrada, df_hoteles_competencia, directorio, motor, argumentos):
+    """
+    Ejecuta `limpieza_transformacion` con un motor y mide su tiempo.
+
+    Returns:
+        tuple: El DataFrame resultante, el informe de duplicados y los segundos.
+    """
+    informe = {}
+    archivo_salida = os.path.join(directorio, f"salida_{motor}_{time.perf_counter_ns()}")
+    inicio = time.perf_counter()
+    df = limpieza_transformacion(archivo_entrada, df_hoteles_competencia, archivo_salida, informe_duplicados=informe,
+                                 motor=motor, **argumentos)
+    return df, informe, time.perf_counter() - inicio
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--factor", type=int, default=50, help="Número de veces que se replican las reservas.")
+    args = parser.parse_args()
+
+    df_hoteles_competencia = pd.read_pickle(os.path.join(DATA, "datos_extraidos", "nombre_estrellas_precio.pickle"))
+    resultados = []
+    with tempfile.TemporaryDirectory() as directorio:
+        reservas = replicar_reservas_sin_limpiar(pd.read_parquet(os.path.join(DATA, "reservas_hoteles.parquet")), args.factor)
+        archivo = os.path.join(directorio, "reservas.parquet")
+        reservas.to_parquet(archivo)
+        carpeta = os.path.join(directorio, "reservas_particionadas")
+        ds.write_dataset(pa.Table.from_pandas(reservas, preserve_index=False), carpeta, format="parquet",
+                         partitioning=["competencia", "id_hotel"], partitioning_flavor="hive")
+
+        for entrada, archivo_entrada in [("archivo", archivo), ("particionado", carpeta)]:
+            for caso, argumentos in CASOS.items():
+                df_pandas, _, segundos_pandas = ejecutar(archivo_entrada, df_hoteles_competencia, directorio, "pandas", argumentos)
+                _, _, segundos_polars = ejecutar(archivo_entrada, df_hoteles_competencia, directorio, "polars", argumentos)
+
+                resultados.append({"entrada": entrada, "caso": caso, "filas": len(df_pandas),
+                                   "pandas_s": round(segundos_pandas, 2), "polars_s": round(segundos_polars, 2),
+                                   "aceleracion": round(segundos_pandas / segundos_polars, 2)})
+                print(resultados[-1], flush=True)
+
+    print(pd.DataFrame(resultados).to_string(index=False))
@@ -0,0 +1,63 @@
+"""
+Mide el tiempo de `limpieza_transformacion` con distinto número de procesos (`num_procesos`) sobre el archivo de
+reservas de la carpeta `data` replicado `--factor` veces. La equivalencia del resultado con uno y con varios procesos
+se comprueba en `tests/test_limpieza_transf.py`.
+
+Uso:
+    python benchmarks/benchmark_paralelo.py --factor 100 --procesos 1 2 4 8 16
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from src.soporte_limpieza_transf import limpieza_transformacion
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data")
+
+
+def replicar_reservas_sin_limpiar(dataframe, factor):
+    """
+    Replica el DataFrame de reservas sin limpiar `factor` veces, haciendo únicos `id_reserva`, `id_cliente` y `mail`
+    para que las réplicas no se eliminen como duplicados (los duplicados del archivo original se conservan).
+
+    Returns:
+        pd.DataFrame: El DataFrame replicado.
+    """
+    copias = []
+    for i in range(factor):
+        copia = dataframe.copy()
+        copia["id_reserva"] = copia["id_reserva"] + f"-{i}"
+        copia["id_cliente"] = copia["id_cliente"] + f"-{i}"
+        copia["mail"] = f"{i}." + copia["mail"]
+        copias.append(copia)
+    return pd.concat(copias, ignore_index=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--factor", type=int, default=100, help="Número de veces que se replican las reservas.")
+    parser.add_argument("--procesos", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    df_hoteles_competencia = pd.read_pickle(os.path.join(DATA, "datos_extraidos", "nombre_estrellas_precio.pickle"))
+    resultados = []
+    with tempfile.TemporaryDirectory() as directorio:
+        archivo_entrada = os.path.join(directorio, "reservas.parquet")
+        replicar_reservas_sin_limpiar(pd.read_parquet(os.path.join(DATA, "reservas_hoteles.parquet")), args.factor).to_parquet(archivo_entrada)
+
+        for num_procesos in args.procesos:
+            inicio = time.perf_counter()
+            df = limpieza_transformacion(archivo_entrada, df_hoteles_competencia, os.path.join(directorio, f"salida_{num_procesos}"),
+                                         num_procesos=num_procesos)
+            segundos = time.perf_counter() - inicio
+
+            resultados.append({"procesos": num_procesos, "filas": len(df), "segundos": round(segundos, 2),
+                               "aceleracion": round(resultados[0]["segundos"] / segundos, 2) if resultados else 1.0})
+            print(resultados[-1], flush=True)
+
+    print(pd.DataFrame(resultados).to_string(index=False))
@@ -0,0 +1,85 @@
+"""
+Compara el relleno de las columnas de los hoteles de la competencia con `rellenar_nulos_mapeos` (una pasada vectorizada
+con los tres mapeos) frente al `apply` fila a fila original, sobre DataFrames sintéticos de distintos tamaños.
+
+El `apply` original solo se mide hasta `--max-apply` filas, porque a partir de ahí tarda demasiado.
+
+Uso:
+    python benchmarks/benchmark_relleno.py --filas 1000000 10000000 50000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from src.soporte_limpieza_transf import rellenar_nulos_mapeos
+
+
+def rellenar_apply(dataframe, dicc, columna_rellenar, columna_coincidencia):
+    """
+    Implementación original de `rellenar_nulos_competencia`, con un `apply` fila a fila.
+    """
+    dataframe[columna_rellenar] = dataframe.apply(lambda row: dicc.get(row[columna_coincidencia], row[columna_rellenar]), axis=1)
+
+
+def generar_reservas(num_filas, num_hoteles=30, num_competencia=10, semilla=42):
+    """
+    Genera un DataFrame de reservas con la forma de las columnas que intervienen en el relleno de la competencia
+    y los diccionarios de id, precios y fechas de los hoteles de la competencia.
+
+    Returns:
+        tuple: El DataFrame y la lista de mapeos (dicc, columna_rellenar, columna_coincidencia).
+    """
+    rng = np.random.default_rng(semilla)
+    id_hotel = rng.integers(1, num_hoteles + 1, num_filas)
+    competencia = id_hotel <= num_competencia
+    nombres = np.array([f"Hotel {i}" for i in range(num_hoteles + 1)], dtype=object)
+
+    df = pd.DataFrame({
+        "id_hotel": id_hotel,
+        "competencia": competencia,
+        "nombre_hotel": np.where(competencia, None, nombres[id_hotel]),
+        "precio_noche": np.where(competencia, np.nan, rng.uniform(50, 400, num_filas).round(2)),
+        "fecha_reserva": pd.to_datetime("2025-02-01") + pd.to_timedelta(rng.integers(0, 28, num_filas), unit="D"),
+    })
+
+    nombres_competencia = [f"Competencia {i}" for i in range(1, num_competencia + 1)]
+    mapeos = [
+        (dict(zip(range(1, num_competencia + 1), nombres_competencia)), "nombre_hotel", "id_hotel"),
+        (dict(zip(nombres_competencia, rng.uniform(50, 200, num_competencia).round(2))), "precio_noche", "nombre_hotel"),
+        (dict.fromkeys(nombres_competencia, pd.Timestamp("2025-02-26")), "fecha_reserva", "nombre_hotel"),
+    ]
+    return df, mapeos
+
+
+def medir(funcion):
+    inicio = time.perf_counter()
+    funcion()
+    return time.perf_counter() - inicio
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, nargs="+", default=[1_000_000, 10_000_000, 50_000_000])
+    parser.add_argument("--max-apply", type=int, default=1_000_000, help="Tamaño máximo en el que se mide el apply original.")
+    args = parser.parse_args()
+
+    resultados = []
+    for num_filas in args.filas:
+        df, mapeos = generar_reservas(num_filas)
+        resultado = {"filas": num_filas}
+
+        if num_filas <= args.max_apply:
+            df_apply = df.copy()
+            resultado["apply_s"] = round(medir(lambda: [rellenar_apply(df_apply, *mapeo) for mapeo in mapeos]), 3)
+
+        resultado["vectorizado_s"] = round(medir(lambda: rellenar_nulos_mapeos(df, mapeos)), 3)
+        resultados.append(resultado)
+        print(resultado, flush=True)
+        del df
+
+    print(pd.DataFrame(resultados).to_string(index=False))
@@ -0,0 +1,299 @@
+"""
+Banco de pruebas reproducible de la limpieza y la carga: genera reservas sintéticas a varias escalas (ver
+`generador_reservas.py`), mide cada caso sobre ellas y añade los resultados a un histórico (un JSON por línea) para
+detectar regresiones: un caso es una regresión si tarda más de `--umbral` veces la mediana de sus últimos resultados
+con el mismo número de filas en el mismo equipo.
+
+Cada medición guarda también el desglose por función de `src/soporte_metricas.py` (tiempo total y propio de las
+funciones más lentas), para saber qué función ha empeorado.
+
+Las cargas se miden con `crear_tablas`:
+    - "temporal": en un PostgreSQL local desechable creado con el paquete opcional pgserver (pip install pgserver),
+      con las tablas de `planteamiento_proyecto.md`. Es la opción por defecto.
+    - "env": en la base de datos de `.env` (como `main.py`), cuyas tablas deben existir. ¡Atención! Se vacían antes
+      de cada medición, así que debe ser una base de datos de pruebas.
+    - "ninguna": sin base de datos; en su lugar se mide la preparación de los datos que envía cada método de carga
+      (el CSV de COPY y las tuplas de execute_values), que es la parte de la carga que depende del código.
+Si pgserver no está instalado, "temporal" pasa a "ninguna".
+
+Uso:
+    python benchmarks/benchmark_suite.py --filas 15000 150000 1500000
+    python benchmarks/benchmark_suite.py --filas 150000 --bd ninguna --casos limpieza_pandas limpieza_polars
+    python benchmarks/benchmark_suite.py --filas 150000 --fallar-regresion
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+import psycopg2
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from benchmarks.generador_reservas import escribir_reservas, generar_hoteles_competencia, generar_reservas
+from src.soporte_carga import METODOS_CARGA, buffer_csv_dataframe, crear_tablas, filas_dataframe, vaciado_cache_dimensiones
+from src.soporte_limpieza_transf import limpieza_transformacion, limpieza_transformacion_por_lotes, pl
+from src.soporte_metricas import finalizar_metricas, iniciar_metricas
+
+try:
+    import pgserver
+except ImportError:
+    pgserver = None
+
+RAIZ = os.path.join(os.path.dirname(__file__), "..")
+HISTORICO = os.path.join(os.path.dirname(__file__), "resultados", "historico.jsonl")
+CASOS_LIMPIEZA = ("limpieza_pandas", "limpieza_procesos", "limpieza_polars", "limpieza_lotes")
+CASOS_CARGA = tuple(f"carga_{metodo}" for metodo in METODOS_CARGA)
+CASOS_SIN_BD = ("serializacion_copy", "serializacion_execute_values")
+# por defecto no se mide executemany, que a gran escala tarda demasiado
+CASOS_POR_DEFECTO = CASOS_LIMPIEZA + ("carga_copy", "carga_execute_values")
+# numero de resultados anteriores con los que se compara cada caso
+RESULTADOS_REFERENCIA = 5
+# funciones del desglose de `src/soporte_metricas.py` que se guardan con cada resultado
+FUNCIONES_DESGLOSE = 10
+# columnas de reservas que se envian a la base de datos (ver `creacion_tabla_reservas`)
+COLUMNAS_RESERVAS = ["id_reserva", "fecha_reserva", "inicio_estancia", "final_estancia", "precio_noche", "id_cliente", "id_hotel"]
+
+
+def esquema_bd():
+    """
+    Lee de `planteamiento_proyecto.md` las sentencias CREATE TABLE de la base de datos.
+
+    Returns:
+        str: Las sentencias, precedidas del borrado de las tablas.
+    """
+    with open(os.path.join(RAIZ, "planteamiento_proyecto.md"), encoding="utf-8") as f:
+        sentencias = re.findall(r"CREATE TABLE .*?\n\);", f.read(), flags=re.DOTALL)
+    return "DROP TABLE IF EXISTS reservas, clientes, hoteles, eventos, ciudad CASCADE;\n" + "\n".join(sentencias)
+
+
+def conexion_temporal(directorio):
+    """
+    Arranca un PostgreSQL desechable en `directorio` con pgserver y crea las tablas.
+
+    Returns:
+        tuple: El servidor de pgserver y los datos de conexión (nombre_db, usuario, contraseña, servidor, puerto).
+    """
+    servidor = pgserver.get_server(directorio, cleanup_mode="delete")
+    conexion = ("postgres", "postgres", "", directorio, None)
+    conn = psycopg2.connect(dbname="postgres", user="postgres", host=directorio)
+    with conn, conn.cursor() as cur:
+        cur.execute(esquema_bd())
+    conn.close()
+    return servidor, conexion
+
+
+def vaciado_tablas(conexion):
+    """
+    Vacía las tablas de la base de datos y la caché de id de las dimensiones antes de una carga.
+
+    Returns:
+        None
+    """
+    nombre_db, usuario, contraseña, servidor, puerto = conexion
+    conn = psycopg2.connect(dbname=nombre_db, user=usuario, password=contraseña, host=servidor, port=puerto)
+    with conn, conn.cursor() as cur:
+        cur.execute("TRUNCATE reservas, clientes, hoteles, eventos, ciudad RESTART IDENTITY CASCADE")
+    conn.close()
+    vaciado_cache_dimensiones()
+
+
+def medicion(funcion, repeticiones, preparacion=None):
+    """
+    Ejecuta una función `repeticiones` veces y se queda con la repetición más rápida, con el desglose por función
+    de `src/soporte_metricas.py`.
+
+    Args:
+        funcion (callable): La función que se mide; recibe el número de repetición.
+        repeticiones (int): El número de repeticiones.
+        preparacion (callable, optional): Una función que se ejecuta antes de cada repetición sin medirla (por
+                                          ejemplo, el vaciado de las tablas). Por defecto es None.
+
+    Returns:
+        dict: Los segundos de la repetición más rápida y la mediana, el pico de memoria y el desglose por función.
+    """
+    tiempos, informes = [], []
+    for repeticion in range(repeticiones):
+        if preparacion is not None:
+            preparacion()
+        iniciar_metricas()
+        inicio = time.perf_counter()
+        try:
+            funcion(repeticion)
+        finally:
+            tiempos.append(time.perf_counter() - inicio)
+            informes.append(finalizar_metricas())
+
+    mejor = min(range(repeticiones), key=tiempos.__getitem__)
+    etapas = sorted(informes[mejor]["etapas"], key=lambda etapa: etapa["segundos_propios"], reverse=True)
+    return {
+        "segundos": round(tiempos[mejor], 4),
+        "segundos_mediana": round(statistics.median(tiempos), 4),
+        "rss_pico_bytes": informes[mejor]["rss_pico_bytes"],
+        "etapas": [{clave: etapa[clave] for clave in ("modulo", "etapa", "llamadas", "segundos", "segundos_propios", "segundos_cpu")}
+                   for etapa in etapas[:FUNCIONES_DESGLOSE]],
+    }
+
+
+def casos_escala(archivo, df_hoteles_competencia, df_eventos, directorio, conexion, procesos):
+    """
+    Crea las funciones de los casos que se miden sobre un archivo de reservas. Las cargas usan el resultado de la
+    limpieza con pandas, que se calcula la primera vez que se necesita.
+
+    Returns:
+        dict: Un diccionario caso -> (función, preparación) para `medicion`.
+    """
+    limpio = {}
+
+    def salida(caso, repeticion):
+        return os.path.join(directorio, f"salida_{caso}_{repeticion}_{time.perf_counter_ns()}")
+
+    def reservas_limpias():
+        if "df" not in limpio:
+            limpio["df"] = limpieza_transformacion(archivo, df_hoteles_competencia, salida("referencia", 0))
+        return limpio["df"]
+
+    casos = {
+        "limpieza_pandas": (lambda r: limpieza_transformacion(archivo, df_hoteles_competencia, salida("pandas", r)), None),
+        "limpieza_procesos": (lambda r: limpieza_transformacion(archivo, df_hoteles_competencia, salida("procesos", r),
+                                                                num_procesos=procesos), None),
+        "limpieza_lotes": (lambda r: limpieza_transformacion_por_lotes(archivo, df_hoteles_competencia, salida("lotes", r)), None),
+        "serializacion_copy": (lambda r: buffer_csv_dataframe(reservas_limpias()[COLUMNAS_RESERVAS]), None),
+        "serializacion_execute_values": (lambda r: filas_dataframe(reservas_limpias()[COLUMNAS_RESERVAS]), None),
+    }
+    if pl is not None:
+        casos["limpieza_polars"] = (lambda r: limpieza_transformacion(archivo, df_hoteles_competencia, salida("polars", r),
+                                                                      motor="polars"), None)
+    if conexion is not None:
+        for metodo in METODOS_CARGA:
+            metodos = dict.fromkeys(["ciudad", "eventos", "hoteles", "clientes", "reservas"], metodo)
+            casos[f"carga_{metodo}"] = (
+                lambda r, metodos=metodos: crear_tablas(*conexion, reservas_limpias(), df_eventos, df_hoteles_competencia, metodos),
+                lambda: (reservas_limpias(), vaciado_tablas(conexion)))
+    return casos
+
+
+def version_codigo():
+    """
+    Devuelve el commit de git del código medido, con "+cambios" si hay cambios sin confirmar.
+
+    Returns:
+        str: El commit, o None si no se puede obtener.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True).stdout.strip()
+        cambios = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=RAIZ, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("+cambios" if cambios else "")
+
+
+def lectura_historico(ruta):
+    """
+    Lee los resultados anteriores del histórico.
+
+    Returns:
+        list: Los resultados (vacío si el histórico no existe).
+    """
+    if not os.path.exists(ruta):
+        return []
+    with open(ruta, encoding="utf-8") as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
+
+
+def comparacion_historico(resultado, historico, umbral):
+    """
+    Compara un resultado con la mediana de los últimos `RESULTADOS_REFERENCIA` resultados del mismo caso, con el
+    mismo número de filas y en el mismo equipo.
+
+    Returns:
+        tuple: Los segundos de referencia (None si no hay resultados anteriores) y si es una regresión.
+    """
+    anteriores = [r["segundos"] for r in historico
+                  if (r["caso"], r["filas"], r["equipo"]) == (resultado["caso"], resultado["filas"], resultado["equipo"])]
+    if not anteriores:
+        return None, False
+    referencia = statistics.median(anteriores[-RESULTADOS_REFERENCIA:])
+    return referencia, resultado["segundos"] > referencia * umbral
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, nargs="+", default=[15000, 150000], help="Filas de cada escala.")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--casos", nargs="+", choices=CASOS_LIMPIEZA + CASOS_CARGA + CASOS_SIN_BD)
+    parser.add_argument("--procesos", type=int, default=4, help="Procesos del caso limpieza_procesos.")
+    parser.add_argument("--bd", choices=["temporal", "env", "ninguna"], default="temporal")
+    parser.add_argument("--historico", default=HISTORICO, help="Archivo JSONL con los resultados anteriores.")
+    parser.add_argument("--umbral", type=float, default=1.2, help="Cociente a partir del cual un caso es una regresión.")
+    parser.add_argument("--sin-guardar", action="store_true", help="No añade los resultados al histórico.")
+    parser.add_argument("--fallar-regresion", action="store_true", help="Termina con código 1 si hay alguna regresión.")
+    args = parser.parse_args()
+
+    if args.bd == "temporal" and pgserver is None:
+        print("pgserver no está instalado (pip install pgserver): se mide la serialización en lugar de las cargas.")
+        args.bd = "ninguna"
+    casos_elegidos = args.casos or (CASOS_POR_DEFECTO if args.bd != "ninguna" else CASOS_LIMPIEZA + CASOS_SIN_BD)
+
+    historico = lectura_historico(args.historico)
+    comunes = {"fecha": datetime.now().isoformat(timespec="seconds"), "commit": version_codigo(),
+               "equipo": f"{platform.node()}-{os.cpu_count()}cpu", "python": platform.python_version(),
+               "pandas": pd.__version__, "semilla": args.semilla, "repeticiones": args.repeticiones}
+    df_hoteles_competencia = generar_hoteles_competencia(semilla=args.semilla)
+    df_eventos = pd.read_pickle(os.path.join(RAIZ, "data", "datos_extraidos", "tabla_eventos.pickle"))
+
+    resultados = []
+    servidor = None
+    with tempfile.TemporaryDirectory() as directorio:
+        try:
+            conexion = None
+            if args.bd == "temporal":
+                servidor, conexion = conexion_temporal(os.path.join(directorio, "pgdata"))
+            elif args.bd == "env":
+                load_dotenv()
+                conexion = (os.getenv("DB_NAME"), os.getenv("DB_USER"), os.getenv("DB_PASSWORD"), os.getenv("DB_HOST"), os.getenv("DB_PORT"))
+
+            for filas in args.filas:
+                archivo = escribir_reservas(generar_reservas(filas, args.semilla), os.path.join(directorio, f"reservas_{filas}.parquet"))
+                casos = casos_escala(archivo, df_hoteles_competencia, df_eventos, directorio, conexion, args.procesos)
+                for caso in casos_elegidos:
+                    if caso not in casos:
+                        print(f"Se omite {caso}: no está disponible (polars no instalado o sin base de datos).")
+                        continue
+                    funcion, preparacion = casos[caso]
+                    resultado = {**comunes, "caso": caso, "filas": filas, **medicion(funcion, args.repeticiones, preparacion)}
+                    resultado["filas_por_segundo"] = round(filas / resultado["segundos"]) if resultado["segundos"] else None
+                    referencia, regresion = comparacion_historico(resultado, historico, args.umbral)
+                    resultados.append((resultado, referencia, regresion))
+                    print({clave: resultado[clave] for clave in ("caso", "filas", "segundos", "filas_por_segundo")},
+                          "referencia:", referencia, "REGRESIÓN" if regresion else "", flush=True)
+        finally:
+            if servidor is not None:
+                servidor.cleanup()
+
+    if not args.sin_guardar and resultados:
+        os.makedirs(os.path.dirname(os.path.abspath(args.historico)), exist_ok=True)
+        with open(args.historico, "a", encoding="utf-8") as f:
+            for resultado, _, _ in resultados:
+                f.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+
+    tabla = pd.DataFrame([{"caso": r["caso"], "filas": r["filas"], "segundos": r["segundos"], "filas_por_segundo": r["filas_por_segundo"],
+                           "referencia": referencia, "cambio": f"{r['segundos'] / referencia - 1:+.0%}" if referencia else "",
+                           "regresion": regresion, "mayor_tiempo_propio": r["etapas"][0]["etapa"] if r["etapas"] else ""}
+                          for r, referencia, regresion in resultados])
+    print(tabla.to_string(index=False))
+
+    regresiones = tabla[tabla["regresion"]] if not tabla.empty else tabla
+    if not regresiones.empty:
+        print(f"{len(regresiones)} regresiones (más de {args.umbral} veces la mediana de los últimos {RESULTADOS_REFERENCIA} resultados).")
+        if args.fallar_regresion:
+            sys.exit(1)
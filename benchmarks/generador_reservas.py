@@ -0,0 +1,191 @@
+"""
+Genera archivos Parquet de reservas sintéticas con el mismo esquema que `data/reservas_hoteles.parquet` y a la escala
+que se quiera, junto con los hoteles de la competencia correspondientes (como los que devuelve el scraping).
+
+Los datos reproducen los problemas del archivo real que trata `limpieza_transformacion`: reservas de la competencia
+sin fecha de reserva, nombre de hotel, ciudad, precio ni estrellas (cadenas vacías y nulos), fechas de estancia nulas,
+precios nulos en los hoteles propios, filas duplicadas y clientes que repiten mail. Con la misma semilla se generan
+siempre los mismos datos.
+
+Uso:
+    python benchmarks/generador_reservas.py --filas 1500000 --salida reservas_sinteticas.parquet
+    python benchmarks/generador_reservas.py --filas 1500000 --salida reservas_sinteticas --particionado
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data")
+# proporciones del archivo real (15098 filas): 34% de reservas de la competencia, 98 duplicados, 75 fechas de estancia
+# nulas, 52 precios nulos en los hoteles propios y 1,3% de mails repetidos
+PROPORCIONES_REALES = {"competencia": 0.345, "duplicados": 0.0065, "nulos_estancia": 0.005, "nulos_precio": 0.0053,
+                       "mails_repetidos": 0.013}
+# hoteles del archivo real: 19 propios (id menores de 50) y 10 de la competencia (id mayores de 100)
+NUM_HOTELES_PROPIOS = 19
+NUM_HOTELES_COMPETENCIA = 10
+FECHAS_RESERVA = pd.date_range("2025-02-01", "2025-02-12").strftime("%Y-%m-%d").tolist()
+INICIO_ESTANCIA = "2025-03-01"
+FINAL_ESTANCIA = "2025-03-02"
+
+
+def valores_reales():
+    """
+    Lee del archivo real los nombres, apellidos y nombres de los hoteles propios, para que los datos sintéticos
+    tengan los mismos valores (y las mismas longitudes de texto).
+
+    Returns:
+        tuple: Los nombres, los apellidos y los nombres de los hoteles propios (listas ordenadas).
+    """
+    real = pd.read_parquet(os.path.join(DATA, "reservas_hoteles.parquet"), columns=["nombre", "apellido", "nombre_hotel", "competencia"])
+    nombres_hoteles = real.loc[~real["competencia"], "nombre_hotel"]
+    return (sorted(real["nombre"].unique()), sorted(real["apellido"].unique()),
+            sorted(nombres_hoteles[nombres_hoteles != ""].unique()))
+
+
+def uuids(rng, n):
+    """
+    Genera `n` identificadores con el formato de un UUID (como `id_reserva` e `id_cliente` en el archivo real),
+    convirtiendo los bytes aleatorios a hexadecimal con una tabla en lugar de formatear cada identificador.
+
+    Returns:
+        pa.Array: Un array de cadenas de Arrow.
+    """
+    tabla = np.array([list(f"{i:02x}".encode()) for i in range(256)], dtype=np.uint8)
+    hexadecimal = tabla[np.frombuffer(rng.bytes(16 * n), dtype=np.uint8).reshape(n, 16)].reshape(n, 32)
+    guion = np.full((n, 1), ord("-"), dtype=np.uint8)
+    caracteres = np.hstack([hexadecimal[:, :8], guion, hexadecimal[:, 8:12], guion, hexadecimal[:, 12:16], guion,
+                            hexadecimal[:, 16:20], guion, hexadecimal[:, 20:]])
+    binario = pa.Array.from_buffers(pa.binary(36), n, [None, pa.py_buffer(np.ascontiguousarray(caracteres))])
+    return binario.cast(pa.binary()).cast(pa.string())
+
+
+def generar_hoteles_competencia(num_hoteles=NUM_HOTELES_COMPETENCIA, semilla=0):
+    """
+    Genera los datos de los hoteles de la competencia con las columnas que devuelve `extraccion_hoteles`.
+
+    Args:
+        num_hoteles (int, optional): El número de hoteles. Por defecto es `NUM_HOTELES_COMPETENCIA`.
+        semilla (int, optional): La semilla de los números aleatorios. Por defecto es 0.
+
+    Returns:
+        pd.DataFrame: Los hoteles, con 'nombre_hotel', 'estrellas', 'precio_noche' y 'fecha_reserva'.
+    """
+    rng = np.random.default_rng(semilla + 1)
+    return pd.DataFrame({
+        "nombre_hotel": [f"Hotel Competencia {i + 1}" for i in range(num_hoteles)],
+        "estrellas": rng.integers(30, 50, num_hoteles) / 10,
+        "precio_noche": np.round(rng.uniform(60, 180, num_hoteles), 2),
+        # el scraping guarda como fecha de reserva el dia de la extraccion (un Timestamp)
+        "fecha_reserva": pd.Timestamp("2025-02-26"),
+    })
+
+
+def generar_reservas(num_filas, semilla=0, proporciones=None, num_hoteles_propios=NUM_HOTELES_PROPIOS,
+                     num_hoteles_competencia=NUM_HOTELES_COMPETENCIA):
+    """
+    Genera un DataFrame de reservas sin limpiar con el esquema del archivo real.
+
+    Args:
+        num_filas (int): El número de filas, incluidos los duplicados.
+        semilla (int, optional): La semilla de los números aleatorios. Por defecto es 0.
+        proporciones (dict, optional): Las proporciones de reservas de la competencia, duplicados, fechas de estancia
+                                       nulas, precios nulos y mails repetidos que cambian respecto a
+                                       `PROPORCIONES_REALES`. Por defecto es None (las del archivo real).
+        num_hoteles_propios (int, optional): El número de hoteles propios. Por defecto es `NUM_HOTELES_PROPIOS`.
+        num_hoteles_competencia (int, optional): El número de hoteles de la competencia (deben coincidir con los de
+                                                 `generar_hoteles_competencia`). Por defecto es `NUM_HOTELES_COMPETENCIA`.
+
+    Returns:
+        pd.DataFrame: Las reservas.
+    """
+    proporciones = {**PROPORCIONES_REALES, **(proporciones or {})}
+    rng = np.random.default_rng(semilla)
+    nombres, apellidos, hoteles_reales = valores_reales()
+    nombres_hoteles = (hoteles_reales + [f"Hotel Propio {i + 1}" for i in range(len(hoteles_reales), num_hoteles_propios)])[:num_hoteles_propios]
+
+    num_duplicados = int(num_filas * proporciones["duplicados"])
+    n = num_filas - num_duplicados
+
+    # clientes: la mayoria con un solo mail; los repetidos vuelven a reservar
+    num_clientes = max(int(n * (1 - proporciones["mails_repetidos"])), 1)
+    cliente = np.concatenate([np.arange(num_clientes), rng.integers(0, num_clientes, n - num_clientes)])
+    rng.shuffle(cliente)
+    nombre_cliente = pa.array(nombres).take(rng.integers(0, len(nombres), num_clientes))
+    apellido_cliente = pa.array(apellidos).take(rng.integers(0, len(apellidos), num_clientes))
+    mail_cliente = pc.binary_join_element_wise(pc.utf8_lower(nombre_cliente), pc.utf8_lower(apellido_cliente),
+                                               pa.array(np.arange(num_clientes)).cast(pa.string()), ".")
+    mail_cliente = pc.binary_join_element_wise(mail_cliente, "@example.com", "")
+    id_cliente = uuids(rng, num_clientes)
+
+    competencia = rng.random(n) < proporciones["competencia"]
+    propias = ~competencia
+    ids_propios = np.sort(rng.choice(np.arange(1, 50), num_hoteles_propios, replace=False))
+    ids_competencia = np.sort(rng.choice(np.arange(101, 200), num_hoteles_competencia, replace=False))
+
+    id_hotel = np.where(competencia, ids_competencia[rng.integers(0, num_hoteles_competencia, n)],
+                        ids_propios[rng.integers(0, num_hoteles_propios, n)])
+    # en el archivo real el nombre de los hoteles propios no depende de su id
+    nombre_hotel = pc.if_else(competencia, "", pa.array(nombres_hoteles).take(rng.integers(0, num_hoteles_propios, n)))
+    fecha_reserva = pc.if_else(competencia, "", pa.array(FECHAS_RESERVA).take(rng.integers(0, len(FECHAS_RESERVA), n)))
+    precio_noche = np.where(propias & (rng.random(n) >= proporciones["nulos_precio"]), np.round(rng.uniform(50, 500, n), 2), np.nan)
+    estrellas = np.where(propias, rng.integers(1, 6, n).astype(float), np.nan)
+    estancia_nula = rng.random(n) < proporciones["nulos_estancia"]
+
+    tabla = pa.table({
+        "id_reserva": uuids(rng, n),
+        "id_cliente": id_cliente.take(cliente),
+        "nombre": nombre_cliente.take(cliente),
+        "apellido": apellido_cliente.take(cliente),
+        "mail": mail_cliente.take(cliente),
+        "competencia": competencia,
+        "fecha_reserva": fecha_reserva,
+        "inicio_estancia": pc.if_else(estancia_nula, pa.scalar(None, pa.string()), INICIO_ESTANCIA),
+        "final_estancia": pc.if_else(estancia_nula, pa.scalar(None, pa.string()), FINAL_ESTANCIA),
+        "id_hotel": id_hotel.astype("int64"),
+        "precio_noche": precio_noche,
+        "nombre_hotel": nombre_hotel,
+        "estrellas": estrellas,
+        "ciudad": pc.if_else(competencia, "", "Madrid"),
+    })
+
+    # filas repetidas (la misma reserva exportada dos veces) repartidas por el archivo
+    if num_duplicados:
+        tabla = tabla.take(rng.permutation(np.concatenate([np.arange(n), rng.integers(0, n, num_duplicados)])))
+    return tabla.to_pandas()
+
+
+def escribir_reservas(dataframe, ruta, particionado=False):
+    """
+    Escribe las reservas en un archivo Parquet o, con `particionado=True`, en una carpeta de archivos Parquet
+    particionada por 'competencia' e 'id_hotel' (ver `dataset_parquet`).
+
+    Returns:
+        str: La ruta escrita.
+    """
+    if particionado:
+        ds.write_dataset(pa.Table.from_pandas(dataframe, preserve_index=False), ruta, format="parquet",
+                         partitioning=["competencia", "id_hotel"], partitioning_flavor="hive", existing_data_behavior="delete_matching")
+    else:
+        dataframe.to_parquet(ruta, index=False)
+    return ruta
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=150000, help="Número de filas, incluidos los duplicados.")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", required=True, help="Archivo Parquet (o carpeta, con --particionado) de salida.")
+    parser.add_argument("--particionado", action="store_true", help="Escribe una carpeta particionada por competencia e id_hotel.")
+    parser.add_argument("--salida-competencia", help="Archivo Parquet donde se guardan los hoteles de la competencia.")
+    args = parser.parse_args()
+
+    reservas = generar_reservas(args.filas, args.semilla)
+    escribir_reservas(reservas, args.salida, args.particionado)
+    if args.salida_competencia:
+        generar_hoteles_competencia(semilla=args.semilla).to_parquet(args.salida_competencia, index=False)
+    print(f"{len(reservas)} reservas escritas en {args.salida}")
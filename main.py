@@ -1,8 +1,15 @@
+import argparse
 import os 
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from src.soporte_almacenamiento import FORMATO_POR_DEFECTO, POLITICA_SALIDA_POR_DEFECTO, esperar_escrituras, guardar_dataframe, guardar_salida, ruta_formato
+from src.soporte_cache import ejecutar_etapa
 from src.soporte_carga import crear_tablas
-from src.soporte_scrapeo import extraer_datos
+from src.soporte_claves import ruta_claves
+from src.soporte_checkpoint import etapa_checkpoint, etapa_completada, inicio_checkpoint, registro_etapa
+from src.soporte_scrapeo import extraccion_eventos, extraccion_hoteles
 from src.soporte_limpieza_transf import limpieza_transformacion
+from src.soporte_metricas import finalizar_metricas, iniciar_metricas, instrumentar_modulo
 
 load_dotenv()
 ARCHIVO_RAW = os.getenv("ARCHIVO_RAW")
@@ -16,20 +23,115 @@ DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT")
+DIRECTORIO_CACHE_HTTP = os.getenv("DIRECTORIO_CACHE_HTTP")
+DIRECTORIO_CACHE_ETAPAS = os.getenv("DIRECTORIO_CACHE_ETAPAS")
+DIRECTORIO_CLAVES = os.getenv("DIRECTORIO_CLAVES")
+# que hacer si el archivo de salida ya existe: sobrescribir, version, omitir, error o preguntar (solo en una terminal)
+POLITICA_SALIDA = os.getenv("POLITICA_SALIDA", POLITICA_SALIDA_POR_DEFECTO)
+# carpeta del manifiesto con las etapas terminadas y el progreso de la carga, para reanudar con --resume
+DIRECTORIO_CHECKPOINT = os.getenv("DIRECTORIO_CHECKPOINT")
+ARCHIVO_METRICAS_JSON = os.getenv("ARCHIVO_METRICAS_JSON")
+ARCHIVO_METRICAS_PROMETHEUS = os.getenv("ARCHIVO_METRICAS_PROMETHEUS")
+PERFIL_METRICAS = os.getenv("PERFIL_METRICAS")
+MEMORIA_METRICAS = os.getenv("MEMORIA_METRICAS") == "1"
+DIRECTORIO_PERFILES = os.getenv("DIRECTORIO_PERFILES")
 
-def extraccion_transf_carga(archivo_entrada, archivo_salida, url_selenium, url_api, archivo_salida_selenium, archivo_salida_api, nombre_db, usuario, contraseña, servidor, puerto):
+def resultado_etapa(futuro, descripcion):
+    """
+    Espera a que termine una etapa lanzada en otro hilo y devuelve su resultado.
+
+    Args:
+        futuro (concurrent.futures.Future): El `Future` de la etapa.
+        descripcion (str): El nombre de la etapa para el mensaje de error.
+
+    Returns:
+        El resultado de la etapa.
+
+    Raises:
+        Exception: Si la etapa ha fallado, con el nombre de la etapa y el error original.
+    """
+    try:
+        return futuro.result()
+    except Exception as e:
+        raise Exception(f"Error en {descripcion}: {e}")
+
+
+def transformacion_competencia(archivo_entrada, futuro_hoteles, archivo_salida, directorio_cache_etapas=None, directorio_claves=None,
+                               politica_salida=POLITICA_SALIDA_POR_DEFECTO, formato=FORMATO_POR_DEFECTO):
+    """
+    Ejecuta la limpieza y transformación de las reservas a la vez que el scraping de los hoteles de la competencia.
+
+    Sin caché de etapas, `limpieza_transformacion` recibe directamente el `Future` del scraping: lee y limpia las 
+    reservas mientras el scraping sigue en curso y solo espera a él para rellenar los datos de la competencia. 
+    Con caché de etapas, la clave de la transformación depende de los hoteles extraídos, así que primero se espera 
+    al scraping y después se reutiliza el resultado cacheado o se ejecuta la transformación. La clave incluye todo lo 
+    que cambia el resultado o el archivo escrito: las reservas, los hoteles, los id de clientes guardados, la política 
+    de salida y el formato; al reutilizar el resultado, el archivo de salida se vuelve a escribir.
+
+    El archivo de salida se escribe en segundo plano (ver `guardar_salida`), así que el DataFrame se devuelve en cuanto 
+    está transformado y la carga no espera a la escritura. Con `archivo_salida=None` no se escribe, para que lo escriba 
+    quien llama (ver `etapa_checkpoint` en `extraccion_transf_carga`).
+
+    Args:
+        archivo_entrada (str): Ruta al archivo de entrada con las reservas sin procesar.
+        futuro_hoteles (concurrent.futures.Future): El `Future` de la extracción de los hoteles de la competencia.
+        archivo_salida (str): Ruta al archivo donde se guardará el DataFrame transformado, o None para no guardarlo.
+        directorio_cache_etapas (str, optional): Carpeta de la caché de etapas. Por defecto es None.
+        directorio_claves (str, optional): Carpeta donde se guardan los id de los clientes. Por defecto es None.
+        politica_salida (str, optional): Qué hacer si el archivo de salida ya existe (ver `POLITICAS_SALIDA`). 
+                                         Por defecto es `POLITICA_SALIDA_POR_DEFECTO`.
+        formato (str, optional): El formato del archivo de salida. Por defecto es `FORMATO_POR_DEFECTO`.
+
+    Returns:
+        pd.DataFrame: El DataFrame transformado.
+    """
+    if directorio_cache_etapas is None:
+        return limpieza_transformacion(archivo_entrada, futuro_hoteles, archivo_salida, formato=formato, directorio_claves=directorio_claves,
+                                       politica_salida=politica_salida, escritura_segundo_plano=True)
+
+    df_hoteles_competencia = futuro_hoteles.result()
+    # los id de los clientes dependen de los guardados en ejecuciones anteriores
+    claves_clientes = None if directorio_claves is None else ruta_claves("clientes", directorio_claves)
+
+    # al reutilizar el resultado cacheado se vuelve a escribir el archivo de salida
+    def salida(df):
+        guardar_salida(df, ruta_formato(archivo_salida, formato), politica_salida, segundo_plano=True)
+
+    return ejecutar_etapa(directorio_cache_etapas, "transformacion", limpieza_transformacion, archivo_entrada, df_hoteles_competencia,
+                          archivo_salida, formato=formato, directorio_claves=directorio_claves, politica_salida=politica_salida,
+                          escritura_segundo_plano=True,
+                          entradas=[archivo_entrada, df_hoteles_competencia, directorio_claves, claves_clientes, politica_salida, formato],
+                          salida=None if archivo_salida is None else salida)
+
+
+def extraccion_transf_carga(archivo_entrada, archivo_salida, url_selenium, url_api, archivo_salida_selenium, archivo_salida_api, nombre_db, usuario, contraseña, servidor, puerto, directorio_cache_http=None, directorio_cache_etapas=None, caducidad_extraccion=24 * 3600, directorio_claves=None, politica_salida=POLITICA_SALIDA_POR_DEFECTO,
+                            directorio_checkpoint=None, reanudar=False, formato=FORMATO_POR_DEFECTO):
     """
     Realiza el proceso completo de extracción, transformación y carga de datos, integrando todas las funciones 
     necesarias para extraer los datos, limpiarlos, transformarlos y cargarlos en la base de datos.
 
     Este proceso sigue los siguientes pasos:
-        1. Extrae los datos de los hoteles de la competencia y eventos mediante Selenium y la API.
-        2. Realiza la limpieza y transformación de los datos extraídos.
+        1. Extrae los datos de los hoteles de la competencia mediante Selenium y los de eventos mediante la API.
+        2. Realiza la limpieza y transformación de las reservas.
         3. Crea las tablas necesarias en la base de datos y carga los datos transformados.
 
+    Las etapas no se ejecutan una detrás de otra, sino en cuanto están listas sus entradas: el scraping de los hoteles, 
+    la descarga de los eventos y la lectura y limpieza de las reservas empiezan a la vez en hilos distintos, y la 
+    transformación solo espera al scraping para rellenar los datos de la competencia (ver `transformacion_competencia`). 
+    La carga empieza al terminar la transformación, con el DataFrame en memoria y mientras se escribe el archivo de 
+    salida, y la tabla de eventos se carga en cuanto terminan su descarga y la carga de las ciudades (ver `crear_tablas`). 
+    Así el tiempo total se aproxima al de la etapa más lenta en lugar de a la suma de todas.
+
+    Con `directorio_checkpoint`, el resultado de cada etapa se guarda en el checkpoint al terminar (el de la 
+    transformación, solo en `archivo_salida`, al que apunta el manifiesto) y la carga confirma 
+    cada tabla en lotes, anotando su progreso en el manifiesto (ver `src/soporte_checkpoint.py` y `crear_tablas`). 
+    Si la ejecución falla, con `reanudar=True` (`python main.py --resume`) se omiten las etapas terminadas, que se leen 
+    del checkpoint, y la carga continúa desde el primer lote sin confirmar de cada tabla.
+
     Args:
         archivo_entrada (str): Ruta al archivo de entrada (datos sin procesar) que contiene la información de las reservas.
-        archivo_salida (str): Ruta al archivo donde se guardará el DataFrame transformado (en formato Pickle).
+        archivo_salida (str): Ruta al archivo donde se guardará el DataFrame transformado (por defecto en formato Feather;
+                              la extensión se ajusta al formato).
         url_selenium (str): URL para extraer los datos de los hoteles de la competencia usando Selenium.
         url_api (str): URL para obtener los datos de eventos a través de la API.
         archivo_salida_selenium (str): Ruta al archivo donde se guardarán los datos extraídos con Selenium.
@@ -39,6 +141,23 @@ def extraccion_transf_carga(archivo_entrada, archivo_salida, url_selenium, url_a
         contraseña (str): Contraseña para la conexión a la base de datos.
         servidor (str): Dirección del servidor donde se encuentra la base de datos.
         puerto (int): Puerto en el que la base de datos está escuchando.
+        directorio_cache_http (str, optional): Carpeta de la caché HTTP de la API de eventos. Si se indica, los eventos 
+                                               solo se descargan y procesan de nuevo cuando la API ha cambiado.
+        directorio_cache_etapas (str, optional): Carpeta de la caché de etapas (ver `src/soporte_cache.py`). Si se indica, la 
+                                                 extracción y la transformación se omiten cuando sus entradas y su código 
+                                                 no han cambiado desde una ejecución anterior. La carga se ejecuta siempre.
+        caducidad_extraccion (float, optional): Segundos durante los que se reutiliza una extracción cacheada, ya que 
+                                                depende de fuentes externas. Por defecto es 24 horas.
+        directorio_claves (str, optional): Carpeta donde se guardan los id de los clientes, para que los clientes de 
+                                           cargas anteriores conserven su id (ver `src/soporte_claves.py`).
+        politica_salida (str, optional): Qué hacer si el archivo de salida ya existe: "sobrescribir", "version", "omitir", 
+                                         "error" o "preguntar" (ver `src/soporte_almacenamiento.py`). Por defecto es 
+                                         `POLITICA_SALIDA_POR_DEFECTO`, que no pide confirmación.
+        directorio_checkpoint (str, optional): Carpeta del checkpoint de la ejecución. Por defecto es None (sin checkpoint).
+        reanudar (bool, optional): Si se reanuda la ejecución guardada en `directorio_checkpoint` en lugar de empezar 
+                                   una nueva. Por defecto es False.
+        formato (str, optional): El formato de los archivos de salida ("feather", "parquet" o "pickle"). 
+                                 Por defecto es `FORMATO_POR_DEFECTO`.
 
     Returns:
         None: Esta función no retorna ningún valor, solo realiza el proceso completo de extracción, transformación y carga.
@@ -48,27 +167,82 @@ def extraccion_transf_carga(archivo_entrada, archivo_salida, url_selenium, url_a
                    con un mensaje detallado.
     """
     try:
-        # extraer los datos de hoteles y eventos
-        try:
-            df_hoteles_competencia, df_eventos = extraer_datos(url_selenium, url_api, archivo_salida_selenium, archivo_salida_api)
-        except Exception as e:
-            raise Exception(f"Error en la extracción de datos: {e}")
-
-        # realizar la limpieza y transformacion de los datos
-        try:
-            df = limpieza_transformacion(archivo_entrada, df_hoteles_competencia, archivo_salida)
-        except Exception as e:
-            raise Exception(f"Error en la limpieza y transformación de datos: {e}")
-
-        # crear tablas y cargar datos en la base de datos
-        try:
-            crear_tablas(nombre_db, usuario, contraseña, servidor, puerto, df, df_eventos, df_hoteles_competencia)
-        except Exception as e:
-            raise Exception(f"Error en la creación de tablas y carga de datos en la base de datos: {e}")
+        if reanudar and directorio_checkpoint is None:
+            raise ValueError("Para reanudar una ejecución hay que indicar la carpeta del checkpoint.")
+        if directorio_checkpoint is not None:
+            # la contraseña no se guarda en el manifiesto
+            parametros = {"archivo_entrada": archivo_entrada, "archivo_salida": archivo_salida, "url_selenium": url_selenium,
+                          "url_api": url_api, "nombre_db": nombre_db, "usuario": usuario, "servidor": servidor, "puerto": puerto}
+            inicio_checkpoint(directorio_checkpoint, parametros, reanudar)
+            if etapa_completada(directorio_checkpoint, "carga"):
+                return
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            # lanza a la vez la extraccion de hoteles, la de eventos y la limpieza de las reservas (las terminadas en 
+            # una ejecucion anterior se leen del checkpoint)
+            futuro_hoteles = executor.submit(etapa_checkpoint, directorio_checkpoint, "extraccion_hoteles",
+                                             ejecutar_etapa, directorio_cache_etapas, "extraccion_hoteles", extraccion_hoteles,
+                                             url_selenium, archivo_salida_selenium, formato=formato,
+                                             entradas=[url_selenium], caducidad=caducidad_extraccion,
+                                             salida=lambda df: guardar_dataframe(df, ruta_formato(archivo_salida_selenium, formato)))
+            futuro_eventos = executor.submit(etapa_checkpoint, directorio_checkpoint, "extraccion_eventos",
+                                             ejecutar_etapa, directorio_cache_etapas, "extraccion_eventos", extraccion_eventos,
+                                             url_api, archivo_salida_api, directorio_cache_http=directorio_cache_http, formato=formato,
+                                             entradas=[url_api], caducidad=caducidad_extraccion,
+                                             salida=lambda df: guardar_dataframe(df, ruta_formato(archivo_salida_api, formato)))
+            # el resultado de la transformacion lo escribe solo `etapa_checkpoint`, en el archivo de salida, que hace 
+            # tambien de checkpoint de la etapa
+            futuro_df = executor.submit(etapa_checkpoint, directorio_checkpoint, "transformacion",
+                                        transformacion_competencia, archivo_entrada, futuro_hoteles, None,
+                                        directorio_cache_etapas, directorio_claves, politica_salida, formato, segundo_plano=True,
+                                        ruta_resultado=ruta_formato(archivo_salida, formato), politica_resultado=politica_salida)
+
+            # si falla el scraping, la transformacion tambien falla: se informa primero del error de la extraccion
+            df_hoteles_competencia = resultado_etapa(futuro_hoteles, "la extracción de datos de los hoteles")
+            df = resultado_etapa(futuro_df, "la limpieza y transformación de datos")
+
+            # crear tablas y cargar datos en la base de datos (los eventos pueden seguir descargandose)
+            try:
+                crear_tablas(nombre_db, usuario, contraseña, servidor, puerto, df, futuro_eventos, df_hoteles_competencia,
+                             directorio_checkpoint=directorio_checkpoint)
+            except Exception as e:
+                raise Exception(f"Error en la creación de tablas y carga de datos en la base de datos: {e}")
+
+            # el archivo de salida se ha ido escribiendo durante la carga
+            try:
+                esperar_escrituras()
+            except Exception as e:
+                raise Exception(f"Error en la escritura del archivo de salida: {e}")
+
+            if directorio_checkpoint is not None:
+                registro_etapa(directorio_checkpoint, "carga")
 
     except Exception as e:
         # en caso de error en alguna de las etapas, se lanza una excepcion con un mensaje detallado
         raise Exception(f"Error en el proceso completo de extracción, transformación y carga: {e}")
 
-# llamada a la funcion final que realiza el proceso completo de extraccion, transformacion y carga
-extraccion_transf_carga(ARCHIVO_RAW, ARCHIVO_SALIDA, URL_SELENIUM, URL_API, ARCHIVO_EXTRACCION_HOTELES, ARCHIVO_EXTRACCION_EVENTOS, DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT)
+
+instrumentar_modulo(globals())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Proceso ETL de las reservas de hoteles (la configuración se lee del archivo .env).")
+    parser.add_argument("--checkpoint", default=DIRECTORIO_CHECKPOINT,
+                        help="Carpeta del checkpoint para poder reanudar la ejecución. Por defecto es DIRECTORIO_CHECKPOINT.")
+    parser.add_argument("--reanudar", "--resume", action="store_true",
+                        help="Continúa la última ejecución desde la primera etapa o el primer lote de la carga sin terminar.")
+    args = parser.parse_args()
+    if args.reanudar and not args.checkpoint:
+        parser.error("--resume necesita la carpeta del checkpoint (--checkpoint o DIRECTORIO_CHECKPOINT).")
+
+    # con ARCHIVO_METRICAS_JSON o ARCHIVO_METRICAS_PROMETHEUS se guardan las metricas de cada etapa, aunque falle alguna
+    medir = bool(ARCHIVO_METRICAS_JSON or ARCHIVO_METRICAS_PROMETHEUS)
+    if medir:
+        iniciar_metricas(PERFIL_METRICAS, MEMORIA_METRICAS, DIRECTORIO_PERFILES)
+    try:
+        # llamada a la funcion final que realiza el proceso completo de extraccion, transformacion y carga
+        extraccion_transf_carga(ARCHIVO_RAW, ARCHIVO_SALIDA, URL_SELENIUM, URL_API, ARCHIVO_EXTRACCION_HOTELES, ARCHIVO_EXTRACCION_EVENTOS, DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DIRECTORIO_CACHE_HTTP, DIRECTORIO_CACHE_ETAPAS, directorio_claves=DIRECTORIO_CLAVES, politica_salida=POLITICA_SALIDA,
+                                directorio_checkpoint=args.checkpoint, reanudar=args.reanudar)
+    finally:
+        if medir:
+            finalizar_metricas(ARCHIVO_METRICAS_JSON, ARCHIVO_METRICAS_PROMETHEUS)
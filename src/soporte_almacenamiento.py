@@ -0,0 +1,349 @@
+import pandas as pd
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+from src.soporte_metricas import instrumentar_modulo
+
+# formatos de los archivos intermedios y su extension; feather (Arrow IPC) se puede leer con memory-map y sin copias
+EXTENSIONES_FORMATOS = {"feather": ".feather", "parquet": ".parquet", "pickle": ".pickle"}
+FORMATO_POR_DEFECTO = "feather"
+# compresion por defecto de cada formato: feather sin comprimir para poder mapear el archivo en memoria
+COMPRESION_POR_DEFECTO = {"feather": "uncompressed", "parquet": "zstd"}
+# que hacer cuando el archivo de salida ya existe: sobrescribirlo, guardar una nueva version ("salida_1.feather"...),
+# no escribirlo, lanzar un error o preguntar al usuario (solo en ejecuciones interactivas)
+POLITICAS_SALIDA = ("sobrescribir", "version", "omitir", "error", "preguntar")
+POLITICA_SALIDA_POR_DEFECTO = "sobrescribir"
+# hilos que guardan los archivos en segundo plano (ver `guardar_salida`) y escrituras que aun no han terminado
+HILOS_ESCRITURA = 2
+ESCRITURAS_PENDIENTES = {}
+EJECUTOR_ESCRITURA = {}
+LOCK_ESCRITURAS = threading.Lock()
+
+def formato_archivo(ruta):
+    """
+    Deduce el formato de un archivo intermedio a partir de su extensión.
+
+    Args:
+        ruta (str): La ruta del archivo.
+
+    Returns:
+        str: El formato ("feather", "parquet" o "pickle"), o `FORMATO_POR_DEFECTO` si la extensión no es conocida.
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension in (".feather", ".arrow", ".ipc"):
+        return "feather"
+    if extension in (".parquet", ".pq"):
+        return "parquet"
+    if extension in (".pickle", ".pkl"):
+        return "pickle"
+    return FORMATO_POR_DEFECTO
+
+
+def ruta_formato(ruta, formato):
+    """
+    Ajusta la extensión de la ruta de un archivo intermedio al formato indicado (por ejemplo,
+    "tabla_eventos.pickle" en formato feather pasa a ser "tabla_eventos.feather").
+
+    Args:
+        ruta (str): La ruta del archivo.
+        formato (str): El formato del archivo.
+
+    Returns:
+        str: La ruta con la extensión del formato.
+
+    Raises:
+        ValueError: Si el formato no es válido.
+    """
+    if formato not in EXTENSIONES_FORMATOS:
+        raise ValueError(f"Formato no válido: {formato}. Debe ser uno de {list(EXTENSIONES_FORMATOS)}.")
+    if formato_archivo(ruta) == formato and os.path.splitext(ruta)[1]:
+        return ruta
+    return os.path.splitext(ruta)[0] + EXTENSIONES_FORMATOS[formato]
+
+
+def guardar_dataframe(dataframe, ruta, formato=None, compresion=None):
+    """
+    Guarda un DataFrame en un archivo intermedio. Los formatos feather y parquet guardan también el índice y los
+    tipos de datos de pandas, por lo que el DataFrame leído con `leer_dataframe` es igual al guardado.
+
+    El archivo se escribe primero en un temporal de la misma carpeta y se renombra al terminar, así que quien lo lea
+    encuentra siempre la versión anterior completa o la nueva completa, nunca un archivo a medias.
+
+    Args:
+        dataframe (pd.DataFrame): El DataFrame a guardar.
+        ruta (str): La ruta del archivo.
+        formato (str, optional): "feather", "parquet" o "pickle". Por defecto se deduce de la extensión de la ruta.
+        compresion (str, optional): La compresión de feather ("uncompressed", "lz4" o "zstd") o de parquet
+                                    ("zstd", "snappy", "gzip"...). Por defecto es la de `COMPRESION_POR_DEFECTO`.
+
+    Returns:
+        str: La ruta del archivo guardado.
+
+    Raises:
+        ValueError: Si el formato no es válido.
+    """
+    formato = formato or formato_archivo(ruta)
+    compresion = compresion or COMPRESION_POR_DEFECTO.get(formato)
+    if formato not in EXTENSIONES_FORMATOS:
+        raise ValueError(f"Formato no válido: {formato}. Debe ser uno de {list(EXTENSIONES_FORMATOS)}.")
+
+    # escribe a un temporal en la misma carpeta y lo renombra al terminar
+    descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(ruta)), prefix=os.path.basename(ruta) + ".", suffix=".tmp")
+    os.close(descriptor)
+    try:
+        if formato == "pickle":
+            dataframe.to_pickle(temporal)
+        else:
+            tabla = pa.Table.from_pandas(dataframe)
+            if formato == "feather":
+                feather.write_feather(tabla, temporal, compression=compresion)
+            else:
+                pq.write_table(tabla, temporal, compression=compresion)
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.remove(temporal)
+        raise
+    return ruta
+
+
+def escritura_atomica(ruta, texto):
+    """
+    Escribe un archivo de texto (el manifiesto del checkpoint, los informes de métricas...) primero en un temporal y 
+    lo renombra al terminar, para que quien lo lea (por ejemplo, Prometheus o una ejecución reanudada) no encuentre 
+    nunca un archivo a medias.
+
+    Args:
+        ruta (str): La ruta del archivo. Su carpeta se crea si no existe.
+        texto (str): El contenido del archivo.
+
+    Returns:
+        None: La función escribe el archivo.
+    """
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    # el temporal se crea con open y no con mkstemp para que tenga los permisos por defecto (node_exporter lo lee 
+    # con otro usuario)
+    with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+        f.write(texto)
+    os.replace(ruta + ".tmp", ruta)
+
+
+def ruta_version(ruta):
+    """
+    Devuelve la primera ruta libre añadiendo un número de versión al nombre del archivo ("salida.feather" pasa a ser
+    "salida_1.feather", "salida_2.feather"...). Las rutas de las escrituras en segundo plano que aún no han terminado
+    se consideran ocupadas.
+
+    Args:
+        ruta (str): La ruta del archivo.
+
+    Returns:
+        str: La ruta de la nueva versión.
+    """
+    base, extension = os.path.splitext(ruta)
+    version = 1
+    while os.path.exists(f"{base}_{version}{extension}") or f"{base}_{version}{extension}" in ESCRITURAS_PENDIENTES:
+        version += 1
+    return f"{base}_{version}{extension}"
+
+
+def resolucion_ruta_salida(ruta, politica=POLITICA_SALIDA_POR_DEFECTO):
+    """
+    Decide dónde se escribe un archivo de salida según la política elegida para cuando ya existe (ver `POLITICAS_SALIDA`):
+        - "sobrescribir": se reemplaza el archivo existente.
+        - "version": se escribe una nueva versión junto al existente (ver `ruta_version`).
+        - "omitir": no se escribe nada y se conserva el existente.
+        - "error": se lanza `FileExistsError`.
+        - "preguntar": se pregunta al usuario si se sobrescribe (el comportamiento original; solo para ejecuciones
+          interactivas, sin terminal se considera que la respuesta es no).
+
+    Args:
+        ruta (str): La ruta del archivo de salida.
+        politica (str, optional): La política de `POLITICAS_SALIDA`. Por defecto es `POLITICA_SALIDA_POR_DEFECTO`.
+
+    Returns:
+        str: La ruta donde se debe escribir, o None si no se debe escribir.
+
+    Raises:
+        ValueError: Si la política no es válida.
+        FileExistsError: Si el archivo ya existe y la política es "error", o es "preguntar" y no se confirma.
+    """
+    if politica not in POLITICAS_SALIDA:
+        raise ValueError(f"Política de salida no válida: {politica}. Debe ser una de {list(POLITICAS_SALIDA)}.")
+    if not os.path.exists(ruta) and ruta not in ESCRITURAS_PENDIENTES:
+        return ruta
+
+    if politica == "sobrescribir":
+        return ruta
+    if politica == "version":
+        return ruta_version(ruta)
+    if politica == "omitir":
+        return None
+    if politica == "preguntar":
+        try:
+            respuesta = input(f"El archivo {ruta} ya existe. ¿Desea sobrescribirlo? (s/n): ")
+        except EOFError:
+            respuesta = "n"
+        if respuesta.lower() == "s":
+            return ruta
+        raise FileExistsError(f"El archivo {ruta} no se ha sobrescrito.")
+    raise FileExistsError(f"El archivo {ruta} ya existe.")
+
+
+def ejecutor_escritura():
+    """
+    Devuelve el grupo de hilos que guarda los archivos en segundo plano, creándolo la primera vez. Sus hilos no son
+    demonios, así que el intérprete espera a que terminen las escrituras pendientes antes de salir.
+
+    Returns:
+        concurrent.futures.ThreadPoolExecutor: El grupo de hilos de escritura.
+    """
+    with LOCK_ESCRITURAS:
+        if "ejecutor" not in EJECUTOR_ESCRITURA:
+            EJECUTOR_ESCRITURA["ejecutor"] = ThreadPoolExecutor(max_workers=HILOS_ESCRITURA, thread_name_prefix="escritura")
+        return EJECUTOR_ESCRITURA["ejecutor"]
+
+
+def fin_escritura(ruta, futuro):
+    """
+    Quita una escritura en segundo plano de `ESCRITURAS_PENDIENTES` cuando termina, salvo que haya fallado: las que
+    fallan se conservan para que `esperar_escrituras` lance su error.
+
+    Args:
+        ruta (str): La ruta del archivo.
+        futuro (concurrent.futures.Future): El `Future` de la escritura.
+
+    Returns:
+        None
+    """
+    if futuro.exception() is None:
+        with LOCK_ESCRITURAS:
+            if ESCRITURAS_PENDIENTES.get(ruta) is futuro:
+                del ESCRITURAS_PENDIENTES[ruta]
+
+
+def escritura_encadenada(anterior, dataframe, ruta, formato=None, compresion=None):
+    """
+    Guarda un DataFrame con `guardar_dataframe` después de que termine la escritura anterior en la misma ruta.
+
+    Args:
+        anterior (concurrent.futures.Future): El `Future` de la escritura anterior, o None.
+        dataframe (pd.DataFrame): El DataFrame a guardar.
+        ruta (str): La ruta del archivo.
+        formato (str, optional): El formato del archivo.
+        compresion (str, optional): La compresión del archivo.
+
+    Returns:
+        str: La ruta del archivo guardado.
+    """
+    if anterior is not None:
+        wait([anterior])
+    return guardar_dataframe(dataframe, ruta, formato, compresion)
+
+
+def guardar_salida(dataframe, ruta, politica=POLITICA_SALIDA_POR_DEFECTO, segundo_plano=False, formato=None, compresion=None):
+    """
+    Guarda un DataFrame en un archivo de salida sin pedir confirmación: si el archivo ya existe, se aplica `politica`
+    (ver `resolucion_ruta_salida`), y la escritura es atómica (ver `guardar_dataframe`).
+
+    Con `segundo_plano=True`, la serialización y la escritura se hacen en un hilo aparte y la función vuelve enseguida,
+    para que la siguiente etapa pueda empezar con el DataFrame en memoria. El hilo guarda una copia superficial del
+    DataFrame (con copy-on-write no copia los datos), así que los cambios posteriores en el original no llegan al archivo.
+    La ruta se decide antes de volver, por lo que los errores de la política se lanzan igualmente en el hilo que llama;
+    los de la escritura se lanzan al esperarla con `esperar_escrituras`.
+
+    Args:
+        dataframe (pd.DataFrame): El DataFrame a guardar.
+        ruta (str): La ruta del archivo de salida.
+        politica (str, optional): La política si el archivo ya existe (ver `POLITICAS_SALIDA`). Por defecto es
+                                  `POLITICA_SALIDA_POR_DEFECTO`.
+        segundo_plano (bool, optional): Si se escribe en un hilo aparte. Por defecto es False.
+        formato (str, optional): "feather", "parquet" o "pickle". Por defecto se deduce de la extensión de la ruta.
+        compresion (str, optional): La compresión del archivo (ver `guardar_dataframe`).
+
+    Returns:
+        str, concurrent.futures.Future o None: La ruta del archivo guardado (el `Future` de la escritura, que devuelve
+                                              la ruta, con `segundo_plano=True`), o None si no se ha escrito porque ya
+                                              existía y la política es "omitir".
+
+    Raises:
+        ValueError: Si la política no es válida.
+        FileExistsError: Si el archivo ya existe y la política es "error", o es "preguntar" y no se confirma.
+    """
+    if not segundo_plano:
+        ruta = resolucion_ruta_salida(ruta, politica)
+        return None if ruta is None else guardar_dataframe(dataframe, ruta, formato, compresion)
+
+    ejecutor = ejecutor_escritura()
+    with LOCK_ESCRITURAS:
+        ruta = resolucion_ruta_salida(ruta, politica)
+        if ruta is None:
+            return None
+        # dos escrituras a la misma ruta se encadenan para que gane siempre la ultima
+        anterior = ESCRITURAS_PENDIENTES.get(ruta)
+        copia = dataframe.copy(deep=False)
+        futuro = ejecutor.submit(escritura_encadenada, anterior, copia, ruta, formato, compresion)
+        ESCRITURAS_PENDIENTES[ruta] = futuro
+    futuro.add_done_callback(lambda f: fin_escritura(ruta, f))
+    return futuro
+
+
+def esperar_escrituras():
+    """
+    Espera a que terminen todas las escrituras en segundo plano pendientes (ver `guardar_salida`).
+
+    Returns:
+        list: Las rutas de los archivos escritos.
+
+    Raises:
+        RuntimeError: Si alguna escritura ha fallado, con la ruta y el error original.
+    """
+    with LOCK_ESCRITURAS:
+        pendientes = dict(ESCRITURAS_PENDIENTES)
+    wait(list(pendientes.values()))
+
+    errores = []
+    for ruta, futuro in pendientes.items():
+        if futuro.exception() is not None:
+            errores.append(f"{ruta}: {futuro.exception()}")
+            with LOCK_ESCRITURAS:
+                if ESCRITURAS_PENDIENTES.get(ruta) is futuro:
+                    del ESCRITURAS_PENDIENTES[ruta]
+    if errores:
+        raise RuntimeError(f"Error al guardar los archivos de salida: {'; '.join(errores)}")
+    return list(pendientes)
+
+
+def leer_dataframe(ruta, columnas=None, formato=None):
+    """
+    Lee un archivo intermedio guardado con `guardar_dataframe`. En los formatos feather y parquet solo se leen
+    del disco las columnas indicadas, y los archivos feather sin comprimir se mapean en memoria en lugar de copiarse.
+
+    Args:
+        ruta (str): La ruta del archivo.
+        columnas (list, optional): Las columnas a leer. Por defecto se leen todas.
+        formato (str, optional): "feather", "parquet" o "pickle". Por defecto se deduce de la extensión de la ruta.
+
+    Returns:
+        pd.DataFrame: El DataFrame leído.
+    """
+    formato = formato or formato_archivo(ruta)
+
+    if formato == "pickle":
+        dataframe = pd.read_pickle(ruta)
+        return dataframe if columnas is None else dataframe[columnas]
+    if formato == "feather":
+        tabla = feather.read_table(ruta, columns=columnas, memory_map=True)
+    elif formato == "parquet":
+        tabla = pq.read_table(ruta, columns=columnas, memory_map=True)
+    else:
+        raise ValueError(f"Formato no válido: {formato}. Debe ser uno de {list(EXTENSIONES_FORMATOS)}.")
+    return tabla.to_pandas()
+
+
+instrumentar_modulo(globals())
@@ -0,0 +1,267 @@
+import pandas as pd
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+from src.soporte_metricas import instrumentar_modulo
+
+# limites por defecto del tamaño de la cache de etapas; al superarlos se eliminan las entradas usadas hace mas tiempo
+MAX_BYTES_CACHE = 2 * 1024 ** 3
+MAX_ENTRADAS_CACHE = 50
+# las huellas de archivos se recalculan solo si cambian su tamaño o su fecha de modificacion
+HUELLAS_ARCHIVOS = {}
+LOCK_CACHE = threading.Lock()
+
+def huella_archivo(ruta):
+    """
+    Calcula el SHA-256 del contenido de un archivo, leyéndolo por bloques. El resultado se guarda en memoria junto
+    con el tamaño y la fecha de modificación del archivo, y no se vuelve a leer mientras estos no cambien.
+
+    Args:
+        ruta (str): La ruta del archivo.
+
+    Returns:
+        str: El hash del contenido en hexadecimal.
+    """
+    info = os.stat(ruta)
+    clave = (os.path.abspath(ruta), info.st_size, info.st_mtime_ns)
+    if clave not in HUELLAS_ARCHIVOS:
+        sha = hashlib.sha256()
+        with open(ruta, "rb") as f:
+            for bloque in iter(lambda: f.read(1 << 20), b""):
+                sha.update(bloque)
+        HUELLAS_ARCHIVOS[clave] = sha.hexdigest()
+    return HUELLAS_ARCHIVOS[clave]
+
+
+def huella_dataframe(dataframe):
+    """
+    Calcula una huella del contenido de un DataFrame a partir de los hashes de sus filas (incluido el índice),
+    sus columnas y sus tipos de datos.
+
+    Args:
+        dataframe (pd.DataFrame): El DataFrame.
+
+    Returns:
+        str: El hash del DataFrame en hexadecimal.
+    """
+    sha = hashlib.sha256()
+    sha.update(json.dumps([[str(columna), str(tipo)] for columna, tipo in dataframe.dtypes.items()]).encode())
+    try:
+        sha.update(pd.util.hash_pandas_object(dataframe, index=True).to_numpy().tobytes())
+    except TypeError:
+        # columnas con valores no hashables (listas, diccionarios...)
+        sha.update(pickle.dumps(dataframe, protocol=pickle.HIGHEST_PROTOCOL))
+    return sha.hexdigest()
+
+
+def modulos_dependencias(modulo):
+    """
+    Busca los módulos del mismo paquete de los que depende un módulo, directa o indirectamente: los módulos importados
+    y los módulos de las funciones, clases y constantes importadas con `from ... import ...`.
+
+    Args:
+        modulo (module): El módulo.
+
+    Returns:
+        list: Los módulos, empezando por el propio módulo y ordenados por nombre el resto.
+    """
+    paquete = modulo.__name__.split(".")[0]
+    encontrados = {modulo.__name__: modulo}
+    pendientes = [modulo]
+    while pendientes:
+        actual = pendientes.pop()
+        for valor in list(vars(actual).values()):
+            nombre = valor.__name__ if inspect.ismodule(valor) else getattr(valor, "__module__", None)
+            if not isinstance(nombre, str) or nombre in encontrados or nombre.split(".")[0] != paquete:
+                continue
+            dependencia = sys.modules.get(nombre)
+            if dependencia is not None:
+                encontrados[nombre] = dependencia
+                pendientes.append(dependencia)
+    return [modulo] + [encontrados[nombre] for nombre in sorted(encontrados) if nombre != modulo.__name__]
+
+
+def huella_funcion(funcion):
+    """
+    Calcula la versión de una función a partir del código fuente del módulo en el que está definida y de los módulos
+    del mismo paquete de los que depende (ver `modulos_dependencias`), de forma que cualquier cambio en la función o
+    en las funciones auxiliares que usa, aunque estén en otro módulo de `src/`, invalida la caché.
+
+    Args:
+        funcion (callable): La función.
+
+    Returns:
+        str: El hash de la versión en hexadecimal.
+    """
+    sha = hashlib.sha256(f"{funcion.__module__}.{funcion.__qualname__}".encode())
+    modulo = inspect.getmodule(funcion)
+    if modulo is None:
+        sha.update(funcion.__code__.co_code)
+        return sha.hexdigest()
+    for dependencia in modulos_dependencias(modulo):
+        sha.update(dependencia.__name__.encode())
+        try:
+            sha.update(inspect.getsource(dependencia).encode())
+        except (OSError, TypeError):
+            if dependencia is modulo:
+                sha.update(funcion.__code__.co_code)
+    return sha.hexdigest()
+
+
+def huella_valor(valor):
+    """
+    Calcula la huella de una entrada de una etapa: el contenido si es la ruta de un archivo existente, las filas si es
+    un DataFrame, y su representación en otro caso (cadenas, números, listas, diccionarios...).
+
+    Args:
+        valor: La entrada.
+
+    Returns:
+        str: La huella de la entrada.
+    """
+    if isinstance(valor, pd.DataFrame):
+        return f"df:{huella_dataframe(valor)}"
+    if isinstance(valor, pd.Series):
+        return f"df:{huella_dataframe(valor.to_frame())}"
+    if isinstance(valor, (str, os.PathLike)) and os.path.isfile(valor):
+        return f"archivo:{huella_archivo(valor)}"
+    if isinstance(valor, (list, tuple)):
+        return "[" + ",".join(huella_valor(v) for v in valor) + "]"
+    if isinstance(valor, dict):
+        return "{" + ",".join(f"{k!r}:{huella_valor(v)}" for k, v in sorted(valor.items(), key=lambda item: repr(item[0]))) + "}"
+    return repr(valor)
+
+
+def clave_etapa(nombre, funcion, entradas):
+    """
+    Calcula la clave de una ejecución de una etapa a partir de su nombre, la versión de la función y las huellas
+    de sus entradas.
+
+    Args:
+        nombre (str): El nombre de la etapa.
+        funcion (callable): La función de la etapa.
+        entradas (list): Las entradas de las que depende el resultado (ver `huella_valor`).
+
+    Returns:
+        str: La clave de la etapa.
+    """
+    sha = hashlib.sha256(nombre.encode())
+    sha.update(huella_funcion(funcion).encode())
+    sha.update(huella_valor(list(entradas)).encode())
+    return sha.hexdigest()[:32]
+
+
+def limpieza_cache(directorio_cache, max_bytes=MAX_BYTES_CACHE, max_entradas=MAX_ENTRADAS_CACHE):
+    """
+    Elimina de la caché las entradas usadas hace más tiempo hasta que su número y su tamaño total no superan
+    los límites indicados. La fecha de último uso es la fecha de modificación del archivo, que se actualiza
+    en cada acierto.
+
+    Args:
+        directorio_cache (str): La carpeta de la caché.
+        max_bytes (int, optional): El tamaño máximo total en bytes. Por defecto es `MAX_BYTES_CACHE`.
+        max_entradas (int, optional): El número máximo de entradas. Por defecto es `MAX_ENTRADAS_CACHE`.
+
+    Returns:
+        list: Las rutas de las entradas eliminadas.
+    """
+    entradas = []
+    for nombre in os.listdir(directorio_cache):
+        if nombre.endswith(".pickle"):
+            ruta = os.path.join(directorio_cache, nombre)
+            info = os.stat(ruta)
+            entradas.append((info.st_mtime, info.st_size, ruta))
+    entradas.sort()
+
+    total = sum(tamano for _, tamano, _ in entradas)
+    eliminadas = []
+    while entradas and (len(entradas) > max_entradas or total > max_bytes):
+        _, tamano, ruta = entradas.pop(0)
+        os.remove(ruta)
+        total -= tamano
+        eliminadas.append(ruta)
+    return eliminadas
+
+
+def ejecutar_etapa(directorio_cache, nombre, funcion, *args, entradas=None, caducidad=None, salida=None, max_bytes=MAX_BYTES_CACHE,
+                   max_entradas=MAX_ENTRADAS_CACHE, **kwargs):
+    """
+    Ejecuta una etapa del proceso reutilizando su resultado si ya se ha ejecutado con las mismas entradas.
+    El resultado se guarda en `directorio_cache` bajo una clave calculada con `clave_etapa` (nombre de la etapa,
+    versión de la función y huellas de las entradas: contenido de los archivos, filas de los DataFrames y valor
+    del resto), por lo que cualquier cambio en las entradas o en el código provoca una nueva ejecución.
+
+    Las etapas que además de devolver su resultado lo escriben en un archivo no lo escriben cuando se reutiliza el
+    resultado cacheado, así que en ese caso se llama a `salida` con el resultado para que vuelva a escribirlo.
+
+    Si `directorio_cache` es None, la etapa se ejecuta siempre sin caché.
+
+    Args:
+        directorio_cache (str): La carpeta de la caché. Se crea si no existe.
+        nombre (str): El nombre de la etapa.
+        funcion (callable): La función de la etapa, que se llama como `funcion(*args, **kwargs)`.
+        *args: Los argumentos posicionales de la función.
+        entradas (list, optional): Las entradas de las que depende el resultado. Por defecto son todos los argumentos,
+                                   pero conviene indicarlas cuando algún argumento es la ruta de un archivo de salida,
+                                   ya que su contenido cambiaría la clave.
+        caducidad (float, optional): Los segundos tras los que un resultado deja de reutilizarse, para etapas cuyo
+                                     resultado depende de fuentes externas (scraping). Por defecto es None (no caduca).
+        salida (callable, optional): La función que escribe los archivos de salida de la etapa a partir de su resultado,
+                                     que se llama como `salida(resultado)` al reutilizar el resultado cacheado.
+                                     Por defecto es None (la etapa no escribe archivos).
+        max_bytes (int, optional): El tamaño máximo total de la caché en bytes. Por defecto es `MAX_BYTES_CACHE`.
+        max_entradas (int, optional): El número máximo de entradas de la caché. Por defecto es `MAX_ENTRADAS_CACHE`.
+        **kwargs: Los argumentos con nombre de la función.
+
+    Returns:
+        El resultado de la función (calculado o leído de la caché).
+    """
+    if directorio_cache is None:
+        return funcion(*args, **kwargs)
+
+    os.makedirs(directorio_cache, exist_ok=True)
+    if entradas is None:
+        entradas = [list(args), kwargs]
+    ruta = os.path.join(directorio_cache, f"{nombre}-{clave_etapa(nombre, funcion, entradas)}.pickle")
+
+    entrada = None
+    if os.path.exists(ruta):
+        try:
+            with open(ruta, "rb") as f:
+                entrada = pickle.load(f)
+            if caducidad is not None and time.time() - entrada["creado"] > caducidad:
+                entrada = None
+            else:
+                # actualiza la fecha de ultimo uso para la eliminacion de las entradas menos usadas
+                os.utime(ruta)
+        except (OSError, EOFError, KeyError, pickle.UnpicklingError):
+            entrada = None
+    if entrada is not None:
+        if salida is not None:
+            salida(entrada["resultado"])
+        return entrada["resultado"]
+
+    resultado = funcion(*args, **kwargs)
+
+    # escribe a un temporal en la misma carpeta y lo renombra al terminar
+    descriptor, temporal = tempfile.mkstemp(dir=directorio_cache, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            pickle.dump({"creado": time.time(), "resultado": resultado}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.remove(temporal)
+        raise
+
+    with LOCK_CACHE:
+        limpieza_cache(directorio_cache, max_bytes, max_entradas)
+    return resultado
+
+
+instrumentar_modulo(globals())
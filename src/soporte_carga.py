@@ -1,6 +1,48 @@
 import pandas as pd 
 import numpy as np 
 import psycopg2
+import hashlib
+import io
+import os
+import threading
+from psycopg2 import errors, extras, pool
+from src.soporte_checkpoint import TAMANO_LOTE_CHECKPOINT, progreso_carga, registro_carga
+from src.soporte_claves import ids_claves
+from src.soporte_planificacion import ejecutar_grafo_tareas, resultado_futuro
+from src.soporte_metricas import instrumentar_modulo
+
+# errores con los que el servidor rechaza COPY (permisos o proxies que no lo soportan) y se recurre a execute_values
+ERRORES_COPY_NO_PERMITIDO = (errors.InsufficientPrivilege, errors.FeatureNotSupported)
+METODOS_CARGA = ("copy", "execute_values", "executemany")
+
+# clave natural de cada tabla, usada en la carga incremental para detectar filas nuevas o modificadas y fusionarlas
+CLAVES_TABLAS = {
+    "ciudad": ["nombre_ciudad"],
+    "eventos": ["nombre_evento", "url_evento", "fecha_inicio"],
+    "hoteles": ["nombre_hotel"],
+    "clientes": ["id_cliente"],
+    "reservas": ["id_reserva"],
+}
+# tablas cuya clave natural es su clave primaria y admiten INSERT ... ON CONFLICT
+TABLAS_CON_CLAVE_UNICA = ("clientes", "reservas")
+# evita que dos cargas en paralelo de la misma tabla se pisen al actualizar su archivo de estado
+LOCK_ESTADO = threading.Lock()
+# clave natural e id de las tablas de dimensiones a las que hacen referencia otras tablas
+CLAVES_DIMENSIONES = {
+    "ciudad": ("nombre_ciudad", "id_ciudad"),
+    "hoteles": ("nombre_hotel", "id_hotel"),
+    "clientes": ("mail", "id_cliente"),
+}
+# tablas de dimensiones cuyos id necesita la carga de cada tabla (ver `resolucion_claves`); se suman a las claves
+# foraneas de la base de datos, que pueden no estar declaradas
+DEPENDENCIAS_DATOS = {
+    "eventos": {"ciudad"},
+    "hoteles": {"ciudad"},
+    "reservas": {"clientes", "hoteles"},
+}
+# id de las filas de dimensiones insertadas o consultadas en este proceso: (base de datos, tabla) -> {clave: id}
+CACHE_DIMENSIONES = {}
+LOCK_DIMENSIONES = threading.Lock()
 
 def conex_bd_creacion_cursor(nombre_db, usuario, contraseña, servidor, puerto):
     """
@@ -47,45 +89,557 @@ def insercion_db(conn, cur, insert_query, data_to_insert):
     conn.commit()
 
 
-def creacion_tabla_ciudad(conn, cur, dataframe):
+def filas_dataframe(dataframe):
     """
-    Crea una tabla de ciudades en la base de datos a partir de los datos proporcionados en el DataFrame.
-    Solo se insertan las ciudades únicas encontradas en el DataFrame.
+    Convierte un DataFrame en una lista de tuplas con tipos nativos de Python, sustituyendo los nulos por None.
+
+    Args:
+        dataframe (pd.DataFrame): El DataFrame que se quiere convertir.
+
+    Returns:
+        list: Una lista de tuplas, una por fila, lista para pasarse a psycopg2.
+    """
+    dataframe = dataframe.astype(object)
+    return list(dataframe.where(dataframe.notna(), None).itertuples(index=False, name=None))
+
+
+def buffer_csv_dataframe(dataframe):
+    """
+    Escribe un DataFrame en un buffer CSV en memoria con el formato que espera `COPY ... FROM STDIN`.
+    Los valores nulos se escriben como `\\N` para distinguirlos de las cadenas vacías.
+
+    Args:
+        dataframe (pd.DataFrame): El DataFrame que se quiere volcar al buffer.
+
+    Returns:
+        io.StringIO: El buffer con los datos en formato CSV, posicionado al inicio.
+    """
+    buffer = io.StringIO()
+    dataframe.to_csv(buffer, index=False, header=False, na_rep="\\N")
+    buffer.seek(0)
+    return buffer
+
+
+def copia_db(conn, cur, tabla, dataframe, tamano_lote=500000):
+    """
+    Carga un DataFrame en una tabla con `COPY FROM STDIN`, enviando los datos en lotes de `tamano_lote` filas
+    para que el buffer en memoria no crezca con el tamaño de la tabla. Todos los lotes se confirman en una única transacción.
 
     Args:
         conn (psycopg2.extensions.connection): La conexión a la base de datos.
         cur (psycopg2.extensions.cursor): El cursor para ejecutar las consultas.
-        dataframe (pd.DataFrame): El DataFrame que contiene la columna `ciudad` con los nombres de las ciudades.
+        tabla (str): El nombre de la tabla de destino.
+        dataframe (pd.DataFrame): El DataFrame con las columnas de la tabla, en el mismo orden y con los mismos nombres.
+        tamano_lote (int, optional): El número de filas de cada lote. Por defecto es 500000.
 
     Returns:
-        None: La función inserta las ciudades en la base de datos.
+        None: La función inserta los datos en la base de datos.
     """
-    tabla_ciudad = pd.DataFrame(dataframe["ciudad"].unique(), columns=["nombre_ciudad"])
-    data_to_insert = [[row["nombre_ciudad"]] for indice, row in tabla_ciudad.iterrows()]
-    insert_query = """
-        INSERT INTO ciudad (nombre_ciudad)
-        VALUES (%s)
+    copy_query = f"COPY {tabla} ({', '.join(dataframe.columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    for inicio in range(0, len(dataframe), tamano_lote):
+        cur.copy_expert(copy_query, buffer_csv_dataframe(dataframe.iloc[inicio:inicio + tamano_lote]))
+    conn.commit()
+
+
+def insercion_db_lotes(conn, cur, tabla, dataframe, tamano_pagina=10000):
     """
+    Inserta un DataFrame en una tabla con `execute_values`, agrupando `tamano_pagina` filas en cada sentencia INSERT.
 
-    insercion_db(conn, cur, insert_query, data_to_insert)
+    Args:
+        conn (psycopg2.extensions.connection): La conexión a la base de datos.
+        cur (psycopg2.extensions.cursor): El cursor para ejecutar las consultas.
+        tabla (str): El nombre de la tabla de destino.
+        dataframe (pd.DataFrame): El DataFrame con las columnas de la tabla, en el mismo orden y con los mismos nombres.
+        tamano_pagina (int, optional): El número de filas por sentencia. Por defecto es 10000.
 
+    Returns:
+        None: La función inserta los datos en la base de datos.
+    """
+    insert_query = f"INSERT INTO {tabla} ({', '.join(dataframe.columns)}) VALUES %s"
+    extras.execute_values(cur, insert_query, filas_dataframe(dataframe), page_size=tamano_pagina)
+    conn.commit()
 
-def obtener_ciudad_dict(cur):
+
+def carga_tabla(conn, cur, tabla, dataframe, metodo="copy", directorio_estado=None, checkpoint=None):
     """
-    Obtiene un diccionario que mapea los nombres de las ciudades a sus respectivos identificadores (`id_ciudad`) 
-    a partir de la base de datos.
+    Carga un DataFrame en una tabla de la base de datos con el método indicado.
+
+    Métodos disponibles:
+        - "copy": `COPY FROM STDIN` con un buffer CSV en memoria. Si el servidor no permite COPY,
+          se deshace la transacción y se recurre a "execute_values".
+        - "execute_values": sentencias INSERT con varias filas cada una.
+        - "executemany": una sentencia INSERT por fila (comportamiento original de `insercion_db`).
+
+    Si se indica `directorio_estado`, la carga es incremental (ver `carga_incremental`). Si se indica `checkpoint` 
+    (y la carga no es incremental), las filas se confirman en lotes y se anota el progreso (ver `carga_checkpoint`).
 
     Args:
-        cur (psycopg2.extensions.cursor): El cursor para ejecutar la consulta.
+        conn (psycopg2.extensions.connection): La conexión a la base de datos.
+        cur (psycopg2.extensions.cursor): El cursor para ejecutar las consultas.
+        tabla (str): El nombre de la tabla de destino.
+        dataframe (pd.DataFrame): El DataFrame con las columnas de la tabla, en el mismo orden y con los mismos nombres.
+        metodo (str, optional): El método de carga, uno de `METODOS_CARGA`. Por defecto es "copy".
+        directorio_estado (str, optional): Directorio con las huellas de la última carga de cada tabla. Si es None, 
+                                           se insertan todas las filas. Por defecto es None.
+        checkpoint (dict, optional): El checkpoint de la carga (ver `crear_tablas`). Por defecto es None.
+
+    Returns:
+        None: La función inserta los datos en la base de datos.
+
+    Raises:
+        ValueError: Si el método de carga no es válido.
+    """
+    if metodo not in METODOS_CARGA:
+        raise ValueError(f"El método de carga '{metodo}' no es válido. Opciones: {METODOS_CARGA}")
+
+    if directorio_estado is not None:
+        carga_incremental(conn, cur, tabla, dataframe, directorio_estado, metodo)
+        return
+
+    if checkpoint is not None:
+        carga_checkpoint(conn, cur, tabla, dataframe, checkpoint, metodo)
+        return
+
+    if metodo == "copy":
+        try:
+            copia_db(conn, cur, tabla, dataframe)
+            return
+        except ERRORES_COPY_NO_PERMITIDO:
+            # el servidor no admite COPY, se repite la carga con execute_values
+            conn.rollback()
+            metodo = "execute_values"
+
+    if metodo == "execute_values":
+        insercion_db_lotes(conn, cur, tabla, dataframe)
+    else:
+        insert_query = f"""
+            INSERT INTO {tabla} ({', '.join(dataframe.columns)})
+            VALUES ({', '.join(['%s'] * len(dataframe.columns))})
+        """
+        insercion_db(conn, cur, insert_query, filas_dataframe(dataframe))
+
+
+def huellas_filas(tabla, dataframe):
+    """
+    Calcula, para cada fila de un DataFrame, el hash de 64 bits de su clave natural y el de su contenido completo.
+
+    Args:
+        tabla (str): El nombre de la tabla, que determina su clave natural (ver `CLAVES_TABLAS`).
+        dataframe (pd.DataFrame): El DataFrame con las columnas de la tabla.
+
+    Returns:
+        pd.MultiIndex: Un índice con los pares (hash de la clave, hash del contenido) de cada fila.
+    """
+    claves = pd.util.hash_pandas_object(dataframe[CLAVES_TABLAS[tabla]], index=False)
+    contenido = pd.util.hash_pandas_object(dataframe, index=False)
+    return pd.MultiIndex.from_arrays([claves.to_numpy(), contenido.to_numpy()], names=["clave", "huella"])
+
+
+def huella_contenido(dataframe):
+    """
+    Calcula una huella del contenido de un DataFrame a partir de los nombres de sus columnas y del hash de cada fila, 
+    sin el índice (que puede cambiar al volver a leer el DataFrame de un archivo).
+
+    Args:
+        dataframe (pd.DataFrame): El DataFrame.
+
+    Returns:
+        str: El hash del contenido en hexadecimal.
+    """
+    sha = hashlib.sha256("\x1f".join(map(str, dataframe.columns)).encode())
+    sha.update(pd.util.hash_pandas_object(dataframe, index=False).to_numpy().tobytes())
+    return sha.hexdigest()
+
+
+def lectura_estado(tabla, directorio_estado):
+    """
+    Lee las huellas de las filas cargadas en la tabla en ejecuciones anteriores.
+
+    Args:
+        tabla (str): El nombre de la tabla.
+        directorio_estado (str): El directorio donde se guardan las huellas.
+
+    Returns:
+        pd.DataFrame: Un DataFrame con las columnas "clave" y "huella" (vacío si la tabla no se ha cargado nunca).
+    """
+    ruta = os.path.join(directorio_estado, f"{tabla}.parquet")
+    if not os.path.exists(ruta):
+        return pd.DataFrame({"clave": pd.Series(dtype="uint64"), "huella": pd.Series(dtype="uint64")})
+    return pd.read_parquet(ruta)
+
+
+def guardar_estado(tabla, directorio_estado, huellas_nuevas):
+    """
+    Actualiza las huellas guardadas de una tabla con las de las filas que se acaban de cargar. 
+    El estado se vuelve a leer bajo un bloqueo, para no perder las huellas de otras particiones de la misma tabla 
+    cargadas en paralelo, y el archivo se escribe primero en un temporal y se renombra, para no dejarlo a medias.
+
+    Args:
+        tabla (str): El nombre de la tabla.
+        directorio_estado (str): El directorio donde se guardan las huellas.
+        huellas_nuevas (pd.MultiIndex): Las huellas de las filas nuevas o modificadas que se han cargado.
+
+    Returns:
+        None: La función escribe el archivo de estado de la tabla.
+    """
+    nuevas = huellas_nuevas.to_frame(index=False)
+    with LOCK_ESTADO:
+        estado_anterior = lectura_estado(tabla, directorio_estado)
+        estado = pd.concat([estado_anterior[~estado_anterior["clave"].isin(nuevas["clave"])], nuevas], ignore_index=True)
+
+        os.makedirs(directorio_estado, exist_ok=True)
+        ruta = os.path.join(directorio_estado, f"{tabla}.parquet")
+        estado.to_parquet(ruta + ".tmp", index=False)
+        os.replace(ruta + ".tmp", ruta)
+
+
+def fusion_staging(cur, tabla, tabla_staging, columnas):
+    """
+    Fusiona las filas de una tabla temporal en la tabla de destino según su clave natural: 
+    las filas existentes se actualizan y las nuevas se insertan.
+
+    Para las tablas cuya clave natural es la clave primaria se usa `INSERT ... ON CONFLICT DO UPDATE`; 
+    para el resto (con clave primaria SERIAL) un `UPDATE ... FROM` seguido de un `INSERT ... WHERE NOT EXISTS`. 
+    En las tablas de dimensiones, el id de las filas fusionadas se obtiene con `RETURNING` y se guarda en 
+    `CACHE_DIMENSIONES`.
+
+    Args:
+        cur (psycopg2.extensions.cursor): El cursor para ejecutar las consultas.
+        tabla (str): El nombre de la tabla de destino.
+        tabla_staging (str): El nombre de la tabla temporal con las filas a fusionar.
+        columnas (list): Las columnas a copiar.
+
+    Returns:
+        None: La función ejecuta las consultas, sin confirmar la transacción.
+    """
+    claves = CLAVES_TABLAS[tabla]
+    actualizar = [col for col in columnas if col not in claves]
+    lista_columnas = ", ".join(columnas)
+    # en las dimensiones se devuelve el id de cada fila para guardarlo en la cache
+    clave_dimension, id_dimension = CLAVES_DIMENSIONES.get(tabla, (None, None))
+    retorno = f"RETURNING {clave_dimension}, {id_dimension}" if clave_dimension else ""
+
+    if tabla in TABLAS_CON_CLAVE_UNICA:
+        accion = f"DO UPDATE SET {', '.join(f'{col} = EXCLUDED.{col}' for col in actualizar)}" if actualizar else "DO NOTHING"
+        cur.execute(f"""
+            INSERT INTO {tabla} ({lista_columnas})
+            SELECT {lista_columnas} FROM {tabla_staging}
+            ON CONFLICT ({', '.join(claves)}) {accion}
+            {retorno}
+        """)
+        if retorno:
+            registro_claves_dimension(cur, tabla, cur.fetchall())
+        return
+
+    condicion = " AND ".join(f"t.{col} IS NOT DISTINCT FROM s.{col}" for col in claves)
+    if actualizar:
+        cur.execute(f"""
+            UPDATE {tabla} t SET {', '.join(f'{col} = s.{col}' for col in actualizar)}
+            FROM {tabla_staging} s
+            WHERE {condicion}
+            {f"RETURNING t.{clave_dimension}, t.{id_dimension}" if retorno else ""}
+        """)
+        if retorno:
+            registro_claves_dimension(cur, tabla, cur.fetchall())
+    cur.execute(f"""
+        INSERT INTO {tabla} ({lista_columnas})
+        SELECT {lista_columnas} FROM {tabla_staging} s
+        WHERE NOT EXISTS (SELECT 1 FROM {tabla} t WHERE {condicion})
+        {retorno}
+    """)
+    if retorno:
+        registro_claves_dimension(cur, tabla, cur.fetchall())
+
+
+def carga_incremental(conn, cur, tabla, dataframe, directorio_estado, metodo="copy"):
+    """
+    Carga en una tabla solo las filas nuevas o modificadas desde la última carga.
+
+    Pasos realizados por la función:
+    1. Calcula el hash de la clave natural y del contenido de cada fila y descarta las que ya se cargaron sin cambios.
+    2. Copia las filas restantes a una tabla temporal con el método indicado.
+    3. Fusiona la tabla temporal con la tabla de destino (ver `fusion_staging`).
+    4. Guarda las huellas de las filas cargadas en `directorio_estado`.
+
+    Las huellas se guardan en local, por lo que si se vacía la base de datos hay que borrar también `directorio_estado` 
+    para que la siguiente carga vuelva a insertar todas las filas.
+
+    Args:
+        conn (psycopg2.extensions.connection): La conexión a la base de datos.
+        cur (psycopg2.extensions.cursor): El cursor para ejecutar las consultas.
+        tabla (str): El nombre de la tabla de destino.
+        dataframe (pd.DataFrame): El DataFrame con las columnas de la tabla.
+        directorio_estado (str): El directorio donde se guardan las huellas de cada tabla.
+        metodo (str, optional): El método con el que se carga la tabla temporal (ver `carga_tabla`). Por defecto es "copy".
+
+    Returns:
+        None: La función inserta o actualiza los datos en la base de datos.
+    """
+    estado_anterior = lectura_estado(tabla, directorio_estado)
+    huellas = huellas_filas(tabla, dataframe)
+    modificadas = ~huellas.isin(pd.MultiIndex.from_frame(estado_anterior))
+    if not modificadas.any():
+        return
+
+    fusion_lote(conn, cur, tabla, dataframe[modificadas], metodo)
+    guardar_estado(tabla, directorio_estado, huellas[modificadas])
+
+
+def fusion_lote(conn, cur, tabla, dataframe, metodo="copy"):
+    """
+    Copia las filas de un DataFrame a una tabla temporal y las fusiona con la tabla de destino según su clave natural 
+    (ver `fusion_staging`). Se puede repetir sin duplicar filas, por lo que sirve también para volver a cargar un lote 
+    que no se sabe si llegó a confirmarse.
+
+    Args:
+        conn (psycopg2.extensions.connection): La conexión a la base de datos.
+        cur (psycopg2.extensions.cursor): El cursor para ejecutar las consultas.
+        tabla (str): El nombre de la tabla de destino.
+        dataframe (pd.DataFrame): El DataFrame con las columnas de la tabla.
+        metodo (str, optional): El método con el que se carga la tabla temporal (ver `carga_tabla`). Por defecto es "copy".
+
+    Returns:
+        None: La función inserta o actualiza los datos en la base de datos.
+    """
+    tabla_staging = f"staging_{tabla}"
+    columnas = list(dataframe.columns)
+
+    cur.execute(f"DROP TABLE IF EXISTS {tabla_staging}")
+    cur.execute(f"CREATE TEMP TABLE {tabla_staging} AS SELECT {', '.join(columnas)} FROM {tabla} WITH NO DATA")
+    conn.commit()
+
+    carga_tabla(conn, cur, tabla_staging, dataframe, metodo)
+
+    fusion_staging(cur, tabla, tabla_staging, columnas)
+    cur.execute(f"DROP TABLE {tabla_staging}")
+    conn.commit()
+
+
+def carga_checkpoint(conn, cur, tabla, dataframe, checkpoint, metodo="copy", funcion_carga=None):
+    """
+    Carga un DataFrame en una tabla en lotes de `checkpoint["tamano_lote"]` filas, confirmando cada lote en su propia 
+    transacción y anotando en el manifiesto del checkpoint las filas ya confirmadas (ver `src/soporte_checkpoint.py`). 
+    Si la carga se interrumpe, al reanudarla se continúa desde el primer lote sin confirmar en lugar de repetir la tabla. 
+    Junto al progreso se guarda la huella del contenido del DataFrame (ver `huella_contenido`), para no reanudar la 
+    carga con otros datos aunque tengan el mismo número de filas.
+
+    Antes de cargar cada lote se anota que está en curso. Si la ejecución se interrumpe entre la confirmación en la base 
+    de datos y la anotación en el manifiesto, al reanudarla ese lote se vuelve a cargar con `fusion_lote`, que no 
+    duplica las filas que ya se hubieran insertado.
+
+    Args:
+        conn (psycopg2.extensions.connection): La conexión a la base de datos.
+        cur (psycopg2.extensions.cursor): El cursor para ejecutar las consultas.
+        tabla (str): El nombre de la tabla de destino.
+        dataframe (pd.DataFrame): El DataFrame con las columnas de la tabla. Debe ser el mismo al reanudar la carga.
+        checkpoint (dict): El checkpoint de la carga, con las claves "directorio", "nombre" y "tamano_lote".
+        metodo (str, optional): El método de carga de cada lote (ver `carga_tabla`). Por defecto es "copy".
+        funcion_carga (callable, optional): La función que carga cada lote, con los argumentos 
+                                            `(conn, cur, tabla, lote, metodo)`. Por defecto es `carga_tabla`.
+
+    Returns:
+        None: La función inserta los datos en la base de datos.
+
+    Raises:
+        ValueError: Si el DataFrame no tiene las mismas filas que el de la carga que se reanuda.
+    """
+    funcion_carga = funcion_carga or carga_tabla
+    progreso = progreso_carga(checkpoint)
+    if progreso.get("filas", len(dataframe)) != len(dataframe):
+        raise ValueError(f"La carga de {checkpoint['nombre']} que se reanuda tenía {progreso['filas']} filas y ahora tiene {len(dataframe)}.")
+    huella = huella_contenido(dataframe)
+    if progreso.get("huella", huella) != huella:
+        raise ValueError(f"La carga de {checkpoint['nombre']} que se reanuda tenía otros datos con el mismo número de filas.")
+
+    inicio = progreso.get("filas_confirmadas", 0)
+    # el lote en curso de la ejecucion anterior puede estar confirmado o no
+    en_duda = progreso.get("lote_en_curso", False)
+    tamano_lote = checkpoint.get("tamano_lote", TAMANO_LOTE_CHECKPOINT)
+    while inicio < len(dataframe):
+        lote = dataframe.iloc[inicio:inicio + tamano_lote]
+        registro_carga(checkpoint, filas=len(dataframe), huella=huella, filas_confirmadas=inicio, lote_en_curso=True)
+        if en_duda:
+            fusion_lote(conn, cur, tabla, lote, metodo)
+            en_duda = False
+        else:
+            funcion_carga(conn, cur, tabla, lote, metodo)
+        inicio += len(lote)
+        registro_carga(checkpoint, filas=len(dataframe), huella=huella, filas_confirmadas=inicio, lote_en_curso=False)
+
+
+def registro_claves_dimension(cur, tabla, pares):
+    """
+    Guarda en `CACHE_DIMENSIONES` el id de las claves naturales de una tabla de dimensiones.
+
+    Args:
+        cur (psycopg2.extensions.cursor): El cursor de la base de datos a la que pertenecen los id.
+        tabla (str): El nombre de la tabla de dimensiones.
+        pares (iterable): Los pares (clave natural, id).
+
+    Returns:
+        None: La función actualiza la caché.
+    """
+    with LOCK_DIMENSIONES:
+        CACHE_DIMENSIONES.setdefault((cur.connection.dsn, tabla), {}).update(pares)
+
+
+def vaciado_cache_dimensiones():
+    """
+    Vacía la caché de id de las tablas de dimensiones. Hay que llamarla si se vacían o se recrean las tablas 
+    en la base de datos mientras el proceso sigue en marcha, ya que los id guardados dejarían de ser válidos.
+
+    Returns:
+        None: La función vacía la caché.
+    """
+    with LOCK_DIMENSIONES:
+        CACHE_DIMENSIONES.clear()
+
+
+def insercion_dimension(conn, cur, tabla, dataframe, metodo="copy"):
+    """
+    Inserta las filas de una tabla de dimensiones con id SERIAL obteniendo el id asignado a cada una con 
+    `INSERT ... RETURNING`, y lo guarda en `CACHE_DIMENSIONES` para que las tablas que la referencian no tengan 
+    que volver a consultarlo.
+
+    Con el método "copy", las filas se copian a una tabla temporal y se insertan desde ella con una única 
+    sentencia `INSERT ... SELECT ... RETURNING`.
+
+    Args:
+        conn (psycopg2.extensions.connection): La conexión a la base de datos.
+        cur (psycopg2.extensions.cursor): El cursor para ejecutar las consultas.
+        tabla (str): El nombre de la tabla de dimensiones (ver `CLAVES_DIMENSIONES`).
+        dataframe (pd.DataFrame): El DataFrame con las columnas de la tabla, sin el id.
+        metodo (str, optional): El método de carga (ver `carga_tabla`). Por defecto es "copy".
+
+    Returns:
+        None: La función inserta los datos en la base de datos.
+    """
+    clave, columna_id = CLAVES_DIMENSIONES[tabla]
+    lista_columnas = ", ".join(dataframe.columns)
+    retorno = f"RETURNING {clave}, {columna_id}"
+
+    if metodo == "copy":
+        tabla_staging = f"staging_{tabla}"
+        cur.execute(f"DROP TABLE IF EXISTS {tabla_staging}")
+        cur.execute(f"CREATE TEMP TABLE {tabla_staging} AS SELECT {lista_columnas} FROM {tabla} WITH NO DATA")
+        conn.commit()
+
+        carga_tabla(conn, cur, tabla_staging, dataframe, metodo)
+        cur.execute(f"INSERT INTO {tabla} ({lista_columnas}) SELECT {lista_columnas} FROM {tabla_staging} {retorno}")
+        pares = cur.fetchall()
+        cur.execute(f"DROP TABLE {tabla_staging}")
+    elif metodo == "execute_values":
+        insert_query = f"INSERT INTO {tabla} ({lista_columnas}) VALUES %s {retorno}"
+        pares = extras.execute_values(cur, insert_query, filas_dataframe(dataframe), page_size=10000, fetch=True)
+    else:
+        insert_query = f"INSERT INTO {tabla} ({lista_columnas}) VALUES ({', '.join(['%s'] * len(dataframe.columns))}) {retorno}"
+        pares = []
+        for fila in filas_dataframe(dataframe):
+            cur.execute(insert_query, fila)
+            pares.append(cur.fetchone())
+    conn.commit()
+
+    registro_claves_dimension(cur, tabla, pares)
+
+
+def carga_dimension(conn, cur, tabla, dataframe, metodo="copy", directorio_estado=None, checkpoint=None):
+    """
+    Carga una tabla de dimensiones guardando en `CACHE_DIMENSIONES` el id de cada fila cargada: el devuelto por 
+    `INSERT ... RETURNING` si la tabla genera sus id (ver `insercion_dimension`), o el del propio DataFrame si los 
+    id vienen asignados. En la carga incremental, los id se obtienen al fusionar la tabla temporal (ver `fusion_staging`). 
+    Con `checkpoint`, las filas se cargan en lotes (ver `carga_checkpoint`).
+
+    Args:
+        conn (psycopg2.extensions.connection): La conexión a la base de datos.
+        cur (psycopg2.extensions.cursor): El cursor para ejecutar las consultas.
+        tabla (str): El nombre de la tabla de dimensiones (ver `CLAVES_DIMENSIONES`).
+        dataframe (pd.DataFrame): El DataFrame con las columnas de la tabla.
+        metodo (str, optional): El método de carga (ver `carga_tabla`). Por defecto es "copy".
+        directorio_estado (str, optional): Directorio de estado para la carga incremental (ver `carga_tabla`). 
+                                           Por defecto es None.
+        checkpoint (dict, optional): El checkpoint de la carga (ver `crear_tablas`). Por defecto es None.
+
+    Returns:
+        None: La función inserta los datos en la base de datos.
+
+    Raises:
+        ValueError: Si el método de carga no es válido.
+    """
+    if metodo not in METODOS_CARGA:
+        raise ValueError(f"El método de carga '{metodo}' no es válido. Opciones: {METODOS_CARGA}")
+
+    clave, columna_id = CLAVES_DIMENSIONES[tabla]
+    if directorio_estado is not None:
+        carga_incremental(conn, cur, tabla, dataframe, directorio_estado, metodo)
+    elif columna_id in dataframe.columns:
+        carga_tabla(conn, cur, tabla, dataframe, metodo, checkpoint=checkpoint)
+        registro_claves_dimension(cur, tabla, zip(dataframe[clave].tolist(), dataframe[columna_id].tolist()))
+    elif checkpoint is not None:
+        carga_checkpoint(conn, cur, tabla, dataframe, checkpoint, metodo, insercion_dimension)
+    else:
+        insercion_dimension(conn, cur, tabla, dataframe, metodo)
+
+
+def resolucion_claves(cur, tabla, valores):
+    """
+    Obtiene el id de cada valor de una clave natural en una tabla de dimensiones (por ejemplo, el id_cliente de cada 
+    mail). Los id se buscan primero en `CACHE_DIMENSIONES`; solo los valores que no están en la caché se consultan 
+    en la base de datos, copiándolos a una tabla temporal y cruzándola con la tabla de dimensiones en el servidor, 
+    en lugar de descargar la tabla completa. Los id consultados se añaden a la caché.
+
+    Args:
+        cur (psycopg2.extensions.cursor): El cursor para ejecutar las consultas.
+        tabla (str): El nombre de la tabla de dimensiones (ver `CLAVES_DIMENSIONES`).
+        valores (pd.Series): Los valores de la clave natural.
+
+    Returns:
+        pd.Series: El id de cada valor, con el mismo índice que `valores` (nulo si el valor es nulo o no está en la tabla).
+    """
+    clave, columna_id = CLAVES_DIMENSIONES[tabla]
+    unicos = pd.unique(valores.dropna()).tolist()
+    with LOCK_DIMENSIONES:
+        cache = CACHE_DIMENSIONES.setdefault((cur.connection.dsn, tabla), {})
+        faltan = [valor for valor in unicos if valor not in cache]
+
+    if faltan:
+        conn = cur.connection
+        tabla_claves = f"claves_{tabla}"
+        cur.execute(f"DROP TABLE IF EXISTS {tabla_claves}")
+        cur.execute(f"CREATE TEMP TABLE {tabla_claves} AS SELECT {clave} FROM {tabla} WITH NO DATA")
+        conn.commit()
+
+        carga_tabla(conn, cur, tabla_claves, pd.DataFrame({clave: faltan}))
+        cur.execute(f"SELECT t.{clave}, t.{columna_id} FROM {tabla} t JOIN {tabla_claves} c ON t.{clave} = c.{clave}")
+        registro_claves_dimension(cur, tabla, cur.fetchall())
+        cur.execute(f"DROP TABLE {tabla_claves}")
+        conn.commit()
+
+    with LOCK_DIMENSIONES:
+        ids = {valor: cache[valor] for valor in unicos if valor in cache}
+    return ids_claves(valores, pd.Series(ids, dtype="int64")).astype("Int64")
+
+
+def creacion_tabla_ciudad(conn, cur, dataframe, metodo="copy", directorio_estado=None, checkpoint=None):
+    """
+    Crea una tabla de ciudades en la base de datos a partir de los datos proporcionados en el DataFrame.
+    Solo se insertan las ciudades únicas encontradas en el DataFrame.
+
+    Args:
+        conn (psycopg2.extensions.connection): La conexión a la base de datos.
+        cur (psycopg2.extensions.cursor): El cursor para ejecutar las consultas.
+        dataframe (pd.DataFrame): El DataFrame que contiene la columna `ciudad` con los nombres de las ciudades.
+        metodo (str, optional): El método de carga de la tabla (ver `carga_tabla`). Por defecto es "copy".
+        directorio_estado (str, optional): Directorio de estado para la carga incremental (ver `carga_tabla`). Por defecto es None.
+        checkpoint (dict, optional): El checkpoint de la carga por lotes (ver `crear_tablas`). Por defecto es None.
 
     Returns:
-        dict: Un diccionario con los nombres de las ciudades como claves y sus correspondientes `id_ciudad` como valores.
+        None: La función inserta las ciudades en la base de datos.
     """
-    cur.execute("SELECT nombre_ciudad, id_ciudad FROM ciudad")
-    return dict(cur.fetchall())
+    tabla_ciudad = pd.DataFrame(dataframe["ciudad"].unique(), columns=["nombre_ciudad"])
+    carga_dimension(conn, cur, "ciudad", tabla_ciudad, metodo, directorio_estado, checkpoint)
 
 
-def creacion_tabla_eventos(conn, cur, dataframe):
+def creacion_tabla_eventos(conn, cur, dataframe, metodo="copy", directorio_estado=None, checkpoint=None):
     """
     Crea una tabla de eventos en la base de datos utilizando los datos proporcionados en el DataFrame, 
     relacionando los eventos con las ciudades mediante el `id_ciudad`.
@@ -94,36 +648,27 @@ def creacion_tabla_eventos(conn, cur, dataframe):
         conn (psycopg2.extensions.connection): La conexión a la base de datos.
         cur (psycopg2.extensions.cursor): El cursor para ejecutar las consultas.
         dataframe (pd.DataFrame): El DataFrame que contiene la información de los eventos a insertar en la base de datos.
+        metodo (str, optional): El método de carga de la tabla (ver `carga_tabla`). Por defecto es "copy".
+        directorio_estado (str, optional): Directorio de estado para la carga incremental (ver `carga_tabla`). Por defecto es None.
+        checkpoint (dict, optional): El checkpoint de la carga por lotes (ver `crear_tablas`). Por defecto es None.
 
     Returns:
         None: La función inserta los eventos en la base de datos.
     """
-    ciudad_dict = obtener_ciudad_dict(cur)
-
-    data_to_insert = []
     df_evento = dataframe[["nombre_evento", "url_evento", "codigo_postal", "direccion", "horario", "inicio_evento", "fin_evento", "organizacion", "ciudad"]].drop_duplicates()
-    for _, row in df_evento.iterrows(): 
-        nombre_evento = row["nombre_evento"]
-        url_evento = row["url_evento"]
-        codigo_postal = row["codigo_postal"]
-        codigo_postal = int(codigo_postal) if pd.notna(codigo_postal) else None
-        direccion = row["direccion"]
-        horario = row["horario"]
-        fecha_inicio = pd.to_datetime(row["inicio_evento"])
-        fecha_fin = pd.to_datetime(row["fin_evento"])
-        organizacion = row["organizacion"]
-        ciudad = row["ciudad"]
-        id_ciudad = int(ciudad_dict.get(ciudad))
-        data_to_insert.append([nombre_evento, url_evento, codigo_postal, direccion, horario, fecha_inicio, fecha_fin, organizacion, id_ciudad])
 
-    insert_query = """
-        INSERT INTO eventos (nombre_evento, url_evento, codigo_postal, direccion, horario, fecha_inicio, fecha_fin, organizacion, id_ciudad)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """
-    insercion_db(conn, cur, insert_query, data_to_insert)
+    # conversion de tipos y resolucion de claves foraneas por columnas
+    df_insertar = df_evento.assign(
+        codigo_postal=pd.to_numeric(df_evento["codigo_postal"], errors="coerce").astype("Int64"),
+        fecha_inicio=pd.to_datetime(df_evento["inicio_evento"]),
+        fecha_fin=pd.to_datetime(df_evento["fin_evento"]),
+        id_ciudad=resolucion_claves(cur, "ciudad", df_evento["ciudad"]))
+
+    columnas = ["nombre_evento", "url_evento", "codigo_postal", "direccion", "horario", "fecha_inicio", "fecha_fin", "organizacion", "id_ciudad"]
+    carga_tabla(conn, cur, "eventos", df_insertar[columnas], metodo, directorio_estado, checkpoint)
 
 
-def creacion_tabla_hoteles(conn, cur, dataframe1, dataframe2):
+def creacion_tabla_hoteles(conn, cur, dataframe1, dataframe2, metodo="copy", directorio_estado=None, checkpoint=None):
     """
     Crea una tabla de hoteles en la base de datos, diferenciando entre hoteles propios y de la competencia, 
     y los asocia a las ciudades correspondientes mediante el `id_ciudad`.
@@ -133,33 +678,22 @@ def creacion_tabla_hoteles(conn, cur, dataframe1, dataframe2):
         cur (psycopg2.extensions.cursor): El cursor para ejecutar las consultas.
         dataframe1 (pd.DataFrame): El DataFrame que contiene los datos de los hoteles propios.
         dataframe2 (pd.DataFrame): El DataFrame que contiene los datos de los hoteles de la competencia.
+        metodo (str, optional): El método de carga de la tabla (ver `carga_tabla`). Por defecto es "copy".
+        directorio_estado (str, optional): Directorio de estado para la carga incremental (ver `carga_tabla`). Por defecto es None.
+        checkpoint (dict, optional): El checkpoint de la carga por lotes (ver `crear_tablas`). Por defecto es None.
 
     Returns:
         None: La función inserta los hoteles en la base de datos.
     """
-    ciudad_dict = obtener_ciudad_dict(cur)
-
     df_propios = dataframe1[dataframe1["competencia"] == False][["nombre_hotel", "estrellas", "competencia", "ciudad"]].drop_duplicates()
     df_competencia = dataframe2[["nombre_hotel", "estrellas"]].assign(competencia=True, ciudad="Madrid")
     df_hoteles = pd.concat([df_propios, df_competencia], ignore_index=True)
-    data_to_insert = []
-    df_hotel = df_hoteles[["nombre_hotel", "estrellas", "competencia", "ciudad"]]
-    for _, row in df_hotel.iterrows(): 
-        nombre_hotel = row["nombre_hotel"]
-        estrellas = row["estrellas"]
-        competencia = row["competencia"]
-        ciudad = row["ciudad"]
-        id_ciudad = int(ciudad_dict.get(ciudad))
-        data_to_insert.append([nombre_hotel, estrellas, competencia, id_ciudad]) 
+    df_hoteles["id_ciudad"] = resolucion_claves(cur, "ciudad", df_hoteles["ciudad"])
 
-    insert_query = """
-        INSERT INTO hoteles (nombre_hotel, estrellas, competencia, id_ciudad)
-        VALUES (%s, %s, %s, %s)
-    """
-    insercion_db(conn, cur, insert_query, data_to_insert)
+    carga_dimension(conn, cur, "hoteles", df_hoteles[["nombre_hotel", "estrellas", "competencia", "id_ciudad"]], metodo, directorio_estado, checkpoint)
 
 
-def creacion_tabla_clientes(conn, cur, dataframe):
+def creacion_tabla_clientes(conn, cur, dataframe, metodo="copy", directorio_estado=None, checkpoint=None):
     """
     Crea una tabla de clientes en la base de datos a partir de los datos proporcionados en el DataFrame, 
     insertando únicamente los clientes únicos.
@@ -168,27 +702,19 @@ def creacion_tabla_clientes(conn, cur, dataframe):
         conn (psycopg2.extensions.connection): La conexión a la base de datos.
         cur (psycopg2.extensions.cursor): El cursor para ejecutar las consultas.
         dataframe (pd.DataFrame): El DataFrame que contiene la información de los clientes a insertar en la base de datos.
+        metodo (str, optional): El método de carga de la tabla (ver `carga_tabla`). Por defecto es "copy".
+        directorio_estado (str, optional): Directorio de estado para la carga incremental (ver `carga_tabla`). Por defecto es None.
+        checkpoint (dict, optional): El checkpoint de la carga por lotes (ver `crear_tablas`). Por defecto es None.
 
     Returns:
         None: La función inserta los clientes en la base de datos.
     """
-    data_to_insert = []
+    # id_cliente es un entero; se carga igual en columnas INT o en las VARCHAR del esquema anterior
     df_clientes = dataframe[["id_cliente", "nombre", "apellido", "mail"]].drop_duplicates()
-    for _, row in df_clientes.iterrows(): 
-        id_cliente = row["id_cliente"]
-        nombre = row["nombre"]
-        apellido = row["apellido"]
-        mail = row["mail"]
-        data_to_insert.append([id_cliente, nombre, apellido, mail]) 
-    
-    insert_query = """
-        INSERT INTO clientes (id_cliente, nombre, apellido, mail)
-        VALUES (%s, %s, %s, %s)
-    """
-    insercion_db(conn, cur, insert_query, data_to_insert)
+    carga_dimension(conn, cur, "clientes", df_clientes, metodo, directorio_estado, checkpoint)
 
 
-def creacion_tabla_reservas(conn, cur, dataframe):
+def creacion_tabla_reservas(conn, cur, dataframe, metodo="copy", directorio_estado=None, checkpoint=None):
     """
     Crea una tabla de reservas en la base de datos utilizando los datos proporcionados en el DataFrame. 
     Relaciona cada reserva con un cliente y un hotel mediante sus respectivos `id_cliente` e `id_hotel`.
@@ -197,36 +723,90 @@ def creacion_tabla_reservas(conn, cur, dataframe):
         conn (psycopg2.extensions.connection): La conexión a la base de datos.
         cur (psycopg2.extensions.cursor): El cursor para ejecutar las consultas.
         dataframe (pd.DataFrame): El DataFrame que contiene la información de las reservas a insertar en la base de datos.
+        metodo (str, optional): El método de carga de la tabla (ver `carga_tabla`). Por defecto es "copy".
+        directorio_estado (str, optional): Directorio de estado para la carga incremental (ver `carga_tabla`). Por defecto es None.
+        checkpoint (dict, optional): El checkpoint de la carga por lotes (ver `crear_tablas`). Por defecto es None.
 
     Returns:
         None: La función inserta las reservas en la base de datos.
     """
-    cur.execute("SELECT nombre_hotel, id_hotel FROM hoteles")
-    hotel_dict = dict(cur.fetchall())
-    cur.execute("SELECT mail, id_cliente FROM clientes")
-    cliente_dict = dict(cur.fetchall())    
-
-    data_to_insert = []
-    df_tabla_reservas = dataframe[["id_reserva", "fecha_reserva", "inicio_estancia", "final_estancia", "precio_noche", "mail", "nombre_hotel"]]
-    for _, row in df_tabla_reservas.iterrows(): 
-        id_reserva = row["id_reserva"]
-        fecha_reserva = row["fecha_reserva"]
-        inicio_estancia = row["inicio_estancia"]
-        final_estancia = row["final_estancia"]
-        precio_noche = row["precio_noche"]
-        mail = row["mail"]
-        id_cliente = cliente_dict.get(mail)
-        nombre_hotel = row["nombre_hotel"]
-        id_hotel = hotel_dict.get(nombre_hotel)
-        data_to_insert.append([id_reserva, fecha_reserva, inicio_estancia, final_estancia, precio_noche, id_cliente, id_hotel]) 
-    
-    insert_query = """
-        INSERT INTO reservas (id_reserva, fecha_reserva, inicio_estancia, final_estancia, precio_noche, id_cliente, id_hotel)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-    """
-    insercion_db(conn, cur, insert_query, data_to_insert)
-
-def crear_tablas(nombre_db, usuario, contraseña, servidor, puerto, df, df_eventos, df_hoteles_competencia):
+    # resolucion de claves foraneas por columnas, con los id guardados al cargar hoteles y clientes
+    df_tabla_reservas = dataframe[["id_reserva", "fecha_reserva", "inicio_estancia", "final_estancia", "precio_noche"]].assign(
+        id_cliente=resolucion_claves(cur, "clientes", dataframe["mail"]),
+        id_hotel=resolucion_claves(cur, "hoteles", dataframe["nombre_hotel"]))
+
+    carga_tabla(conn, cur, "reservas", df_tabla_reservas, metodo, directorio_estado, checkpoint)
+
+def dependencias_tablas(cur, tablas):
+    """
+    Obtiene las dependencias entre las tablas a partir de las claves foráneas definidas en la base de datos: 
+    una tabla depende de las tablas a las que hace referencia.
+
+    Args:
+        cur (psycopg2.extensions.cursor): El cursor para ejecutar la consulta.
+        tablas (list): Los nombres de las tablas que se van a cargar.
+
+    Returns:
+        dict: Un diccionario tabla -> conjunto de tablas de las que depende (solo entre las tablas indicadas).
+    """
+    cur.execute("""
+        SELECT DISTINCT hija.relname, padre.relname
+        FROM pg_constraint c
+        JOIN pg_class hija ON c.conrelid = hija.oid
+        JOIN pg_class padre ON c.confrelid = padre.oid
+        WHERE c.contype = 'f' AND pg_table_is_visible(hija.oid)
+    """)
+    dependencias = {tabla: set() for tabla in tablas}
+    for hija, padre in cur.fetchall():
+        if hija in dependencias and padre in dependencias and hija != padre:
+            dependencias[hija].add(padre)
+    return dependencias
+
+
+def tarea_carga(pool_conexiones, descripcion, funcion, *args, checkpoint=None):
+    """
+    Crea una tarea para `ejecutar_grafo_tareas` que carga una tabla con una conexión del pool.
+
+    Con `checkpoint`, la tarea no hace nada si la carga ya se completó en una ejecución anterior, carga la tabla 
+    por lotes (ver `carga_checkpoint`) y se marca como completada en el manifiesto al terminar.
+
+    Args:
+        pool_conexiones (psycopg2.pool.ThreadedConnectionPool): El pool de conexiones.
+        descripcion (str): El nombre de la tabla para los mensajes de error.
+        funcion (callable): La función `creacion_tabla_*` que carga la tabla.
+        *args: Los argumentos de la función, sin la conexión ni el cursor. Los que sean un `Future` se esperan 
+               antes de tomar la conexión (ver `resultado_futuro`).
+        checkpoint (dict, optional): El checkpoint de la carga (ver `crear_tablas`). Por defecto es None.
+
+    Returns:
+        callable: La tarea.
+    """
+    def tarea(resultados):
+        if checkpoint is not None and progreso_carga(checkpoint).get("completada", False):
+            return
+        try:
+            argumentos = [resultado_futuro(arg) for arg in args]
+        except Exception as e:
+            raise Exception(f"Error al crear la tabla de {descripcion}: {e}")
+        conn = pool_conexiones.getconn()
+        try:
+            cur = conn.cursor()
+            try:
+                funcion(conn, cur, *argumentos, checkpoint=checkpoint)
+            finally:
+                cur.close()
+        except Exception as e:
+            conn.rollback()
+            raise Exception(f"Error al crear la tabla de {descripcion}: {e}")
+        finally:
+            pool_conexiones.putconn(conn)
+        if checkpoint is not None:
+            registro_carga(checkpoint, completada=True)
+    return tarea
+
+
+def crear_tablas(nombre_db, usuario, contraseña, servidor, puerto, df, df_eventos, df_hoteles_competencia, metodos_carga=None, directorio_estado=None, max_conexiones=4, particiones_reservas=None,
+                 directorio_checkpoint=None, tamano_lote_checkpoint=TAMANO_LOTE_CHECKPOINT):
     """
     Realiza el proceso completo de creación de las tablas en la base de datos y carga de los datos 
     desde los DataFrames proporcionados.
@@ -238,6 +818,20 @@ def crear_tablas(nombre_db, usuario, contraseña, servidor, puerto, df, df_event
         - Clientes
         - Reservas
 
+    Las tablas se cargan en paralelo con un pool de conexiones, respetando el orden que imponen las claves foráneas 
+    de la base de datos (ver `dependencias_tablas`) y las dimensiones cuyos id necesita cada carga 
+    (ver `DEPENDENCIAS_DATOS`): por ejemplo, eventos y hoteles se cargan a la vez en cuanto está 
+    cargada la tabla de ciudades, y clientes se carga desde el principio. La tabla de reservas se divide además en 
+    particiones que se cargan en paralelo.
+
+    `df_eventos` y `df_hoteles_competencia` pueden ser el `Future` de su extracción si todavía se está ejecutando 
+    (ver `main.py`): solo esperan a ella las tablas que los usan, y el resto de tablas se cargan mientras tanto.
+
+    Con `directorio_checkpoint`, cada tabla (y cada partición de reservas) se confirma en lotes de 
+    `tamano_lote_checkpoint` filas y su progreso se anota en el manifiesto del checkpoint (ver `carga_checkpoint`). 
+    Si la carga falla, al volver a llamar a la función con los mismos DataFrames y el mismo checkpoint se omiten las 
+    tablas completadas y las demás continúan desde su primer lote sin confirmar, en lugar de fallar por claves duplicadas.
+
     Args:
         nombre_db (str): El nombre de la base de datos en la que se realizarán las inserciones.
         usuario (str): El nombre de usuario para la conexión a la base de datos.
@@ -245,8 +839,25 @@ def crear_tablas(nombre_db, usuario, contraseña, servidor, puerto, df, df_event
         servidor (str): La dirección del servidor donde se encuentra la base de datos.
         puerto (int): El puerto en el que la base de datos está escuchando.
         df (pd.DataFrame): DataFrame con la información de las ciudades, clientes y reservas.
-        df_eventos (pd.DataFrame): DataFrame con la información de los eventos.
-        df_hoteles_competencia (pd.DataFrame): DataFrame con la información de los hoteles de la competencia.
+        df_eventos (pd.DataFrame o concurrent.futures.Future): DataFrame con la información de los eventos.
+        df_hoteles_competencia (pd.DataFrame o concurrent.futures.Future): DataFrame con la información de los hoteles 
+                                                                          de la competencia.
+        metodos_carga (dict, optional): Diccionario que asigna a cada tabla ("ciudad", "eventos", "hoteles", "clientes", 
+                                        "reservas") su método de carga (ver `carga_tabla`). Las tablas que no aparezcan 
+                                        se cargan con "copy". Por defecto es None.
+        directorio_estado (str, optional): Si se indica, la carga es incremental: solo se envían las filas nuevas o 
+                                           modificadas desde la última carga, que se fusionan con las existentes, y las 
+                                           huellas de cada tabla se guardan en este directorio (ver `carga_incremental`). 
+                                           Por defecto es None (se insertan todas las filas).
+        max_conexiones (int, optional): El número máximo de conexiones, y por tanto de cargas simultáneas. 
+                                        Con 1 las tablas se cargan una detrás de otra. Por defecto es 4.
+        particiones_reservas (int, optional): El número de particiones en las que se divide la tabla de reservas. 
+                                              Si es None, se usa una partición por cada 500000 filas, 
+                                              hasta `max_conexiones`. Por defecto es None.
+        directorio_checkpoint (str, optional): La carpeta del checkpoint de la ejecución (ver `src/soporte_checkpoint.py`). 
+                                               Por defecto es None (cada tabla se carga en una sola transacción).
+        tamano_lote_checkpoint (int, optional): Las filas de cada lote con checkpoint. Por defecto es 
+                                                `TAMANO_LOTE_CHECKPOINT`.
 
     Returns:
         None: Esta función no retorna ningún valor, solo realiza las operaciones de inserción en la base de datos.
@@ -255,48 +866,51 @@ def crear_tablas(nombre_db, usuario, contraseña, servidor, puerto, df, df_event
         Exception: Si ocurre un error en el proceso de conexión, creación de tablas o inserción de datos,
                    se lanzará una excepción con el mensaje correspondiente.
     """
+    metodos_carga = metodos_carga or {}
+    pool_conexiones = None
     try:
-        # establece conexion y crea cursor
-        conn, cur = conex_bd_creacion_cursor(nombre_db, usuario, contraseña, servidor, puerto)
+        # crea el pool de conexiones
+        pool_conexiones = pool.ThreadedConnectionPool(1, max_conexiones, dbname=nombre_db, user=usuario, password=contraseña, host=servidor, port=puerto)
 
-        # crea la tabla de ciudad
-        try:
-            creacion_tabla_ciudad(conn, cur, df)
-        except Exception as e:
-            raise Exception(f"Error al crear la tabla de ciudades: {e}")
-
-        # crea la tabla de eventos
-        try:
-            creacion_tabla_eventos(conn, cur, df_eventos)
-        except Exception as e:
-            raise Exception(f"Error al crear la tabla de eventos: {e}")
-
-        # crea la tabla de hoteles
-        try:
-            creacion_tabla_hoteles(conn, cur, df, df_hoteles_competencia)
-        except Exception as e:
-            raise Exception(f"Error al crear la tabla de hoteles: {e}")
-
-        # crea la tabla de clientes
-        try:
-            creacion_tabla_clientes(conn, cur, df)
-        except Exception as e:
-            raise Exception(f"Error al crear la tabla de clientes: {e}")
-
-        # crea la tabla de reservas
-        try:
-            creacion_tabla_reservas(conn, cur, df)
-        except Exception as e:
-            raise Exception(f"Error al crear la tabla de reservas: {e}")
+        # obtiene el orden de carga a partir de las claves foraneas y de las dimensiones que usa cada carga
+        conn = pool_conexiones.getconn()
+        cur = conn.cursor()
+        dependencias = dependencias_tablas(cur, ["ciudad", "eventos", "hoteles", "clientes", "reservas"])
+        cur.close()
+        pool_conexiones.putconn(conn)
+        for tabla, dimensiones in DEPENDENCIAS_DATOS.items():
+            dependencias[tabla] |= dimensiones
+
+        # checkpoint de cada carga, con el nombre de su tarea en el manifiesto
+        def checkpoint(nombre):
+            if directorio_checkpoint is None:
+                return None
+            return {"directorio": directorio_checkpoint, "nombre": nombre, "tamano_lote": tamano_lote_checkpoint}
+
+        tareas = {
+            "ciudad": tarea_carga(pool_conexiones, "ciudades", creacion_tabla_ciudad, df, metodos_carga.get("ciudad", "copy"), directorio_estado, checkpoint=checkpoint("ciudad")),
+            "eventos": tarea_carga(pool_conexiones, "eventos", creacion_tabla_eventos, df_eventos, metodos_carga.get("eventos", "copy"), directorio_estado, checkpoint=checkpoint("eventos")),
+            "hoteles": tarea_carga(pool_conexiones, "hoteles", creacion_tabla_hoteles, df, df_hoteles_competencia, metodos_carga.get("hoteles", "copy"), directorio_estado, checkpoint=checkpoint("hoteles")),
+            "clientes": tarea_carga(pool_conexiones, "clientes", creacion_tabla_clientes, df, metodos_carga.get("clientes", "copy"), directorio_estado, checkpoint=checkpoint("clientes")),
+        }
+
+        # divide las reservas en particiones que se cargan en paralelo
+        if particiones_reservas is None:
+            particiones_reservas = min(max_conexiones, len(df) // 500000 + 1)
+        limites = np.linspace(0, len(df), particiones_reservas + 1, dtype=int)
+        for i in range(particiones_reservas):
+            nombre = "reservas" if particiones_reservas == 1 else f"reservas_{i + 1}"
+            tareas[nombre] = tarea_carga(pool_conexiones, "reservas", creacion_tabla_reservas, df.iloc[limites[i]:limites[i + 1]], metodos_carga.get("reservas", "copy"), directorio_estado, checkpoint=checkpoint(nombre))
+            dependencias[nombre] = dependencias["reservas"]
+
+        ejecutar_grafo_tareas(tareas, dependencias, max_conexiones)
 
     except Exception as e:
-        # cierra la conexion y el cursor en caso de error
-        if conn:
-            conn.close()
-        if cur:
-            cur.close()
         raise Exception(f"Error en el proceso completo de carga de datos: {e}")
-    else:
-        # cierra la conexion y el cursor en caso de exito
-        cur.close()
-        conn.close()
+    finally:
+        # cierra todas las conexiones del pool
+        if pool_conexiones:
+            pool_conexiones.closeall()
+
+
+instrumentar_modulo(globals())
@@ -0,0 +1,244 @@
+import json
+import os
+import threading
+import time
+from src.soporte_almacenamiento import POLITICA_SALIDA_POR_DEFECTO, escritura_atomica, guardar_dataframe, guardar_salida, leer_dataframe, resolucion_ruta_salida
+from src.soporte_metricas import instrumentar_modulo
+
+# el manifiesto guarda las etapas terminadas y el progreso de la carga de cada tabla; el resultado de cada etapa
+# terminada se guarda junto a el como "<etapa>.feather"
+ARCHIVO_MANIFIESTO = "manifiesto.json"
+# filas de cada transaccion de la carga de una tabla cuando hay checkpoint
+TAMANO_LOTE_CHECKPOINT = 100000
+# las etapas y las cargas en paralelo actualizan el mismo manifiesto
+LOCK_MANIFIESTO = threading.Lock()
+
+def ruta_manifiesto(directorio_checkpoint):
+    """
+    Devuelve la ruta del manifiesto de un checkpoint.
+
+    Args:
+        directorio_checkpoint (str): La carpeta del checkpoint.
+
+    Returns:
+        str: La ruta del manifiesto.
+    """
+    return os.path.join(directorio_checkpoint, ARCHIVO_MANIFIESTO)
+
+
+def ruta_etapa(directorio_checkpoint, nombre):
+    """
+    Devuelve la ruta del archivo con el resultado de una etapa del checkpoint.
+
+    Args:
+        directorio_checkpoint (str): La carpeta del checkpoint.
+        nombre (str): El nombre de la etapa.
+
+    Returns:
+        str: La ruta del archivo.
+    """
+    return os.path.join(directorio_checkpoint, f"{nombre}.feather")
+
+
+def lectura_manifiesto(directorio_checkpoint):
+    """
+    Lee el manifiesto de un checkpoint.
+
+    Args:
+        directorio_checkpoint (str): La carpeta del checkpoint.
+
+    Returns:
+        dict: El manifiesto, con las claves "parametros", "etapas" y "tablas" (vacías si no existe).
+    """
+    ruta = ruta_manifiesto(directorio_checkpoint)
+    if not os.path.exists(ruta):
+        return {"parametros": {}, "etapas": {}, "tablas": {}}
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def actualizacion_manifiesto(directorio_checkpoint, seccion, nombre, **valores):
+    """
+    Actualiza la entrada de una etapa o de una tabla en el manifiesto. El manifiesto se vuelve a leer bajo un bloqueo,
+    para no perder las actualizaciones de otras etapas o cargas en paralelo, y se escribe de forma atómica.
+
+    Args:
+        directorio_checkpoint (str): La carpeta del checkpoint.
+        seccion (str): "etapas" o "tablas".
+        nombre (str): El nombre de la etapa o de la carga.
+        **valores: Los valores que se actualizan en la entrada.
+
+    Returns:
+        dict: La entrada actualizada.
+    """
+    with LOCK_MANIFIESTO:
+        manifiesto = lectura_manifiesto(directorio_checkpoint)
+        entrada = manifiesto.setdefault(seccion, {}).setdefault(nombre, {})
+        entrada.update(valores, actualizado=time.time())
+        escritura_atomica(ruta_manifiesto(directorio_checkpoint), json.dumps(manifiesto, ensure_ascii=False, indent=2))
+        return dict(entrada)
+
+
+def inicio_checkpoint(directorio_checkpoint, parametros, reanudar=False):
+    """
+    Prepara el checkpoint de una ejecución.
+
+    Sin `reanudar`, se empieza un checkpoint nuevo: se borran el manifiesto y los resultados de las etapas de la
+    ejecución anterior. Con `reanudar`, se conserva el checkpoint para continuar desde la primera etapa o el primer
+    lote sin terminar, siempre que la ejecución anterior se lanzara con los mismos parámetros.
+
+    Args:
+        directorio_checkpoint (str): La carpeta del checkpoint. Se crea si no existe.
+        parametros (dict): Los parámetros de la ejecución que deben coincidir para poder reanudarla (rutas de
+                           entrada, URLs, base de datos...). No deben incluir contraseñas, ya que se guardan en el manifiesto.
+        reanudar (bool, optional): Si se reanuda la ejecución anterior. Por defecto es False.
+
+    Returns:
+        dict: El manifiesto.
+
+    Raises:
+        FileNotFoundError: Si se quiere reanudar y no hay ningún checkpoint.
+        ValueError: Si se quiere reanudar una ejecución con otros parámetros.
+    """
+    os.makedirs(directorio_checkpoint, exist_ok=True)
+    parametros = json.loads(json.dumps(parametros))
+    with LOCK_MANIFIESTO:
+        manifiesto = lectura_manifiesto(directorio_checkpoint)
+        if reanudar:
+            if not os.path.exists(ruta_manifiesto(directorio_checkpoint)):
+                raise FileNotFoundError(f"No hay ninguna ejecución que reanudar en {directorio_checkpoint}.")
+            if manifiesto["parametros"] != parametros:
+                raise ValueError(f"La ejecución guardada en {directorio_checkpoint} se lanzó con otros parámetros: {manifiesto['parametros']}.")
+            return manifiesto
+
+        # ejecucion nueva: se descartan los resultados de la anterior
+        for nombre in manifiesto["etapas"]:
+            if os.path.exists(ruta_etapa(directorio_checkpoint, nombre)):
+                os.remove(ruta_etapa(directorio_checkpoint, nombre))
+        manifiesto = {"parametros": parametros, "creado": time.time(), "etapas": {}, "tablas": {}}
+        escritura_atomica(ruta_manifiesto(directorio_checkpoint), json.dumps(manifiesto, ensure_ascii=False, indent=2))
+        return manifiesto
+
+
+def etapa_completada(directorio_checkpoint, nombre):
+    """
+    Comprueba si una etapa terminó en una ejecución anterior.
+
+    Args:
+        directorio_checkpoint (str): La carpeta del checkpoint, o None.
+        nombre (str): El nombre de la etapa.
+
+    Returns:
+        bool: True si la etapa está marcada como completada en el manifiesto.
+    """
+    if directorio_checkpoint is None:
+        return False
+    return lectura_manifiesto(directorio_checkpoint)["etapas"].get(nombre, {}).get("completada", False)
+
+
+def registro_etapa(directorio_checkpoint, nombre, futuro=None, archivo=None):
+    """
+    Marca una etapa como completada en el manifiesto. Si se indica el `Future` de la escritura de su resultado,
+    solo se marca si la escritura ha terminado sin errores (se usa como callback de `guardar_salida`).
+
+    Args:
+        directorio_checkpoint (str): La carpeta del checkpoint.
+        nombre (str): El nombre de la etapa.
+        futuro (concurrent.futures.Future, optional): El `Future` de la escritura del resultado. Por defecto es None.
+        archivo (str, optional): El archivo con el resultado de la etapa, si no es el del checkpoint (ver
+                                 `etapa_checkpoint`). Por defecto es None.
+
+    Returns:
+        None: La función actualiza el manifiesto.
+    """
+    if futuro is None or futuro.exception() is None:
+        valores = {"completada": True} if archivo is None else {"completada": True, "archivo": archivo}
+        actualizacion_manifiesto(directorio_checkpoint, "etapas", nombre, **valores)
+
+
+def etapa_checkpoint(directorio_checkpoint, nombre, funcion, *args, segundo_plano=False, ruta_resultado=None,
+                     politica_resultado=POLITICA_SALIDA_POR_DEFECTO, **kwargs):
+    """
+    Ejecuta una etapa que devuelve un DataFrame, o la omite si terminó en una ejecución anterior y devuelve el
+    resultado guardado en el checkpoint.
+
+    El resultado de la etapa se guarda en el checkpoint y la etapa se marca como completada cuando el archivo está
+    escrito por completo. Con `segundo_plano=True`, el archivo se escribe en otro hilo (ver `guardar_salida`) y el
+    resultado se devuelve enseguida; la etapa se marca al terminar la escritura.
+
+    Con `ruta_resultado`, el resultado se escribe una sola vez, en ese archivo de salida según `politica_resultado`
+    (ver `resolucion_ruta_salida`), y el manifiesto apunta a él en lugar de guardar una copia en el checkpoint. Si
+    la política no deja escribirlo ("omitir" con el archivo ya existente), se guarda en el checkpoint.
+
+    Si `directorio_checkpoint` es None, la etapa se ejecuta siempre sin checkpoint (y su resultado se escribe en
+    `ruta_resultado`, si se indica).
+
+    Args:
+        directorio_checkpoint (str): La carpeta del checkpoint, o None.
+        nombre (str): El nombre de la etapa.
+        funcion (callable): La función de la etapa, que se llama como `funcion(*args, **kwargs)`.
+        *args: Los argumentos posicionales de la función.
+        segundo_plano (bool, optional): Si el resultado se guarda en otro hilo. Por defecto es False.
+        ruta_resultado (str, optional): El archivo de salida de la etapa. Por defecto es None (solo el checkpoint).
+        politica_resultado (str, optional): La política si `ruta_resultado` ya existe (ver `POLITICAS_SALIDA`).
+                                            Por defecto es `POLITICA_SALIDA_POR_DEFECTO`.
+        **kwargs: Los argumentos con nombre de la función.
+
+    Returns:
+        pd.DataFrame: El resultado de la etapa (calculado o leído del checkpoint).
+    """
+    if directorio_checkpoint is None:
+        resultado = funcion(*args, **kwargs)
+        if ruta_resultado is not None:
+            guardar_salida(resultado, ruta_resultado, politica_resultado, segundo_plano)
+        return resultado
+
+    entrada = lectura_manifiesto(directorio_checkpoint)["etapas"].get(nombre, {})
+    ruta = entrada.get("archivo", ruta_etapa(directorio_checkpoint, nombre))
+    if entrada.get("completada", False) and os.path.exists(ruta):
+        return leer_dataframe(ruta)
+
+    resultado = funcion(*args, **kwargs)
+    ruta = ruta_etapa(directorio_checkpoint, nombre)
+    if ruta_resultado is not None:
+        ruta = resolucion_ruta_salida(ruta_resultado, politica_resultado) or ruta
+    archivo = None if ruta == ruta_etapa(directorio_checkpoint, nombre) else ruta
+    if segundo_plano:
+        futuro = guardar_salida(resultado, ruta, "sobrescribir", segundo_plano=True)
+        futuro.add_done_callback(lambda f: registro_etapa(directorio_checkpoint, nombre, f, archivo))
+    else:
+        guardar_dataframe(resultado, ruta)
+        registro_etapa(directorio_checkpoint, nombre, archivo=archivo)
+    return resultado
+
+
+def progreso_carga(checkpoint):
+    """
+    Devuelve el progreso guardado de la carga de una tabla (o de una partición de una tabla).
+
+    Args:
+        checkpoint (dict): El checkpoint de la carga, con las claves "directorio" y "nombre" (ver `crear_tablas`).
+
+    Returns:
+        dict: La entrada de la carga en el manifiesto: "completada", "filas", "huella" (la del contenido de los datos
+              que se cargan), "filas_confirmadas" (las filas ya confirmadas en la base de datos) y "lote_en_curso"
+              (si se estaba cargando un lote cuya confirmación no consta). Vacío si la carga no ha empezado.
+    """
+    return lectura_manifiesto(checkpoint["directorio"])["tablas"].get(checkpoint["nombre"], {})
+
+
+def registro_carga(checkpoint, **valores):
+    """
+    Actualiza el progreso de la carga de una tabla en el manifiesto (ver `progreso_carga`).
+
+    Args:
+        checkpoint (dict): El checkpoint de la carga, con las claves "directorio" y "nombre".
+        **valores: Los valores que se actualizan.
+
+    Returns:
+        dict: La entrada actualizada.
+    """
+    return actualizacion_manifiesto(checkpoint["directorio"], "tablas", checkpoint["nombre"], **valores)
+
+
+instrumentar_modulo(globals())
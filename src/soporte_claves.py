@@ -0,0 +1,180 @@
+import pandas as pd
+import numpy as np
+import os
+import threading
+from src.soporte_almacenamiento import guardar_dataframe, leer_dataframe
+from src.soporte_metricas import instrumentar_modulo
+
+# las claves de cada entidad se guardan en "<directorio>/<nombre>.feather". Solo las necesitan los clientes: su id se
+# calcula aqui (por mail) y se carga como clave primaria. El id_hotel del DataFrame es el del archivo de origen y no se
+# carga; los id de los hoteles y las ciudades son SERIAL, se resuelven por su nombre (ver `resolucion_claves` en
+# `src/soporte_carga.py`) y la carga incremental los conserva al fusionar por nombre (ver `fusion_staging`)
+EXTENSION_CLAVES = ".feather"
+# evita que dos asignaciones en paralelo de la misma entidad se pisen al actualizar su archivo
+LOCK_CLAVES = threading.Lock()
+
+def claves_vacias():
+    """
+    Crea un mapeo de claves vacío.
+
+    Returns:
+        pd.Series: Una serie de enteros vacía, cuyo índice serán los valores y sus valores los id asignados.
+    """
+    return pd.Series(dtype="int64")
+
+
+def busqueda_claves(valores, claves):
+    """
+    Busca el id de cada valor en un mapeo de claves.
+
+    Args:
+        valores (pd.Index o np.ndarray): Los valores a buscar (normalmente, los valores distintos de una serie).
+        claves (pd.Series): El mapeo valor -> id.
+
+    Returns:
+        np.ndarray: Un array de int64 con el id de cada valor, o -1 si no está en el mapeo.
+    """
+    ids = np.full(len(valores), -1, dtype=np.int64)
+    if len(claves):
+        posiciones = claves.index.get_indexer(valores)
+        encontrados = posiciones >= 0
+        ids[encontrados] = claves.to_numpy(dtype=np.int64)[posiciones[encontrados]]
+    return ids
+
+
+def asignacion_claves(serie, claves=None):
+    """
+    Asigna un id entero a cada valor de una serie con `pd.factorize`, sin recorrer los valores en Python. Los valores
+    que ya están en `claves` conservan su id; los nuevos reciben ids consecutivos a partir del mayor existente, por
+    orden de primera aparición. Con `claves` vacío, los id son 1, 2, 3... en el orden en que aparecen los valores.
+    Los valores nulos se tratan como un valor más y comparten un id, para que las filas sin valor (por ejemplo, las
+    reservas sin mail) no queden con el id nulo, que no se puede cargar en una clave primaria.
+
+    Args:
+        serie (pd.Series): Los valores a los que se asigna un id (por ejemplo, los mails).
+        claves (pd.Series, optional): El mapeo valor -> id de asignaciones anteriores (ver `lectura_claves`).
+                                      Por defecto es None (ninguna asignación anterior).
+
+    Returns:
+        tuple: Una serie de int64 con el id de cada fila (con el mismo índice que `serie`) y el mapeo valor -> id
+               actualizado con los valores nuevos.
+    """
+    claves = claves_vacias() if claves is None else claves
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+
+    ids_unicos = busqueda_claves(unicos, claves)
+    nuevos = ids_unicos < 0
+    inicio = int(claves.max()) + 1 if len(claves) else 1
+    ids_unicos[nuevos] = np.arange(inicio, inicio + nuevos.sum())
+
+    if nuevos.any():
+        añadidas = pd.Series(ids_unicos[nuevos], index=pd.Index(unicos[nuevos]), dtype="int64")
+        claves = añadidas if claves.empty else pd.concat([claves, añadidas])
+
+    return pd.Series(ids_unicos[codigos], index=serie.index, name=serie.name), claves
+
+
+def ids_claves(serie, claves):
+    """
+    Busca el id de cada valor de una serie en un mapeo de claves, con una única búsqueda de los valores distintos.
+    Los valores nulos reciben el id del valor nulo del mapeo, si lo tiene (ver `asignacion_claves`).
+
+    Args:
+        serie (pd.Series): Los valores.
+        claves (pd.Series o dict): El mapeo valor -> id.
+
+    Returns:
+        pd.Series: El id de cada fila (int64, o "Int64" con nulos si algún valor no está en el mapeo).
+    """
+    if isinstance(claves, dict):
+        claves = pd.Series(claves, dtype="int64")
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    ids = busqueda_claves(unicos, claves)[codigos]
+    if (ids < 0).any():
+        ids = pd.array(ids, dtype="Int64")
+        ids[ids < 0] = pd.NA
+    return pd.Series(ids, index=serie.index, name=serie.name)
+
+
+def ruta_claves(nombre, directorio_claves):
+    """
+    Devuelve la ruta del archivo de claves de una entidad.
+
+    Args:
+        nombre (str): El nombre de la entidad (por ejemplo, "clientes").
+        directorio_claves (str): El directorio de las claves.
+
+    Returns:
+        str: La ruta del archivo.
+    """
+    return os.path.join(directorio_claves, f"{nombre}{EXTENSION_CLAVES}")
+
+
+def lectura_claves(nombre, directorio_claves):
+    """
+    Lee el mapeo valor -> id guardado de una entidad.
+
+    Args:
+        nombre (str): El nombre de la entidad.
+        directorio_claves (str): El directorio de las claves.
+
+    Returns:
+        pd.Series: El mapeo valor -> id (vacío si la entidad no tiene claves guardadas).
+    """
+    ruta = ruta_claves(nombre, directorio_claves)
+    if not os.path.exists(ruta):
+        return claves_vacias()
+    tabla = leer_dataframe(ruta)
+    return pd.Series(tabla["id"].to_numpy(dtype=np.int64), index=pd.Index(tabla["valor"]))
+
+
+def guardar_claves(nombre, directorio_claves, claves):
+    """
+    Guarda el mapeo valor -> id de una entidad. El archivo se escribe primero en un temporal y se renombra,
+    para no dejarlo a medias.
+
+    Args:
+        nombre (str): El nombre de la entidad.
+        directorio_claves (str): El directorio de las claves. Se crea si no existe.
+        claves (pd.Series): El mapeo valor -> id.
+
+    Returns:
+        None: La función escribe el archivo de claves de la entidad.
+    """
+    os.makedirs(directorio_claves, exist_ok=True)
+    ruta = ruta_claves(nombre, directorio_claves)
+    tabla = pd.DataFrame({"valor": claves.index, "id": claves.to_numpy(dtype=np.int64)})
+    # guardar_dataframe ya escribe en un temporal y lo renombra
+    guardar_dataframe(tabla, ruta, formato="feather")
+
+
+def claves_persistentes(serie, nombre, directorio_claves=None):
+    """
+    Asigna a cada valor de una serie un id entero estable entre ejecuciones: los valores que ya aparecieron en una
+    ejecución anterior (por ejemplo, los clientes que vuelven a reservar en una carga incremental) conservan su id,
+    y los nuevos reciben ids a continuación del mayor asignado. Cada entidad tiene su propio archivo en
+    `directorio_claves`; se usa para los clientes, identificados por su mail (los hoteles y las ciudades reciben su 
+    id de la base de datos, ver `EXTENSION_CLAVES`).
+
+    Si `directorio_claves` es None, los id se asignan sin guardarlos (1, 2, 3... por orden de aparición).
+
+    Args:
+        serie (pd.Series): Los valores a los que se asigna un id.
+        nombre (str): El nombre de la entidad (por ejemplo, "clientes").
+        directorio_claves (str, optional): El directorio donde se guardan las claves. Por defecto es None.
+
+    Returns:
+        tuple: El id de cada fila (ver `asignacion_claves`) y el mapeo valor -> id actualizado.
+    """
+    if directorio_claves is None:
+        return asignacion_claves(serie)
+
+    with LOCK_CLAVES:
+        anteriores = lectura_claves(nombre, directorio_claves)
+        ids, claves = asignacion_claves(serie, anteriores)
+        if len(claves) != len(anteriores):
+            guardar_claves(nombre, directorio_claves, claves)
+    return ids, claves
+
+
+instrumentar_modulo(globals())
@@ -1,7 +1,55 @@
 import pandas as pd 
 import numpy as np 
 import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 import os
+import shutil
+import tempfile
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import repeat
+from src.soporte_almacenamiento import FORMATO_POR_DEFECTO, POLITICA_SALIDA_POR_DEFECTO, POLITICAS_SALIDA, guardar_salida, resolucion_ruta_salida, ruta_formato
+from src.soporte_claves import asignacion_claves, claves_persistentes, claves_vacias, guardar_claves, ids_claves, lectura_claves
+from src.soporte_planificacion import resultado_futuro
+from src.soporte_metricas import instrumentar_modulo
+
+# polars permite ejecutar la limpieza como un plan diferido y multihilo (ver `limpieza_polars`)
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+# columnas que debe tener el archivo de reservas
+COLUMNAS_REQUERIDAS = ["fecha_reserva", "inicio_estancia", "final_estancia", "nombre_hotel", "ciudad"]
+# columnas del archivo de reservas que usan la limpieza y las funciones `creacion_tabla_*`; el resto no se lee
+# (el id_cliente original no se usa porque se reasigna por mail en `asignar_id_clientes_por_mail`)
+COLUMNAS_ENTRADA = ["id_reserva", "nombre", "apellido", "mail", "competencia", "fecha_reserva", "inicio_estancia", 
+                    "final_estancia", "id_hotel", "precio_noche", "nombre_hotel", "estrellas", "ciudad"]
+# tipo de las columnas por las que puede estar particionada una carpeta de reservas (columna=valor); pyarrow solo 
+# deduce enteros y cadenas de los nombres de las carpetas
+TIPOS_PARTICIONES = {"competencia": pa.bool_(), "id_hotel": pa.int64()}
+# columnas que identifican una reserva repetida; None compara las filas completas (ver `eliminacion_duplicados`)
+CLAVE_DUPLICADOS = None
+# motores con los que se puede ejecutar `limpieza_transformacion`; ambos producen el mismo DataFrame
+MOTORES = ("pandas", "polars")
+MOTOR_POR_DEFECTO = "pandas"
+# tipo de datos final de las columnas del DataFrame de reservas limpio (ver `optimizacion_tipos`), el mismo con 
+# cualquier motor y con `limpieza_transformacion_por_lotes`:
+#   "categoria": cadenas con muchos valores repetidos
+#   "entero": el entero mas pequeño que admite los valores (sin signo si no hay negativos)
+#   "decimal": float32 si todos los valores se conservan exactamente, float64 en otro caso
+#   "booleano": bool, o boolean si hay nulos
+TIPOS_COLUMNAS = {
+    "id_cliente": "entero",
+    "nombre": "categoria",
+    "apellido": "categoria",
+    "competencia": "booleano",
+    "id_hotel": "entero",
+    "precio_noche": "decimal",
+    "nombre_hotel": "categoria",
+    "estrellas": "decimal",
+    "ciudad": "categoria",
+}
 
 def transf_col_datetime(dataframe, lista_col):
     """
@@ -33,19 +81,23 @@ def relleno_blancos(dataframe, lista_col):
         dataframe[col] = dataframe[col].replace("", np.nan)
     return dataframe
 
-def nulos_fechas_estancia(dataframe, lista_col):
+def nulos_fechas_estancia(dataframe, lista_col, valores=None):
     """
-    Rellena los valores nulos en las columnas de fechas de estancia con el valor más frecuente de cada columna (exceptuando los valores NaN).
+    Rellena los valores nulos en las columnas de fechas de estancia con el primer valor no nulo de cada columna.
 
     Args:
         dataframe (pd.DataFrame): El DataFrame donde se deben rellenar los valores nulos.
         lista_col (list): Una lista de nombres de columnas de fechas en las que se deben rellenar los valores NaN.
+        valores (dict, optional): Un diccionario con el valor de relleno de cada columna, calculado previamente 
+                                  (por ejemplo, sobre el archivo completo al procesarlo por lotes). Si es None, 
+                                  se usa el primer valor no nulo del propio DataFrame. Por defecto es None.
 
     Returns:
         pd.DataFrame: El DataFrame con los valores nulos en las columnas especificadas rellenados.
     """
     for col in lista_col:
-        dataframe[col] = dataframe[col].fillna(dataframe[col].dropna().unique()[0])
+        valor = valores[col] if valores is not None else dataframe[col].dropna().unique()[0]
+        dataframe[col] = dataframe[col].fillna(valor)
     return dataframe
 
 def lista_columnas_df(dataframe, columna):
@@ -78,6 +130,47 @@ def creacion_diccionarios(lista1, lista2):
     dicc = dict(zip(lista1, lista2))
     return dicc
 
+def rellenar_nulos_mapeos(dataframe, mapeos):
+    """
+    Rellena varias columnas del DataFrame a partir de diccionarios que mapean los valores de una columna de coincidencia 
+    a los nuevos valores, con operaciones vectorizadas. En las filas cuyo valor de coincidencia está en el diccionario, 
+    la columna a rellenar toma el valor del diccionario; en el resto conserva su valor.
+
+    Los mapeos se aplican en orden, de forma que un mapeo puede usar como coincidencia una columna rellenada por uno anterior. 
+    Los mapeos que comparten columna de coincidencia se resuelven con una única búsqueda de las claves sobre esa columna.
+
+    Args:
+        dataframe (pd.DataFrame): El DataFrame en el que se deben rellenar los valores.
+        mapeos (list): Una lista de tuplas (dicc, columna_rellenar, columna_coincidencia).
+
+    Returns:
+        None: Modifica el dataframe in-place.
+    """
+    # claves de todos los mapeos que comparten cada columna de coincidencia
+    claves = {}
+    for dicc, _, columna_coincidencia in mapeos:
+        claves.setdefault(columna_coincidencia, {}).update(dict.fromkeys(dicc))
+
+    posiciones = {}
+    for dicc, columna_rellenar, columna_coincidencia in mapeos:
+        if not dicc:
+            continue
+        indice = pd.Index(list(claves[columna_coincidencia]))
+        if columna_coincidencia not in posiciones:
+            # posicion de cada fila en el indice de claves (-1 si no esta), calculada una vez por columna
+            posiciones[columna_coincidencia] = indice.get_indexer(dataframe[columna_coincidencia])
+        pos = posiciones[columna_coincidencia]
+
+        valores = pd.Series(dicc).reindex(indice)
+        presentes = np.append(indice.isin(list(dicc)), False)
+        coincide = presentes[pos]
+
+        nuevos = pd.Series(valores.to_numpy()[pos], index=dataframe.index)
+        dataframe[columna_rellenar] = dataframe[columna_rellenar].mask(coincide, nuevos)
+
+        # si se ha modificado una columna de coincidencia, sus posiciones dejan de ser validas
+        posiciones.pop(columna_rellenar, None)
+
 def rellenar_nulos_competencia(dataframe, dicc, columna_rellenar, columna_coincidencia):
     """
     Rellena los valores nulos en una columna específica del DataFrame basándose en un diccionario que mapea valores de otra columna a nuevos valores.
@@ -91,45 +184,211 @@ def rellenar_nulos_competencia(dataframe, dicc, columna_rellenar, columna_coinci
     Returns:
         None: Modifica el dataframe in-place.
     """
-    dataframe[columna_rellenar] = dataframe.apply(lambda row: dicc.get(row[columna_coincidencia], row[columna_rellenar]), axis=1)
+    rellenar_nulos_mapeos(dataframe, [(dicc, columna_rellenar, columna_coincidencia)])
 
-def relleno_nulos_precio_propios(dataframe, dicc):
+def relleno_nulos_precio_propios(dataframe, dicc=None):
     """
-    Rellena los valores nulos de la columna precio_noche de los hoteles propios utilizando los precios del diccionario proporcionado.
+    Rellena los valores nulos de la columna precio_noche de los hoteles propios con el precio medio de cada hotel, 
+    redondeado a dos decimales. Las medias se calculan con una única agrupación por 'nombre_hotel' y se asignan 
+    a todas las filas a la vez, sin recorrer los hoteles uno a uno.
 
     Args:
         dataframe (pd.DataFrame): El DataFrame donde se deben rellenar los valores nulos en la columna precio_noche.
-        dicc (dict): Un diccionario que contiene los precios de cada hotel para rellenar los valores nulos.
+        dicc (dict, optional): Un diccionario con el precio medio de cada hotel calculado previamente (por ejemplo, 
+                               sobre el archivo completo al procesarlo por lotes). Si es None, las medias se calculan 
+                               sobre el propio DataFrame. Por defecto es None.
 
     Returns:
         None: Modifica el dataframe in-place.
     """
-    for hotel in dicc:
-        dataframe.loc[(dataframe["nombre_hotel"] == hotel) & (dataframe["competencia"] == False), "precio_noche"] = dataframe.loc[(dataframe["nombre_hotel"] == hotel) & (dataframe["competencia"] == False), "precio_noche"].fillna(round(dicc[hotel], 2))
+    medias = dataframe.groupby("nombre_hotel")["precio_noche"].mean() if dicc is None else pd.Series(dicc, dtype=float)
+    # el redondeo se hace sobre una media por hotel, no por fila
+    medias = medias.map(lambda media: round(media, 2))
+
+    relleno = dataframe["nombre_hotel"].map(medias).where(dataframe["competencia"] == False)
+    dataframe["precio_noche"] = dataframe["precio_noche"].fillna(relleno)
 
-def asignar_id_clientes_por_mail(dataframe):
+def asignar_id_clientes_por_mail(dataframe, dicc_id_clientes=None, directorio_claves=None):
     """
-    Asigna un identificador único (id_cliente) a cada cliente basado en su correo electrónico.
+    Asigna un identificador único (id_cliente) a cada cliente basado en su correo electrónico. Los id son enteros 
+    y se asignan con `pd.factorize` (ver `src/soporte_claves.py`), sin recorrer los correos en Python.
 
     Args:
         dataframe (pd.DataFrame): El DataFrame que contiene la columna mail para asignar un id_cliente único.
+        dicc_id_clientes (dict o pd.Series, optional): Un mapeo mail -> id calculado previamente. Si es None, se numeran 
+                                                       los correos del DataFrame por orden de aparición. Por defecto es None.
+        directorio_claves (str, optional): Si se indica y no se pasa `dicc_id_clientes`, los id se guardan en este 
+                                           directorio y los clientes de ejecuciones anteriores conservan su id 
+                                           (ver `claves_persistentes`). Por defecto es None.
 
     Returns:
         pd.DataFrame: El DataFrame con la nueva columna id_cliente asignada.
     """
-    lista_unicos = dataframe["mail"].unique()  
-    dicc_id_clientes = {} 
-    conteo = 1  
+    if dicc_id_clientes is None:
+        dataframe["id_cliente"] = claves_persistentes(dataframe["mail"], "clientes", directorio_claves)[0]
+    else:
+        dataframe["id_cliente"] = ids_claves(dataframe["mail"], dicc_id_clientes)
+    
+    return dataframe
 
-    for correo in lista_unicos:
-        dicc_id_clientes[correo] = conteo
-        conteo += 1  
+def dataset_parquet(archivo_entrada, columnas=None, filtros=None):
+    """
+    Abre un archivo Parquet, o una carpeta de archivos Parquet (con particiones del tipo `columna=valor` o sin ellas), 
+    como un dataset de pyarrow, y prepara la lectura de las columnas y filas indicadas. Los filtros se aplican 
+    al leer: los grupos de filas y las particiones que no los cumplen según sus estadísticas no se llegan a leer.
+
+    Args:
+        archivo_entrada (str): Ruta al archivo o a la carpeta.
+        columnas (list, optional): Las columnas a leer. Las que no existen en el archivo se ignoran. Por defecto 
+                                   se leen todas.
+        filtros (list o pyarrow.compute.Expression, optional): Los filtros de filas, como una expresión de pyarrow o 
+                                   como una lista de tuplas (columna, operador, valor) que deben cumplirse todas, por 
+                                   ejemplo `[("competencia", "==", False), ("fecha_reserva", ">=", "2025-02-05")]`. 
+                                   Se aplican sobre los valores del archivo, antes de la limpieza. Por defecto es None.
+
+    Returns:
+        tuple: El dataset, la lista de columnas a leer (o None) y la expresión de los filtros (o None).
+    """
+    dataset = ds.dataset(archivo_entrada, format="parquet", partitioning="hive")
+    particiones = getattr(dataset, "partitioning", None)
+    if particiones is not None:
+        # solo se cambia el tipo de las columnas que salen de los nombres de las carpetas; las que estan dentro de los
+        # archivos se leen con su propio tipo (un id_hotel guardado como double, por ejemplo) y se convierten al limpiar
+        fragmento = next(iter(dataset.get_fragments()), None)
+        columnas_archivo = set(fragmento.physical_schema.names) if fragmento is not None else set()
+        campos = [campo for campo in particiones.schema if campo.name not in columnas_archivo]
+        if any(campo.name in TIPOS_PARTICIONES for campo in campos):
+            esquema = pa.schema([(campo.name, TIPOS_PARTICIONES.get(campo.name, campo.type)) for campo in campos])
+            dataset = ds.dataset(archivo_entrada, format="parquet", partitioning=ds.partitioning(esquema, flavor="hive"))
+    if columnas is not None:
+        columnas = [col for col in columnas if col in dataset.schema.names]
+    if filtros is not None and not isinstance(filtros, ds.Expression):
+        filtros = pq.filters_to_expression(filtros)
+    return dataset, columnas, filtros
+
+
+def lectura_parquet(archivo_entrada, columnas=None, filtros=None):
+    """
+    Lee en un DataFrame las columnas y filas indicadas de un archivo Parquet o de una carpeta de archivos Parquet 
+    (ver `dataset_parquet`).
+
+    Args:
+        archivo_entrada (str): Ruta al archivo o a la carpeta.
+        columnas (list, optional): Las columnas a leer. Por defecto se leen todas.
+        filtros (list o pyarrow.compute.Expression, optional): Los filtros de filas. Por defecto es None.
+
+    Returns:
+        pd.DataFrame: El DataFrame leído.
+    """
+    dataset, columnas, filtros = dataset_parquet(archivo_entrada, columnas, filtros)
+    return dataset.to_table(columns=columnas, filter=filtros).to_pandas()
+
+
+def entero_minimo(serie):
+    """
+    Convierte una serie de números enteros al tipo entero más pequeño que admite todos sus valores, sin signo si no 
+    hay valores negativos. Si la serie tiene nulos se usa el tipo entero con nulos de pandas (por ejemplo, "UInt16").
+
+    Args:
+        serie (pd.Series): La serie de números enteros (sin decimales).
+
+    Returns:
+        pd.Series: La serie convertida.
+    """
+    valores = serie.dropna()
+    if valores.empty:
+        return serie.astype("Int64")
+    minimo, maximo = valores.min(), valores.max()
+    prefijo = "uint" if minimo >= 0 else "int"
+    for bits in (8, 16, 32, 64):
+        limites = np.iinfo(f"{prefijo}{bits}")
+        if limites.min <= minimo and maximo <= limites.max:
+            break
+    if serie.isna().any():
+        return serie.astype(f"{'UInt' if prefijo == 'uint' else 'Int'}{bits}")
+    return serie.astype(f"{prefijo}{bits}")
+
+
+def optimizacion_tipos(dataframe, tipos=None):
+    """
+    Convierte las columnas de un DataFrame a tipos de datos más compactos según un plan de tipos. Las conversiones 
+    no cambian ningún valor: una columna solo se convierte a entero si todos sus valores son enteros (también si son 
+    cadenas como "123", pero no "0123"), y a float32 si todos sus valores se conservan exactamente. En otro caso, 
+    la columna se deja como está.
+
+    La usan `limpieza_transformacion` (con los dos motores) y `limpieza_transformacion_por_lotes` (columna a columna 
+    sobre el resultado completo, ver `tipos_finales_partes`), así que los tipos no dependen de cómo se ejecute.
+
+    Args:
+        dataframe (pd.DataFrame): El DataFrame a convertir.
+        tipos (dict, optional): Un diccionario columna -> tipo ("categoria", "entero", "decimal" o "booleano"). Las 
+                                columnas que no están en el DataFrame se ignoran. Por defecto es `TIPOS_COLUMNAS`.
+
+    Returns:
+        pd.DataFrame: El DataFrame con los tipos convertidos (modificado in-place).
+
+    Raises:
+        ValueError: Si algún tipo del plan no es válido.
+    """
+    for columna, tipo in (TIPOS_COLUMNAS if tipos is None else tipos).items():
+        if columna not in dataframe.columns:
+            continue
+        serie = dataframe[columna]
+
+        if tipo == "categoria":
+            dataframe[columna] = serie.astype("category")
+
+        elif tipo == "booleano":
+            if serie.dropna().isin([True, False]).all():
+                dataframe[columna] = serie.astype("boolean" if serie.isna().any() else bool)
+
+        elif tipo == "entero":
+            numeros = pd.to_numeric(serie, errors="coerce")
+            enteros = numeros.dropna()
+            if not (numeros.isna() == serie.isna()).all() or not (enteros == enteros.round()).all():
+                continue
+            # las cadenas solo se convierten si se pueden reconstruir igual (sin ceros a la izquierda, espacios...)
+            if not pd.api.types.is_numeric_dtype(serie):
+                if not (enteros.astype("int64").astype(str) == serie.dropna().astype(str)).all():
+                    continue
+            dataframe[columna] = entero_minimo(numeros)
+
+        elif tipo == "decimal":
+            if pd.api.types.is_float_dtype(serie) and serie.dtype != np.float32:
+                reducida = serie.astype(np.float32)
+                if np.array_equal(reducida.astype(np.float64).to_numpy(), serie.to_numpy(dtype=np.float64), equal_nan=True):
+                    dataframe[columna] = reducida
+
+        else:
+            raise ValueError(f"Tipo no válido para la columna '{columna}': {tipo}.")
 
-    dataframe["id_cliente"] = dataframe["mail"].map(dicc_id_clientes).astype(str)
-    
     return dataframe
 
-def limpieza_transformacion(archivo_entrada, df_hoteles_competencia, archivo_salida):
+
+def hoteles_competencia(df_hoteles_competencia):
+    """
+    Devuelve el DataFrame de hoteles de la competencia, esperando a que termine su extracción si es un `Future` 
+    (ver `resultado_futuro`), y comprueba que no está vacío.
+
+    Args:
+        df_hoteles_competencia (pd.DataFrame o concurrent.futures.Future): Los hoteles de la competencia.
+
+    Returns:
+        pd.DataFrame: El DataFrame de hoteles de la competencia.
+
+    Raises:
+        ValueError: Si el DataFrame está vacío.
+    """
+    df_hoteles_competencia = resultado_futuro(df_hoteles_competencia)
+    if df_hoteles_competencia.empty:
+        raise ValueError("El DataFrame de hoteles de la competencia está vacío.")
+    return df_hoteles_competencia
+
+
+def limpieza_transformacion(archivo_entrada, df_hoteles_competencia, archivo_salida, formato=FORMATO_POR_DEFECTO, 
+                            columnas=COLUMNAS_ENTRADA, filtros=None, clave_duplicados=CLAVE_DUPLICADOS, informe_duplicados=None, 
+                            num_procesos=1, motor=MOTOR_POR_DEFECTO, directorio_claves=None, 
+                            politica_salida=POLITICA_SALIDA_POR_DEFECTO, escritura_segundo_plano=False):
     """
     Realiza un proceso completo de limpieza y transformación de datos en un DataFrame de reservas de hoteles.
 
@@ -138,100 +397,792 @@ def limpieza_transformacion(archivo_entrada, df_hoteles_competencia, archivo_sal
     en función de ciertos criterios basados en el contexto de los hoteles y las reservas. Al final, guarda el DataFrame 
     transformado en un archivo de salida.
 
+    Con `num_procesos` mayor que 1, los pasos 5 a 14 se ejecutan en paralelo en varios procesos: el DataFrame se reparte 
+    por 'id_hotel' (ver `particiones_hoteles`), los valores globales (medias por hotel, primeras fechas, id de clientes 
+    e id de los hoteles de la competencia) se calculan una sola vez con `calculo_agregados`, y cada proceso aplica 
+    `transformacion_lote` a una partición. El resultado es idéntico al de la ejecución en un solo proceso.
+
+    Con `motor="polars"`, los pasos 1 a 14 se ejecutan como un único plan diferido de polars (ver `plan_limpieza_polars`), 
+    que solo lee del Parquet las columnas y filas necesarias y se ejecuta en varios hilos. El DataFrame resultante es 
+    el mismo que con el motor pandas.
+
+    `df_hoteles_competencia` puede ser el `Future` del scraping de los hoteles si todavía se está ejecutando: los pasos 
+    1 a 9 (con el motor pandas) no lo necesitan y se ejecutan mientras tanto, y solo se espera a él para rellenar los 
+    datos de la competencia (pasos 10 a 14). Con el motor polars se espera a él antes de construir el plan.
+
     Pasos realizados por la función:
-    1. Cargar el archivo de entrada (`archivo_entrada`) en un DataFrame.
+    1. Cargar el archivo de entrada (`archivo_entrada`) en un DataFrame, leyendo solo las columnas y filas indicadas.
     2. Convertir las columnas 'fecha_reserva', 'inicio_estancia' y 'final_estancia' a tipo datetime.
-    3. Eliminar duplicados en el DataFrame.
+    3. Eliminar duplicados en el DataFrame según el hash de `clave_duplicados` (ver `eliminacion_duplicados`).
     4. Rellenar los valores vacíos en las columnas 'fecha_reserva', 'nombre_hotel' y 'ciudad' con `NaN`.
     5. Asignar "Madrid" como valor por defecto a los valores nulos de la columna 'ciudad'.
     6. Rellenar valores nulos en las fechas de inicio y final de estancia con el valor de la primera reserva no nula.
     7. Asignar la media de las estrellas por hotel a la columna 'estrellas'.
     8. Asignar un ID único a cada cliente basándose en su correo electrónico ('mail').
-    9. Calcular medidas estadísticas descriptivas sobre los precios de las noches por hotel.
-    10. Crear un diccionario con la media de precios por hotel.
-    11. Rellenar valores nulos en la columna 'precio_noche' de los hoteles propios usando la media de precios por hotel.
-    12. Obtener los ID de los hoteles de la competencia.
-    13. Crear un diccionario de correspondencia entre el ID de los hoteles y los nombres de los hoteles de la competencia.
-    14. Rellenar valores nulos en la columna 'nombre_hotel' de los hoteles de la competencia basándose en el ID de hotel.
-    15. Crear un diccionario con los precios de las noches por hotel en la competencia.
-    16. Rellenar valores nulos en la columna 'precio_noche' de los hoteles de la competencia con los precios correspondientes.
-    17. Crear un diccionario con las fechas de reserva de los hoteles de la competencia.
-    18. Rellenar valores nulos en la columna 'fecha_reserva' de los hoteles de la competencia con las fechas correspondientes.
-    19. Guardar el DataFrame final en el archivo de salida (`archivo_salida`).
-
-    Args:
-        archivo_entrada (str): Ruta al archivo de entrada en formato Parquet que contiene los datos de reservas.
-        df_hoteles_competencia (pd.DataFrame): DataFrame con los datos de los hoteles de la competencia.
+    9. Rellenar valores nulos en la columna 'precio_noche' de los hoteles propios usando la media de precios por hotel.
+    10. Obtener los ID de los hoteles de la competencia.
+    11. Crear un diccionario de correspondencia entre el ID de los hoteles y los nombres de los hoteles de la competencia.
+    12. Crear un diccionario con los precios de las noches por hotel en la competencia.
+    13. Crear un diccionario con las fechas de reserva de los hoteles de la competencia.
+    14. Rellenar en una sola pasada las columnas 'nombre_hotel' (según el ID de hotel), 'precio_noche' y 'fecha_reserva' 
+        (según el nombre del hotel) de los hoteles de la competencia.
+    15. Convertir las columnas a los tipos de `TIPOS_COLUMNAS` con `optimizacion_tipos` (categorías y enteros y decimales 
+        más pequeños), sin cambiar sus valores.
+    16. Guardar el DataFrame final en el archivo de salida (`archivo_salida`), con la extensión ajustada a `formato`. 
+        Si el archivo ya existe se aplica `politica_salida` (ver `resolucion_ruta_salida`) sin pedir confirmación, 
+        salvo con la política "preguntar". Con `archivo_salida=None` no se guarda, para que lo haga quien llama 
+        (por ejemplo, el checkpoint de `main.py`).
+
+    Con `escritura_segundo_plano=True`, el archivo de salida se escribe en otro hilo y la función devuelve el DataFrame 
+    sin esperar a que termine, para que la carga empiece enseguida; hay que llamar a `esperar_escrituras` 
+    (ver `src/soporte_almacenamiento.py`) antes de usar el archivo.
+
+    Args:
+        archivo_entrada (str): Ruta al archivo de entrada en formato Parquet que contiene los datos de reservas, 
+                               o a una carpeta de archivos Parquet (ver `dataset_parquet`).
+        df_hoteles_competencia (pd.DataFrame o concurrent.futures.Future): DataFrame con los datos de los hoteles de 
+                                                                          la competencia, o el `Future` que lo calcula.
         archivo_salida (str): Ruta al archivo donde se guardará el DataFrame resultante después de la transformación 
-                              (en formato Pickle).
+                              (su extensión se ajusta a `formato`), o None para no guardarlo.
+        formato (str, optional): El formato del archivo de salida ("feather", "parquet" o "pickle", ver 
+                                 `src/soporte_almacenamiento.py`). Por defecto es `FORMATO_POR_DEFECTO`.
+        columnas (list, optional): Las columnas del archivo de entrada que se leen. Por defecto es `COLUMNAS_ENTRADA`; 
+                                   None lee todas.
+        filtros (list o pyarrow.compute.Expression, optional): Los filtros de filas que se aplican al leer el archivo 
+                                   de entrada (ver `dataset_parquet`). Las medias por hotel se calculan solo con las 
+                                   filas seleccionadas. Por defecto es None.
+        clave_duplicados (list, optional): Las columnas que identifican una reserva repetida, por ejemplo 
+                                           `["id_reserva"]`. Por defecto es `CLAVE_DUPLICADOS` (filas completas).
+        informe_duplicados (dict, optional): Un diccionario que se rellena in-place con las filas leídas y los 
+                                             duplicados eliminados de cada archivo de entrada. Por defecto es None.
+        num_procesos (int, optional): El número de procesos en los que se reparte la transformación (solo con el motor 
+                                      pandas; polars usa varios hilos). Por defecto es 1.
+        motor (str, optional): "pandas" o "polars" (ver `MOTORES`). Con polars, los filtros deben ser una lista de 
+                               tuplas. Por defecto es `MOTOR_POR_DEFECTO`.
+        directorio_claves (str, optional): Directorio donde se guardan los id de los clientes, para que los clientes de 
+                                           ejecuciones anteriores conserven su id (ver `src/soporte_claves.py`). 
+                                           Por defecto es None (los id se numeran desde 1 en cada ejecución).
+        politica_salida (str, optional): Qué hacer si el archivo de salida ya existe: "sobrescribir", "version", 
+                                         "omitir", "error" o "preguntar" (ver `POLITICAS_SALIDA`). Por defecto es 
+                                         `POLITICA_SALIDA_POR_DEFECTO`.
+        escritura_segundo_plano (bool, optional): Si el archivo de salida se escribe en otro hilo. Por defecto es False.
 
     Returns:
         pd.DataFrame: El DataFrame transformado con las modificaciones aplicadas.
 
     Raises:
         FileNotFoundError: Si el archivo de entrada no se encuentra en la ruta especificada.
-        ValueError: Si el DataFrame de hoteles de la competencia está vacío o si hay un error en la lectura del archivo de entrada.
+        ValueError: Si el DataFrame de hoteles de la competencia está vacío, si el motor o la política de salida no son 
+                    válidos o si hay un error en la lectura del archivo de entrada.
         KeyError: Si alguna de las columnas necesarias no está presente en el DataFrame.
-        FileExistsError: Si el archivo de salida ya existe y no se confirma su sobrescritura.
-        RuntimeError: Si ocurre un error durante el proceso de transformación y limpieza de datos.
+        ImportError: Si se elige el motor polars y no está instalado.
+        RuntimeError: Si ocurre un error durante el proceso de transformación y limpieza de datos, o si el archivo de 
+                      salida ya existe y la política es "error" (o "preguntar" y no se confirma su sobrescritura).
     """
     # comprueba si el archivo de entrada existe
     if not os.path.exists(archivo_entrada):
         raise FileNotFoundError(f"El archivo de entrada {archivo_entrada} no se encuentra.")
 
-    # comprueba que el DataFrame de competencia no este vacio
-    if df_hoteles_competencia.empty:
-        raise ValueError("El DataFrame de hoteles de la competencia está vacío.")
+    # comprueba que el DataFrame de competencia no este vacio (si aun se esta extrayendo, se comprueba al esperarlo)
+    if not isinstance(df_hoteles_competencia, Future):
+        hoteles_competencia(df_hoteles_competencia)
+
+    # comprueba que el motor es valido
+    if motor not in MOTORES:
+        raise ValueError(f"Motor no válido: {motor}. Debe ser uno de {list(MOTORES)}.")
+
+    # comprueba que la politica de salida es valida antes de hacer la transformacion
+    if politica_salida not in POLITICAS_SALIDA:
+        raise ValueError(f"Política de salida no válida: {politica_salida}. Debe ser una de {list(POLITICAS_SALIDA)}.")
+
+    if motor == "polars":
+        # los pasos 1 a 14 se ejecutan en un unico plan de polars
+        try:
+            df_hoteles_competencia = hoteles_competencia(df_hoteles_competencia)
+            df = limpieza_polars(archivo_entrada, df_hoteles_competencia, columnas, filtros, clave_duplicados, informe_duplicados)
+        except (KeyError, ImportError, ValueError):
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Error durante la transformación y limpieza de datos: {e}")
+    else:
+        # carga el archivo de entrada (asegurando que es un archivo válido)
+        try:
+            partes = list(lectura_lotes_fuentes_parquet(archivo_entrada, None, columnas, filtros))
+            if partes:
+                df = pd.concat([lote for _, lote in partes], ignore_index=True)
+                fuentes = np.repeat([fuente for fuente, _ in partes], [len(lote) for _, lote in partes])
+            else:
+                df, fuentes = lectura_parquet(archivo_entrada, columnas, filtros), None
+        except Exception as e:
+            raise ValueError(f"Error al leer el archivo de entrada: {e}")
+
+        # verifica que las columnas necesarias estan presentes en el DataFrame
+        for col in COLUMNAS_REQUERIDAS:
+            if col not in df.columns:
+                raise KeyError(f"La columna '{col}' no está presente en el DataFrame.")
 
-    # carga el archivo de entrada (asegurando que es un archivo válido)
     try:
-        df = pd.read_parquet(archivo_entrada)
+        # procede con las transformaciones y limpieza (con polars ya se han aplicado en `limpieza_polars`)
+        if motor == "pandas":
+            transf_col_datetime(df, ["fecha_reserva", "inicio_estancia", "final_estancia"])
+            df = eliminacion_duplicados(df, clave_duplicados, fuentes=fuentes, informe=informe_duplicados)
+            relleno_blancos(df, ["fecha_reserva", "nombre_hotel", "ciudad"])
+
+            if num_procesos > 1:
+                # valores globales una sola vez y transformacion de cada particion de hoteles en un proceso
+                agregados = calculo_agregados(df, directorio_claves)
+                particiones = particiones_hoteles(df, num_procesos)
+                df_hoteles_competencia = hoteles_competencia(df_hoteles_competencia)
+                with ProcessPoolExecutor(max_workers=len(particiones)) as executor:
+                    df = pd.concat(executor.map(transformacion_lote, particiones, repeat(agregados), repeat(df_hoteles_competencia)))
+                df.sort_index(inplace=True)
+            else:
+                df["ciudad"] = df["ciudad"].fillna("Madrid")
+                nulos_fechas_estancia(df, ["inicio_estancia", "final_estancia"])
+                df["estrellas"] = df["nombre_hotel"].map(df.groupby("nombre_hotel")["estrellas"].mean().round(1))
+
+                asignar_id_clientes_por_mail(df, directorio_claves=directorio_claves)
+
+                relleno_nulos_precio_propios(df)
+
+                lista_id_hoteles = df[df["competencia"] == True]["id_hotel"].unique().tolist()
+
+                # a partir de aqui se necesitan los hoteles de la competencia
+                df_hoteles_competencia = hoteles_competencia(df_hoteles_competencia)
+                dicc_id = creacion_diccionarios(lista_id_hoteles, lista_columnas_df(df_hoteles_competencia, "nombre_hotel"))
+                dicc_precios = creacion_diccionarios(lista_columnas_df(df_hoteles_competencia, "nombre_hotel"), lista_columnas_df(df_hoteles_competencia, "precio_noche"))
+                dicc_fechas = creacion_diccionarios(lista_columnas_df(df_hoteles_competencia, "nombre_hotel"), lista_columnas_df(df_hoteles_competencia, "fecha_reserva"))
+                rellenar_nulos_mapeos(df, [(dicc_id, "nombre_hotel", "id_hotel"), 
+                                           (dicc_precios, "precio_noche", "nombre_hotel"), 
+                                           (dicc_fechas, "fecha_reserva", "nombre_hotel")])
+
+        elif directorio_claves is not None:
+            # el plan de polars numera los clientes desde 1; con claves guardadas se reasignan con las anteriores
+            asignar_id_clientes_por_mail(df, directorio_claves=directorio_claves)
+
+        optimizacion_tipos(df)
+
+        # guarda el resultado segun la politica de salida, sin bloquear la ejecucion esperando una respuesta
+        if archivo_salida is not None:
+            guardar_salida(df, ruta_formato(archivo_salida, formato), politica_salida, escritura_segundo_plano)
+    
     except Exception as e:
-        raise ValueError(f"Error al leer el archivo de entrada: {e}")
+        raise RuntimeError(f"Error durante la transformación y limpieza de datos: {e}")
+
+    return df
+
+def expresion_filtros_polars(filtros):
+    """
+    Convierte los filtros de filas en formato de lista de tuplas (columna, operador, valor) (ver `dataset_parquet`) 
+    en una expresión de polars.
+
+    Args:
+        filtros (list): Los filtros de filas, que deben cumplirse todos.
 
-    # verifica que las columnas necesarias estan presentes en el DataFrame
-    columnas_requeridas = ["fecha_reserva", "inicio_estancia", "final_estancia", "nombre_hotel", "ciudad"]
-    for col in columnas_requeridas:
-        if col not in df.columns:
+    Returns:
+        pl.Expr: La expresión de los filtros, o None si no hay filtros.
+
+    Raises:
+        ValueError: Si los filtros son una expresión de pyarrow o si algún operador no es válido.
+    """
+    if filtros is None:
+        return None
+    if isinstance(filtros, ds.Expression):
+        raise ValueError("El motor polars solo admite los filtros como una lista de tuplas (columna, operador, valor).")
+
+    operadores = {
+        "==": lambda col, valor: col == valor,
+        "=": lambda col, valor: col == valor,
+        "!=": lambda col, valor: col != valor,
+        "<": lambda col, valor: col < valor,
+        "<=": lambda col, valor: col <= valor,
+        ">": lambda col, valor: col > valor,
+        ">=": lambda col, valor: col >= valor,
+        "in": lambda col, valor: col.is_in(list(valor)),
+        "not in": lambda col, valor: ~col.is_in(list(valor)),
+    }
+    expresion = None
+    for columna, operador, valor in filtros:
+        if operador not in operadores:
+            raise ValueError(f"Operador no válido en los filtros: {operador}. Debe ser uno de {list(operadores)}.")
+        condicion = operadores[operador](pl.col(columna), valor)
+        expresion = condicion if expresion is None else expresion & condicion
+    return expresion
+
+
+def plan_limpieza_polars(archivo_entrada, df_hoteles_competencia, columnas=COLUMNAS_ENTRADA, filtros=None, 
+                         clave_duplicados=CLAVE_DUPLICADOS, columna_fuente=None):
+    """
+    Construye con polars el plan diferido (LazyFrame) de los pasos 1 a 14 de `limpieza_transformacion`. El plan no 
+    lee nada hasta que se ejecuta: el optimizador de polars lleva las columnas y los filtros a la lectura del Parquet, 
+    calcula todos los rellenos de una fila en una sola proyección y ejecuta el plan en varios hilos.
+
+    Las filas conservan su posición en la lectura en la columna "__fila", para ordenar el resultado y usarla como 
+    índice igual que el motor pandas.
+
+    Args:
+        archivo_entrada (str): Ruta al archivo Parquet de reservas o a una carpeta de archivos Parquet.
+        df_hoteles_competencia (pd.DataFrame): DataFrame con los datos de los hoteles de la competencia.
+        columnas (list, optional): Las columnas a leer. Por defecto es `COLUMNAS_ENTRADA`; None lee todas.
+        filtros (list, optional): Los filtros de filas como lista de tuplas (ver `expresion_filtros_polars`). 
+                                  Por defecto es None.
+        clave_duplicados (list, optional): Las columnas que identifican una fila repetida. Por defecto es 
+                                           `CLAVE_DUPLICADOS` (filas completas).
+        columna_fuente (str, optional): Si se indica, el plan incluye una columna con este nombre con el archivo 
+                                        del que procede cada fila, para el informe de duplicados. Por defecto es None.
+
+    Returns:
+        tuple: El plan de las filas leídas con la columna booleana "__nueva" (False en las filas repetidas), y el plan 
+               del DataFrame limpio a partir del primero.
+
+    Raises:
+        KeyError: Si alguna de las columnas necesarias no está presente en el archivo de entrada.
+    """
+    tipos_particiones = {"competencia": pl.Boolean, "id_hotel": pl.Int64}
+    lf = pl.scan_parquet(archivo_entrada, hive_schema=tipos_particiones, include_file_paths=columna_fuente)
+
+    esquema = lf.collect_schema()
+    columnas = [col for col in (esquema.names() if columnas is None else columnas) if col in esquema and col != columna_fuente]
+    for col in COLUMNAS_REQUERIDAS:
+        if col not in columnas:
             raise KeyError(f"La columna '{col}' no está presente en el DataFrame.")
 
-    try:
-        # procede con las transformaciones y limpieza
-        transf_col_datetime(df, ["fecha_reserva", "inicio_estancia", "final_estancia"])
-        df.drop_duplicates(inplace=True)
-        relleno_blancos(df, ["fecha_reserva", "nombre_hotel", "ciudad"])
+    expresion = expresion_filtros_polars(filtros)
+    if expresion is not None:
+        lf = lf.filter(expresion)
+    lf = lf.select(columnas + ([columna_fuente] if columna_fuente else [])).with_row_index("__fila")
 
-        df["ciudad"] = df["ciudad"].fillna("Madrid")
-        nulos_fechas_estancia(df, ["inicio_estancia", "final_estancia"])
-        df["estrellas"] = df["nombre_hotel"].map(df.groupby("nombre_hotel")["estrellas"].mean().round(1))
+    # pasos 2 a 4: fechas, duplicados (marcados, para poder contarlos por archivo) y blancos
+    fechas = [col for col in ["fecha_reserva", "inicio_estancia", "final_estancia"] if esquema[col] == pl.String]
+    lf = lf.with_columns(pl.col(fechas).str.to_datetime(time_unit="us", strict=False))
+    leidas = lf.with_columns(__nueva=pl.struct(columnas if clave_duplicados is None else clave_duplicados).is_first_distinct())
 
-        asignar_id_clientes_por_mail(df)
+    blancos = [col for col in ["nombre_hotel", "ciudad"] if esquema[col] == pl.String]
+    lf = leidas.filter("__nueva").with_columns(
+        pl.when(pl.col(col) == "").then(None).otherwise(pl.col(col)).alias(col) for col in blancos
+    )
 
-        df_medidas = df.groupby("nombre_hotel")["precio_noche"].describe().reset_index()
+    # pasos 5 a 9 en una sola proyeccion: todas las expresiones ven los valores anteriores a los rellenos
+    hotel_valido = pl.col("nombre_hotel").is_not_null()
+    lf = lf.with_columns(
+        pl.col("ciudad").fill_null("Madrid"),
+        *[pl.col(col).fill_null(pl.col(col).drop_nulls().first()) for col in ["inicio_estancia", "final_estancia"]],
+        pl.when(hotel_valido).then(pl.col("estrellas").mean().over("nombre_hotel").round(1)).alias("estrellas"),
+        # los mails se numeran por el orden de su primera fila
+        id_cliente=pl.col("__fila").min().over("mail").rank("dense"),
+        precio_noche=pl.when(pl.col("precio_noche").is_null() & (pl.col("competencia") == False) & hotel_valido)
+                       .then(pl.col("precio_noche").mean().over("nombre_hotel").round(2))
+                       .otherwise(pl.col("precio_noche")),
+    )
 
-        dicc_medidas = creacion_diccionarios(lista_columnas_df(df_medidas, "nombre_hotel"), lista_columnas_df(df_medidas, "mean"))
-        relleno_nulos_precio_propios(df, dicc_medidas)
+    # pasos 10 a 14: el id de cada hotel de la competencia (por orden de aparicion) se empareja por posicion 
+    # con los nombres de `df_hoteles_competencia`, como en `creacion_diccionarios`
+    nombres = lista_columnas_df(df_hoteles_competencia, "nombre_hotel")
+    ids_competencia = (lf.filter(pl.col("competencia") == True).select(pl.col("id_hotel").unique(maintain_order=True))
+                         .with_row_index("__posicion")
+                         .join(pl.LazyFrame({"__posicion": range(len(nombres)), "__nombre_competencia": nombres},
+                                            schema={"__posicion": pl.UInt32, "__nombre_competencia": pl.String}), 
+                               on="__posicion"))
+    dicc_precios = creacion_diccionarios(nombres, lista_columnas_df(df_hoteles_competencia, "precio_noche"))
+    dicc_fechas = creacion_diccionarios(nombres, lista_columnas_df(df_hoteles_competencia, "fecha_reserva"))
 
-        lista_id_hoteles = df[df["competencia"] == True]["id_hotel"].unique().tolist()
+    lf = (lf.join(ids_competencia, on="id_hotel", how="left")
+            .with_columns(pl.when(pl.col("__posicion").is_not_null()).then(pl.col("__nombre_competencia"))
+                            .otherwise(pl.col("nombre_hotel")).alias("nombre_hotel"))
+            .with_columns(
+                pl.col("nombre_hotel").replace_strict(dicc_precios, default=pl.col("precio_noche"), return_dtype=pl.Float64)
+                  .alias("precio_noche"),
+                pl.col("nombre_hotel").replace_strict(dicc_fechas, default=pl.col("fecha_reserva"), 
+                                                      return_dtype=pl.Datetime("us")).alias("fecha_reserva"),
+            ))
 
-        dicc_id = creacion_diccionarios(lista_id_hoteles, lista_columnas_df(df_hoteles_competencia, "nombre_hotel"))
-        rellenar_nulos_competencia(df, dicc_id, "nombre_hotel", "id_hotel")
+    salida = ["__fila"] + columnas + ([] if "id_cliente" in columnas else ["id_cliente"])
+    return leidas, lf.sort("__fila").select(salida)
 
-        dicc_precios = creacion_diccionarios(lista_columnas_df(df_hoteles_competencia, "nombre_hotel"), lista_columnas_df(df_hoteles_competencia, "precio_noche"))
-        rellenar_nulos_competencia(df, dicc_precios, "precio_noche", "nombre_hotel")
 
-        dicc_fechas = creacion_diccionarios(lista_columnas_df(df_hoteles_competencia, "nombre_hotel"), lista_columnas_df(df_hoteles_competencia, "fecha_reserva"))
-        rellenar_nulos_competencia(df, dicc_fechas, "fecha_reserva", "nombre_hotel")
+def limpieza_polars(archivo_entrada, df_hoteles_competencia, columnas=COLUMNAS_ENTRADA, filtros=None, 
+                    clave_duplicados=CLAVE_DUPLICADOS, informe_duplicados=None):
+    """
+    Ejecuta el plan de `plan_limpieza_polars` y devuelve el resultado como un DataFrame de pandas con el mismo índice, 
+    columnas y valores que los pasos 1 a 14 del motor pandas de `limpieza_transformacion`.
 
-        # verifica si el archivo de salida ya existe y confirmacion de sobreescritura 
-        if os.path.exists(archivo_salida):
-            overwrite = input(f"El archivo {archivo_salida} ya existe. ¿Desea sobrescribirlo? (s/n): ")
-            if overwrite.lower() != 's':
-                raise FileExistsError(f"El archivo {archivo_salida} no se ha sobrescrito.")
+    Args:
+        archivo_entrada (str): Ruta al archivo Parquet de reservas o a una carpeta de archivos Parquet.
+        df_hoteles_competencia (pd.DataFrame): DataFrame con los datos de los hoteles de la competencia.
+        columnas (list, optional): Las columnas a leer. Por defecto es `COLUMNAS_ENTRADA`; None lee todas.
+        filtros (list, optional): Los filtros de filas como lista de tuplas. Por defecto es None.
+        clave_duplicados (list, optional): Las columnas que identifican una fila repetida. Por defecto es 
+                                           `CLAVE_DUPLICADOS` (filas completas).
+        informe_duplicados (dict, optional): Un diccionario que se rellena in-place con las filas leídas y los 
+                                             duplicados eliminados de cada archivo de entrada. Por defecto es None.
+
+    Returns:
+        pd.DataFrame: El DataFrame limpio, antes de la conversión de tipos.
+
+    Raises:
+        ImportError: Si polars no está instalado.
+    """
+    if pl is None:
+        raise ImportError("El motor polars necesita la librería polars (pip install polars).")
+
+    columna_fuente = "__fuente" if informe_duplicados is not None else None
+    leidas, plan = plan_limpieza_polars(archivo_entrada, df_hoteles_competencia, columnas, filtros, clave_duplicados, 
+                                        columna_fuente)
+    if informe_duplicados is None:
+        resultado = plan.collect()
+    else:
+        conteo = leidas.group_by(columna_fuente).agg(filas=pl.len(), duplicados=(~pl.col("__nueva")).sum())
+        # las dos consultas comparten la lectura y la eliminacion de duplicados
+        resultado, conteo = pl.collect_all([plan, conteo])
+        for fuente, filas, duplicados in conteo.iter_rows():
+            actual = informe_duplicados.setdefault(fuente, {"filas": 0, "duplicados": 0})
+            actual["filas"] += int(filas)
+            actual["duplicados"] += int(duplicados)
+
+    dataframe = resultado.drop("__fila").to_pandas()
+    dataframe.index = pd.Index(resultado["__fila"].to_numpy().astype(np.int64))
+    return dataframe
+
+
+def lectura_lotes_parquet(archivo_entrada, tamano_lote, columnas=None, filtros=None):
+    """
+    Lee un archivo Parquet, o una carpeta de archivos Parquet, por lotes, sin cargarlo entero en memoria.
+
+    Args:
+        archivo_entrada (str): Ruta al archivo Parquet o a la carpeta.
+        tamano_lote (int): El número máximo de filas de cada lote.
+        columnas (list, optional): Las columnas a leer. Por defecto se leen todas.
+        filtros (list o pyarrow.compute.Expression, optional): Los filtros de filas (ver `dataset_parquet`). 
+                                                               Por defecto es None.
+
+    Yields:
+        pd.DataFrame: Cada uno de los lotes del archivo.
+    """
+    for _, lote in lectura_lotes_fuentes_parquet(archivo_entrada, tamano_lote, columnas, filtros):
+        yield lote
+
+
+def lectura_lotes_fuentes_parquet(archivo_entrada, tamano_lote, columnas=None, filtros=None):
+    """
+    Lee un archivo Parquet, o una carpeta de archivos Parquet, por lotes, indicando el archivo del que procede 
+    cada lote. Los archivos que no cumplen los filtros según sus particiones no se llegan a abrir.
+
+    Args:
+        archivo_entrada (str): Ruta al archivo Parquet o a la carpeta.
+        tamano_lote (int): El número máximo de filas de cada lote. Si es None, cada archivo se lee en un solo lote.
+        columnas (list, optional): Las columnas a leer. Por defecto se leen todas.
+        filtros (list o pyarrow.compute.Expression, optional): Los filtros de filas (ver `dataset_parquet`). 
+                                                               Por defecto es None.
+
+    Yields:
+        tuple: La ruta del archivo y el lote (pd.DataFrame).
+    """
+    dataset, columnas, filtros = dataset_parquet(archivo_entrada, columnas, filtros)
+    for fragmento in dataset.get_fragments(filter=filtros):
+        if tamano_lote is None:
+            lotes = [fragmento.to_table(columns=columnas, filter=filtros, schema=dataset.schema)]
+        else:
+            lotes = fragmento.to_batches(columns=columnas, filter=filtros, batch_size=tamano_lote, schema=dataset.schema)
+        for lote in lotes:
+            if lote.num_rows:
+                yield fragmento.path, lote.to_pandas()
+
+
+def hash_columna(serie):
+    """
+    Calcula el hash de 64 bits de cada valor de una columna. En las columnas de texto se calcula el hash de cada valor 
+    distinto una sola vez y se reparte con los códigos de `pd.factorize`, que es mucho más rápido que calcular 
+    el hash de todas las cadenas.
+
+    Args:
+        serie (pd.Series): La columna.
+
+    Returns:
+        np.ndarray: Un array de uint64 con el hash de cada valor.
+    """
+    if serie.dtype == object or pd.api.types.is_string_dtype(serie.dtype):
+        codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+        return pd.util.hash_array(np.asarray(unicos, dtype=object))[codigos]
+    return pd.util.hash_pandas_object(serie, index=False).to_numpy()
+
+
+def hash_filas(dataframe, clave=None):
+    """
+    Calcula el hash de 64 bits de cada fila de un DataFrame, combinando los hashes de las columnas de la clave 
+    (ver `hash_columna`). El hash de una fila solo depende de sus valores, por lo que se puede comparar entre lotes.
+
+    Args:
+        dataframe (pd.DataFrame): El DataFrame.
+        clave (list, optional): Las columnas que identifican cada fila. Por defecto se usan todas.
+
+    Returns:
+        np.ndarray: Un array de uint64 con el hash de cada fila.
+    """
+    hashes = np.full(len(dataframe), 0x345678, dtype=np.uint64)
+    for columna in (dataframe.columns if clave is None else clave):
+        hashes = (hashes ^ hash_columna(dataframe[columna])) * np.uint64(1000003)
+    return hashes
+
+
+def filtrado_hashes_vistos(hashes, vistos):
+    """
+    Marca los hashes que aparecen por primera vez, tanto dentro del array como respecto a los vistos anteriormente, 
+    y los añade a `vistos`. Los hashes vistos se guardan en arrays ordenados de tamaños decrecientes, que se fusionan 
+    al añadir arrays del mismo tamaño o mayores: cada búsqueda es una búsqueda binaria en unos pocos arrays y la 
+    memoria es de 8 bytes por hash, en lugar de los más de 50 bytes por elemento de un `set` de Python.
+
+    Args:
+        hashes (np.ndarray): Los hashes (uint64) a comprobar.
+        vistos (list): La lista de arrays ordenados con los hashes vistos. Se actualiza in-place.
+
+    Returns:
+        np.ndarray: Un array booleano que es True en la primera aparición de cada hash no visto anteriormente.
+    """
+    nuevos = ~pd.Series(hashes).duplicated().to_numpy()
+    for nivel in vistos:
+        posiciones = np.minimum(np.searchsorted(nivel, hashes), len(nivel) - 1)
+        nuevos &= nivel[posiciones] != hashes
+
+    añadir = np.sort(hashes[nuevos])
+    while vistos and len(vistos[-1]) <= len(añadir):
+        añadir = np.sort(np.concatenate([vistos.pop(), añadir]))
+    if len(añadir):
+        vistos.append(añadir)
+    return nuevos
+
+
+def eliminacion_duplicados(dataframe, clave=None, vistos=None, fuentes=None, informe=None):
+    """
+    Elimina las filas repetidas de un DataFrame comparando el hash de 64 bits de su clave, en lugar de las columnas 
+    completas como `drop_duplicates`. Si se pasa `vistos`, también se eliminan las filas que ya aparecieron en 
+    lotes anteriores, de forma que un archivo se puede procesar por lotes sin tener todas sus filas en memoria.
+
+    Args:
+        dataframe (pd.DataFrame): El DataFrame o lote.
+        clave (list, optional): Las columnas que identifican una fila repetida, por ejemplo `["id_reserva"]`. 
+                                Por defecto se comparan las filas completas.
+        vistos (list, optional): Los hashes vistos en lotes anteriores (ver `filtrado_hashes_vistos`). Se actualiza 
+                                 con las filas nuevas. Por defecto es None (solo se buscan repetidas en el DataFrame).
+        fuentes (str o array, optional): El origen (por ejemplo, el archivo) del DataFrame o de cada una de sus filas, 
+                                         para el informe. Por defecto es None.
+        informe (dict, optional): Un diccionario fuente -> {"filas": int, "duplicados": int} que se actualiza in-place 
+                                  con las filas leídas y eliminadas de cada fuente. Por defecto es None.
+
+    Returns:
+        pd.DataFrame: El DataFrame sin las filas repetidas, conservando la primera aparición de cada una.
+    """
+    nuevas = filtrado_hashes_vistos(hash_filas(dataframe, clave), [] if vistos is None else vistos)
+
+    if informe is not None:
+        if np.ndim(fuentes) == 0:
+            conteo = {fuentes: (len(nuevas), (~nuevas).sum())}
+        else:
+            conteo = pd.Series(~nuevas).groupby(np.asarray(fuentes)).agg(["size", "sum"]).apply(tuple, axis=1).to_dict()
+        for fuente, (filas, duplicados) in conteo.items():
+            actual = informe.setdefault(fuente, {"filas": 0, "duplicados": 0})
+            actual["filas"] += int(filas)
+            actual["duplicados"] += int(duplicados)
+
+    return dataframe if nuevas.all() else dataframe[nuevas]
+
+def preparacion_lote(dataframe, vistos, clave=CLAVE_DUPLICADOS, fuente=None, informe=None):
+    """
+    Aplica a un lote los pasos previos al cálculo de los agregados: conversión de las fechas a datetime, eliminación 
+    de duplicados y sustitución de los blancos por NaN. Los duplicados se detectan también respecto a los lotes 
+    anteriores mediante el hash de la clave de cada fila (ver `eliminacion_duplicados`).
+
+    Args:
+        dataframe (pd.DataFrame): El lote a preparar.
+        vistos (list): Los hashes de las filas de los lotes anteriores. Se actualiza con las filas nuevas del lote.
+        clave (list, optional): Las columnas que identifican una fila repetida. Por defecto es `CLAVE_DUPLICADOS`.
+        fuente (str, optional): El archivo del que procede el lote, para el informe. Por defecto es None.
+        informe (dict, optional): El informe de duplicados por fuente que se actualiza in-place. Por defecto es None.
+
+    Returns:
+        pd.DataFrame: El lote preparado, sin las filas duplicadas.
+    """
+    transf_col_datetime(dataframe, ["fecha_reserva", "inicio_estancia", "final_estancia"])
+    dataframe = eliminacion_duplicados(dataframe, clave, vistos, fuente, informe)
+
+    relleno_blancos(dataframe, ["fecha_reserva", "nombre_hotel", "ciudad"])
+    return dataframe
+
+def calculo_agregados_lotes(archivo_entrada, tamano_lote, columnas=None, filtros=None, clave_duplicados=CLAVE_DUPLICADOS, 
+                            directorio_claves=None):
+    """
+    Primera pasada sobre el archivo de reservas: calcula los valores globales que necesita la transformación 
+    de cada lote, leyendo el archivo por lotes.
+
+    Args:
+        archivo_entrada (str): Ruta al archivo Parquet de reservas o a una carpeta de archivos Parquet.
+        tamano_lote (int): El número máximo de filas de cada lote.
+        columnas (list, optional): Las columnas a leer. Por defecto se leen todas.
+        filtros (list o pyarrow.compute.Expression, optional): Los filtros de filas. Por defecto es None.
+        clave_duplicados (list, optional): Las columnas que identifican una fila repetida. Por defecto es 
+                                           `CLAVE_DUPLICADOS`.
+        directorio_claves (str, optional): Directorio de los id de clientes guardados (ver `src/soporte_claves.py`). 
+                                           Por defecto es None.
+
+    Returns:
+        dict: Un diccionario con las claves:
+            - "media_estrellas" (pd.Series): La media de estrellas de cada hotel, redondeada a un decimal.
+            - "media_precios" (dict): La media del precio por noche de cada hotel.
+            - "fechas_estancia" (dict): El primer valor no nulo de 'inicio_estancia' y 'final_estancia'.
+            - "id_clientes" (pd.Series): El id de cada mail: el guardado si el cliente ya tenía id, o el siguiente 
+                                         por orden de aparición (ver `asignacion_claves`).
+            - "id_hoteles_competencia" (list): Los id de los hoteles de la competencia por orden de aparición.
+    """
+    sumas_estrellas, sumas_precios = None, None
+    fechas_estancia = {}
+    claves_clientes = claves_vacias() if directorio_claves is None else lectura_claves("clientes", directorio_claves)
+    id_hoteles_competencia = {}
+    vistos = []
+
+    for lote in lectura_lotes_parquet(archivo_entrada, tamano_lote, columnas, filtros):
+        lote = preparacion_lote(lote, vistos, clave_duplicados)
+
+        # sumas y conteos parciales por hotel para calcular las medias globales
+        estrellas = lote.groupby("nombre_hotel")["estrellas"].agg(["sum", "count"])
+        precios = lote.groupby("nombre_hotel")["precio_noche"].agg(["sum", "count"])
+        sumas_estrellas = estrellas if sumas_estrellas is None else sumas_estrellas.add(estrellas, fill_value=0)
+        sumas_precios = precios if sumas_precios is None else sumas_precios.add(precios, fill_value=0)
+
+        for col in ["inicio_estancia", "final_estancia"]:
+            no_nulos = lote[col].dropna()
+            if col not in fechas_estancia and not no_nulos.empty:
+                fechas_estancia[col] = no_nulos.iloc[0]
+
+        claves_clientes = asignacion_claves(lote["mail"], claves_clientes)[1]
+
+        id_hoteles_competencia.update(dict.fromkeys(lote[lote["competencia"] == True]["id_hotel"].unique().tolist()))
+
+    if directorio_claves is not None:
+        guardar_claves("clientes", directorio_claves, claves_clientes)
+
+    return {
+        "media_estrellas": (sumas_estrellas["sum"] / sumas_estrellas["count"]).round(1),
+        "media_precios": (sumas_precios["sum"] / sumas_precios["count"]).to_dict(),
+        "fechas_estancia": fechas_estancia,
+        "id_clientes": claves_clientes,
+        "id_hoteles_competencia": list(id_hoteles_competencia),
+    }
+
+def calculo_agregados(dataframe, directorio_claves=None):
+    """
+    Calcula sobre un DataFrame completo ya preparado (fechas convertidas, sin duplicados y con los blancos como NaN) 
+    los mismos valores globales que `calculo_agregados_lotes`, para aplicarlos después por partes con 
+    `transformacion_lote`.
+
+    Args:
+        dataframe (pd.DataFrame): El DataFrame de reservas preparado.
+        directorio_claves (str, optional): Directorio de los id de clientes guardados (ver `src/soporte_claves.py`). 
+                                           Por defecto es None.
+
+    Returns:
+        dict: Un diccionario con las mismas claves que `calculo_agregados_lotes`.
+    """
+    medias = dataframe.groupby("nombre_hotel")[["estrellas", "precio_noche"]].mean()
+    return {
+        "media_estrellas": medias["estrellas"].round(1),
+        "media_precios": medias["precio_noche"].to_dict(),
+        "fechas_estancia": {col: dataframe[col].dropna().iloc[0] for col in ["inicio_estancia", "final_estancia"] 
+                            if dataframe[col].notna().any()},
+        "id_clientes": claves_persistentes(dataframe["mail"], "clientes", directorio_claves)[1],
+        "id_hoteles_competencia": dataframe[dataframe["competencia"] == True]["id_hotel"].unique().tolist(),
+    }
+
+
+def particiones_hoteles(dataframe, num_particiones):
+    """
+    Reparte las filas de un DataFrame en particiones por 'id_hotel', de forma que todas las reservas de un hotel 
+    están en la misma partición y las particiones tienen un número de filas parecido (los hoteles se asignan de mayor 
+    a menor a la partición con menos filas). Dentro de cada partición se conserva el orden original de las filas.
+    Las filas sin 'id_hotel' forman su propio grupo.
+
+    Args:
+        dataframe (pd.DataFrame): El DataFrame de reservas.
+        num_particiones (int): El número máximo de particiones.
+
+    Returns:
+        list: Una lista de DataFrames, uno por partición no vacía.
+    """
+    grupos = sorted(dataframe.groupby("id_hotel", sort=False, dropna=False).indices.values(), key=len, reverse=True)
+    particiones = [[] for _ in range(min(num_particiones, len(grupos)))]
+    filas = [0] * len(particiones)
+    for posiciones in grupos:
+        menor = filas.index(min(filas))
+        particiones[menor].append(posiciones)
+        filas[menor] += len(posiciones)
+    return [dataframe.iloc[np.sort(np.concatenate(particion))] for particion in particiones if particion]
+
+
+def transformacion_lote(dataframe, agregados, df_hoteles_competencia):
+    """
+    Aplica a un lote ya preparado (ver `preparacion_lote`) el resto de la limpieza y transformación, 
+    usando los valores globales calculados en `calculo_agregados_lotes`.
+
+    Args:
+        dataframe (pd.DataFrame): El lote preparado.
+        agregados (dict): Los valores globales devueltos por `calculo_agregados_lotes`.
+        df_hoteles_competencia (pd.DataFrame): DataFrame con los datos de los hoteles de la competencia.
+
+    Returns:
+        pd.DataFrame: El lote transformado.
+    """
+    dataframe["ciudad"] = dataframe["ciudad"].fillna("Madrid")
+    nulos_fechas_estancia(dataframe, ["inicio_estancia", "final_estancia"], agregados["fechas_estancia"])
+    dataframe["estrellas"] = dataframe["nombre_hotel"].map(agregados["media_estrellas"])
+
+    asignar_id_clientes_por_mail(dataframe, agregados["id_clientes"])
+    relleno_nulos_precio_propios(dataframe, agregados["media_precios"])
+
+    dicc_id = creacion_diccionarios(agregados["id_hoteles_competencia"], lista_columnas_df(df_hoteles_competencia, "nombre_hotel"))
+    dicc_precios = creacion_diccionarios(lista_columnas_df(df_hoteles_competencia, "nombre_hotel"), lista_columnas_df(df_hoteles_competencia, "precio_noche"))
+    dicc_fechas = creacion_diccionarios(lista_columnas_df(df_hoteles_competencia, "nombre_hotel"), lista_columnas_df(df_hoteles_competencia, "fecha_reserva"))
+    rellenar_nulos_mapeos(dataframe, [(dicc_id, "nombre_hotel", "id_hotel"), 
+                                      (dicc_precios, "precio_noche", "nombre_hotel"), 
+                                      (dicc_fechas, "fecha_reserva", "nombre_hotel")])
+    return dataframe
+
+def tipos_finales_partes(partes, tipos=None):
+    """
+    Decide el tipo final de cada columna de un resultado guardado en varios archivos Parquet (uno por lote), igual 
+    que si el resultado estuviera entero en memoria: cada columna se lee completa, de una en una, se unen sus partes 
+    como haría `pd.concat` y se convierte con `optimizacion_tipos`.
+
+    Args:
+        partes (list): Las rutas de los archivos Parquet, con las mismas columnas.
+        tipos (dict, optional): El plan de tipos (ver `optimizacion_tipos`). Por defecto es `TIPOS_COLUMNAS`.
+
+    Returns:
+        dict: Un diccionario columna -> tipo de datos de pandas, listo para `DataFrame.astype`.
+    """
+    tipos_finales = {}
+    for columna in pq.read_schema(partes[0]).names:
+        serie = pd.concat([pq.read_table(parte, columns=[columna]).to_pandas()[columna] for parte in partes], ignore_index=True)
+        tipos_finales[columna] = optimizacion_tipos(serie.to_frame(), tipos)[columna].dtype
+    return tipos_finales
+
+def limpieza_transformacion_por_lotes(archivo_entrada, df_hoteles_competencia, archivo_salida, tamano_lote=100000, 
+                                      columnas=COLUMNAS_ENTRADA, filtros=None, clave_duplicados=CLAVE_DUPLICADOS, 
+                                      informe_duplicados=None, directorio_claves=None, politica_salida=POLITICA_SALIDA_POR_DEFECTO):
+    """
+    Versión por lotes de `limpieza_transformacion` para archivos que no caben en memoria. Produce el mismo resultado, 
+    con los mismos tipos de datos, pero lee el archivo Parquet de entrada lote a lote:
+        1. Calcula los valores globales (media de estrellas y de precio por hotel, primeras fechas de estancia no nulas, 
+           id de cada mail e id de los hoteles de la competencia) con `calculo_agregados_lotes`.
+        2. Prepara y transforma cada lote con esos valores y lo guarda en un archivo temporal.
+        3. Decide el tipo final de cada columna con el plan de `TIPOS_COLUMNAS`, como `optimizacion_tipos` sobre el 
+           resultado completo (ver `tipos_finales_partes`), y escribe los lotes convertidos en el archivo de salida. 
+           Así todos los grupos de filas tienen el mismo esquema, aunque una columna sea nula o entera en algún lote.
+
+    La memoria utilizada depende del tamaño del lote y no del tamaño del archivo, salvo el mapeo de clientes, 
+    los hashes de las filas ya vistas (8 bytes por fila, ver `filtrado_hashes_vistos`) que se usan para eliminar 
+    duplicados entre lotes y una columna del resultado a la vez en el paso 3.
+
+    Los lotes se escriben en una carpeta temporal junto al archivo de salida, y el archivo de salida en un temporal 
+    que se renombra al terminar, así que una ejecución interrumpida no deja un archivo de salida a medias. Si el archivo de salida ya existe se aplica `politica_salida` (ver 
+    `resolucion_ruta_salida`); con "omitir" no se procesa nada.
+
+    Args:
+        archivo_entrada (str): Ruta al archivo de entrada en formato Parquet que contiene los datos de reservas, 
+                               o a una carpeta de archivos Parquet (ver `dataset_parquet`).
+        df_hoteles_competencia (pd.DataFrame): DataFrame con los datos de los hoteles de la competencia.
+        archivo_salida (str): Ruta al archivo donde se guardará el resultado (en formato Parquet).
+        tamano_lote (int, optional): El número máximo de filas de cada lote. Por defecto es 100000.
+        columnas (list, optional): Las columnas del archivo de entrada que se leen. Por defecto es `COLUMNAS_ENTRADA`; 
+                                   None lee todas.
+        filtros (list o pyarrow.compute.Expression, optional): Los filtros de filas que se aplican al leer el archivo 
+                                   de entrada (ver `dataset_parquet`). Por defecto es None.
+        clave_duplicados (list, optional): Las columnas que identifican una reserva repetida, por ejemplo 
+                                           `["id_reserva"]`. Por defecto es `CLAVE_DUPLICADOS` (filas completas).
+        informe_duplicados (dict, optional): Un diccionario que se rellena in-place con las filas leídas y los 
+                                             duplicados eliminados de cada archivo de entrada. Por defecto es None.
+        directorio_claves (str, optional): Directorio donde se guardan los id de los clientes, para que los clientes de 
+                                           ejecuciones anteriores conserven su id. Por defecto es None.
+        politica_salida (str, optional): Qué hacer si el archivo de salida ya existe (ver `POLITICAS_SALIDA`). 
+                                         Por defecto es `POLITICA_SALIDA_POR_DEFECTO`.
+
+    Returns:
+        str: La ruta del archivo de salida (la de la nueva versión con la política "version").
+
+    Raises:
+        FileNotFoundError: Si el archivo de entrada no se encuentra en la ruta especificada.
+        ValueError: Si el DataFrame de hoteles de la competencia está vacío o si hay un error en la lectura del archivo de entrada.
+        KeyError: Si alguna de las columnas necesarias no está presente en el archivo.
+        FileExistsError: Si el archivo de salida ya existe y la política es "error" (o "preguntar" y no se confirma 
+                         su sobrescritura).
+        RuntimeError: Si ocurre un error durante el proceso de transformación y limpieza de datos.
+    """
+    # comprueba si el archivo de entrada existe
+    if not os.path.exists(archivo_entrada):
+        raise FileNotFoundError(f"El archivo de entrada {archivo_entrada} no se encuentra.")
+
+    # comprueba que el DataFrame de competencia no este vacio
+    if df_hoteles_competencia.empty:
+        raise ValueError("El DataFrame de hoteles de la competencia está vacío.")
+
+    # lee solo el esquema del archivo de entrada
+    try:
+        columnas_archivo = dataset_parquet(archivo_entrada)[0].schema.names
+    except Exception as e:
+        raise ValueError(f"Error al leer el archivo de entrada: {e}")
+
+    # verifica que las columnas necesarias estan presentes en el archivo
+    for col in COLUMNAS_REQUERIDAS:
+        if col not in columnas_archivo:
+            raise KeyError(f"La columna '{col}' no está presente en el DataFrame.")
+
+    # decide donde se escribe el resultado antes de leer nada (con "omitir" se conserva el archivo existente)
+    ruta_salida = resolucion_ruta_salida(archivo_salida, politica_salida)
+    if ruta_salida is None:
+        return archivo_salida
+
+    try:
+        # primera pasada: valores globales
+        agregados = calculo_agregados_lotes(archivo_entrada, tamano_lote, columnas, filtros, clave_duplicados, directorio_claves)
+
+        # segunda pasada: transformacion de cada lote, que se guarda con sus propios tipos en la carpeta temporal
+        carpeta_partes = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(ruta_salida)), suffix=".tmp")
+        temporal = f"{ruta_salida}.{os.getpid()}.tmp"
+        escritor = None
+        try:
+            partes = []
+            vistos = []
+            for fuente, lote in lectura_lotes_fuentes_parquet(archivo_entrada, tamano_lote, columnas, filtros):
+                lote = preparacion_lote(lote, vistos, clave_duplicados, fuente, informe_duplicados)
+                lote = transformacion_lote(lote, agregados, df_hoteles_competencia)
+                if lote.empty:
+                    continue
+                partes.append(os.path.join(carpeta_partes, f"{len(partes)}.parquet"))
+                lote.to_parquet(partes[-1], index=False)
+
+            # tipos del resultado completo y escritura de los lotes convertidos con un unico esquema
+            if partes:
+                tipos_finales = tipos_finales_partes(partes)
+                for parte in partes:
+                    lote = pq.read_table(parte).to_pandas().astype(tipos_finales)
+                    if escritor is None:
+                        tabla = pa.Table.from_pandas(lote, preserve_index=False)
+                        escritor = pq.ParquetWriter(temporal, tabla.schema)
+                    else:
+                        tabla = pa.Table.from_pandas(lote, schema=escritor.schema, preserve_index=False)
+                    escritor.write_table(tabla)
+        except BaseException:
+            if escritor is not None:
+                escritor.close()
+                os.remove(temporal)
+            raise
+        finally:
+            shutil.rmtree(carpeta_partes, ignore_errors=True)
+        if escritor is not None:
+            escritor.close()
+            os.replace(temporal, ruta_salida)
 
-        df.to_pickle(archivo_salida)
-    
     except Exception as e:
         raise RuntimeError(f"Error durante la transformación y limpieza de datos: {e}")
 
-    return df
+    return ruta_salida
+
+
+instrumentar_modulo(globals())
@@ -0,0 +1,519 @@
+import cProfile
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    from pyinstrument import Profiler
+except ImportError:
+    Profiler = None
+
+# perfiladores que se pueden activar con `iniciar_metricas`
+PERFILADORES = ("cprofile", "pyinstrument")
+# configuracion de la medicion en curso (ver `iniciar_metricas`)
+ESTADO_METRICAS = {"activo": False, "inicio": None, "perfil": None, "memoria": False, "directorio_perfiles": None}
+# metricas acumuladas de cada funcion: (modulo, nombre) -> diccionario de metricas
+METRICAS_ETAPAS = {}
+# rutas de los perfiles guardados durante la medicion
+PERFILES_GUARDADOS = []
+LOCK_METRICAS = threading.Lock()
+# pila de las funciones medidas en curso en cada hilo
+PILA_HILO = threading.local()
+# prefijo de las metricas en formato Prometheus
+PREFIJO_PROMETHEUS = "etl"
+
+def iniciar_metricas(perfil=None, memoria=False, directorio_perfiles=None):
+    """
+    Activa la medición de las funciones instrumentadas (ver `instrumentar_modulo`) y vacía las métricas anteriores.
+
+    Mientras está activa, cada llamada a una función instrumentada acumula su tiempo, las filas de entrada y de salida y
+    la memoria máxima. Si no está activa, las funciones instrumentadas se ejecutan sin medir nada.
+
+    Args:
+        perfil (str, optional): "cprofile" o "pyinstrument" (ver `PERFILADORES`) para guardar además un perfil de
+                                cada etapa de primer nivel de cada hilo (ver `medir_etapa`). Por defecto es None.
+        memoria (bool, optional): Si es True, mide la memoria máxima de cada etapa con `tracemalloc`, que ralentiza
+                                  la ejecución. Por defecto es False (solo se registra el pico de memoria del proceso).
+        directorio_perfiles (str, optional): La carpeta donde se guardan los perfiles. Por defecto es "perfiles".
+
+    Returns:
+        None: La función activa la medición.
+
+    Raises:
+        ValueError: Si el perfilador no es válido.
+        ImportError: Si se elige pyinstrument y no está instalado.
+    """
+    if perfil is not None and perfil not in PERFILADORES:
+        raise ValueError(f"Perfilador no válido: {perfil}. Debe ser uno de {list(PERFILADORES)}.")
+    if perfil == "pyinstrument" and Profiler is None:
+        raise ImportError("El perfilador pyinstrument no está instalado (pip install pyinstrument).")
+
+    with LOCK_METRICAS:
+        METRICAS_ETAPAS.clear()
+        PERFILES_GUARDADOS.clear()
+        ESTADO_METRICAS.update(activo=True, inicio=time.time(), perfil=perfil, memoria=memoria,
+                               directorio_perfiles=directorio_perfiles or "perfiles")
+    if memoria and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def finalizar_metricas(archivo_json=None, archivo_prometheus=None):
+    """
+    Desactiva la medición y devuelve el informe de la ejecución, guardándolo si se indican los archivos.
+
+    Args:
+        archivo_json (str, optional): La ruta del informe en formato JSON (ver `guardar_informe_json`).
+                                      Por defecto es None.
+        archivo_prometheus (str, optional): La ruta del informe en formato de texto de Prometheus
+                                            (ver `guardar_informe_prometheus`). Por defecto es None.
+
+    Returns:
+        dict: El informe de la ejecución (ver `informe_metricas`).
+    """
+    informe = informe_metricas()
+    with LOCK_METRICAS:
+        ESTADO_METRICAS["activo"] = False
+    if ESTADO_METRICAS["memoria"] and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+    if archivo_json is not None:
+        guardar_informe_json(informe, archivo_json)
+    if archivo_prometheus is not None:
+        guardar_informe_prometheus(informe, archivo_prometheus)
+    return informe
+
+
+def rss_pico():
+    """
+    Devuelve el pico de memoria residente del proceso desde que empezó.
+
+    Returns:
+        int: El pico de memoria en bytes, o None si el sistema no lo permite (el módulo `resource` no existe en Windows).
+    """
+    if resource is None:
+        return None
+    # en Linux ru_maxrss esta en KB y en macOS en bytes
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maximo if sys.platform == "darwin" else maximo * 1024
+
+
+def filas(valor):
+    """
+    Cuenta las filas de una entrada o un resultado de una función.
+
+    Args:
+        valor: Un DataFrame, Series, array o tabla de Arrow (su longitud), un diccionario de listas de la misma longitud
+               (como los que devuelve el scraping), o una tupla o lista de los anteriores (la suma de sus filas).
+
+    Returns:
+        int: El número de filas, o None si el valor no tiene filas.
+    """
+    if hasattr(valor, "shape") and len(getattr(valor, "shape", ())) >= 1:
+        return int(valor.shape[0])
+    if hasattr(valor, "num_rows"):
+        return int(valor.num_rows)
+    if isinstance(valor, dict) and valor:
+        longitudes = {len(v) if isinstance(v, (list, tuple)) else None for v in valor.values()}
+        return longitudes.pop() if len(longitudes) == 1 and None not in longitudes else None
+    if isinstance(valor, (tuple, list)) and not isinstance(valor, str):
+        conteos = [filas(v) for v in valor if not isinstance(v, (str, bytes, dict))]
+        conteos = [c for c in conteos if c is not None]
+        return sum(conteos) if conteos else None
+    return None
+
+
+def filas_argumentos(args, kwargs):
+    """
+    Cuenta las filas de entrada de una llamada: las del primer argumento que tenga filas (ver `filas`).
+
+    Returns:
+        int: El número de filas, o None si ningún argumento tiene filas.
+    """
+    for valor in list(args) + list(kwargs.values()):
+        if hasattr(valor, "shape") or hasattr(valor, "num_rows"):
+            return filas(valor)
+    return None
+
+
+def inicio_perfil(nombre):
+    """
+    Empieza el perfil de una etapa con el perfilador configurado.
+
+    Returns:
+        El perfilador en marcha, o None si no hay perfilador o no se puede activar (con Python 3.12 o superior,
+        cProfile no admite dos perfiles a la vez, así que solo se perfila la primera de las etapas simultáneas).
+    """
+    try:
+        if ESTADO_METRICAS["perfil"] == "cprofile":
+            perfil = cProfile.Profile()
+            perfil.enable()
+            return perfil
+        if ESTADO_METRICAS["perfil"] == "pyinstrument":
+            perfil = Profiler()
+            perfil.start()
+            return perfil
+    except (ValueError, RuntimeError):
+        return None
+    return None
+
+
+def fin_perfil(perfil, nombre):
+    """
+    Para el perfil de una etapa y lo guarda en el directorio de perfiles: "<etapa>-<n>.prof" con cProfile (se puede
+    abrir con `pstats` o snakeviz) o "<etapa>-<n>.html" con pyinstrument.
+
+    Returns:
+        None: La función guarda el perfil.
+    """
+    if isinstance(perfil, cProfile.Profile):
+        perfil.disable()
+    else:
+        perfil.stop()
+
+    directorio = ESTADO_METRICAS["directorio_perfiles"]
+    os.makedirs(directorio, exist_ok=True)
+    extension = "prof" if isinstance(perfil, cProfile.Profile) else "html"
+    with LOCK_METRICAS:
+        numero = sum(os.path.basename(ruta).startswith(f"{nombre}-") for ruta in PERFILES_GUARDADOS) + 1
+        ruta = os.path.join(directorio, f"{nombre}-{numero}.{extension}")
+        PERFILES_GUARDADOS.append(ruta)
+
+    if isinstance(perfil, cProfile.Profile):
+        perfil.dump_stats(ruta)
+    else:
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write(perfil.output_html())
+
+
+def registro_metricas(modulo, nombre, segundos, segundos_hijos, segundos_cpu, filas_entrada, filas_salida, memoria_pico, error):
+    """
+    Acumula en `METRICAS_ETAPAS` las métricas de una llamada a una función.
+
+    Returns:
+        None: La función actualiza las métricas de la función.
+    """
+    with LOCK_METRICAS:
+        metricas = METRICAS_ETAPAS.setdefault((modulo, nombre), {
+            "etapa": nombre, "modulo": modulo, "llamadas": 0, "errores": 0, "ultimo_error": None, "segundos": 0.0,
+            "segundos_propios": 0.0, "segundos_max": 0.0, "segundos_cpu": 0.0, "filas_entrada": None, "filas_salida": None,
+            "memoria_pico_bytes": None, "rss_pico_bytes": None})
+        metricas["llamadas"] += 1
+        metricas["segundos"] += segundos
+        metricas["segundos_propios"] += max(segundos - segundos_hijos, 0.0)
+        metricas["segundos_max"] = max(metricas["segundos_max"], segundos)
+        metricas["segundos_cpu"] += segundos_cpu
+        if filas_entrada is not None:
+            metricas["filas_entrada"] = (metricas["filas_entrada"] or 0) + filas_entrada
+        if filas_salida is not None:
+            metricas["filas_salida"] = (metricas["filas_salida"] or 0) + filas_salida
+        if memoria_pico is not None:
+            metricas["memoria_pico_bytes"] = max(metricas["memoria_pico_bytes"] or 0, memoria_pico)
+        metricas["rss_pico_bytes"] = rss_pico()
+        if error is not None:
+            metricas["errores"] += 1
+            metricas["ultimo_error"] = f"{type(error).__name__}: {error}"
+
+
+def inicio_medicion(modulo, nombre, filas_entrada, perfil=False):
+    """
+    Empieza a medir una llamada a una función instrumentada. La pila de llamadas medidas de cada hilo permite separar
+    el tiempo propio de cada función del de las funciones instrumentadas a las que llama, y repartir el pico de memoria
+    de `tracemalloc` entre ellas.
+
+    Args:
+        modulo (str): El módulo de la función.
+        nombre (str): El nombre de la función.
+        filas_entrada (int): Las filas de entrada de la llamada (ver `filas_argumentos`).
+        perfil (bool, optional): Si es True y la llamada es la primera de la pila de su hilo, se perfila con el
+                                 perfilador configurado. Por defecto es False.
+
+    Returns:
+        dict: El estado de la medición de la llamada.
+    """
+    pila = getattr(PILA_HILO, "pila", None)
+    if pila is None:
+        pila = PILA_HILO.pila = []
+    medicion = {"modulo": modulo, "nombre": nombre, "filas_entrada": filas_entrada, "filas_salida": None,
+                "segundos": 0.0, "segundos_hijos": 0.0, "segundos_cpu": 0.0, "memoria_pico": None, "perfil": None}
+    if perfil and not pila and ESTADO_METRICAS["perfil"] is not None:
+        medicion["perfil"] = inicio_perfil(nombre)
+    reanudacion_medicion(medicion)
+    return medicion
+
+
+def reanudacion_medicion(medicion):
+    """
+    Pone una medición en la cima de la pila de su hilo y empieza a contar su tiempo (al empezar la llamada y, en las
+    funciones generadoras, cada vez que se pide un valor).
+
+    Returns:
+        None: La función actualiza la pila del hilo.
+    """
+    pila = PILA_HILO.pila
+    if ESTADO_METRICAS["memoria"] and tracemalloc.is_tracing():
+        # el pico de la funcion que llama se guarda antes de reiniciarlo para esta
+        if pila:
+            pila[-1]["memoria_pico"] = max(pila[-1]["memoria_pico"] or 0, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    pila.append(medicion)
+    medicion["inicio"] = time.perf_counter()
+    medicion["inicio_cpu"] = time.thread_time()
+
+
+def pausa_medicion(medicion):
+    """
+    Quita una medición de la pila de su hilo y suma su tiempo, que también se descuenta del tiempo propio de la
+    función que la ha llamado.
+
+    Returns:
+        None: La función actualiza la medición y la pila del hilo.
+    """
+    segundos = time.perf_counter() - medicion["inicio"]
+    medicion["segundos"] += segundos
+    medicion["segundos_cpu"] += time.thread_time() - medicion["inicio_cpu"]
+    pila = PILA_HILO.pila
+    pila.pop()
+    if ESTADO_METRICAS["memoria"] and tracemalloc.is_tracing():
+        medicion["memoria_pico"] = max(medicion["memoria_pico"] or 0, tracemalloc.get_traced_memory()[1])
+        if pila:
+            pila[-1]["memoria_pico"] = max(pila[-1]["memoria_pico"] or 0, medicion["memoria_pico"])
+    if pila:
+        pila[-1]["segundos_hijos"] += segundos
+
+
+def fin_medicion(medicion, error=None):
+    """
+    Termina la medición de una llamada: guarda su perfil, si lo tiene, y acumula sus métricas.
+
+    Returns:
+        None: La función actualiza las métricas de la función.
+    """
+    if medicion["perfil"] is not None:
+        fin_perfil(medicion["perfil"], medicion["nombre"])
+    registro_metricas(medicion["modulo"], medicion["nombre"], medicion["segundos"], medicion["segundos_hijos"],
+                      medicion["segundos_cpu"], medicion["filas_entrada"], medicion["filas_salida"], medicion["memoria_pico"], error)
+
+
+def medir_etapa(funcion):
+    """
+    Decorador que mide cada llamada a una función mientras la medición está activa (ver `iniciar_metricas`): tiempo
+    total y propio, filas de entrada (las del primer argumento con filas) y de salida (las del resultado), memoria
+    máxima y errores. En las funciones generadoras, se mide el tiempo dentro de la función (no el de quien consume
+    los valores) y las filas de los valores generados (cada valor sin filas cuenta como una), y la llamada se registra
+    al terminar el generador, al fallar o al cerrarlo sin consumir todos sus valores.
+
+    Las llamadas que se ejecutan en otros procesos (por ejemplo, con `num_procesos` mayor que 1 en
+    `limpieza_transformacion`) no se miden por separado: su tiempo cuenta en la función que las lanza.
+
+    Args:
+        funcion (callable): La función.
+
+    Returns:
+        callable: La función instrumentada.
+    """
+    modulo = funcion.__module__
+    nombre = funcion.__name__
+
+    if inspect.isgeneratorfunction(funcion):
+        @functools.wraps(funcion)
+        def generador_medido(*args, **kwargs):
+            if not ESTADO_METRICAS["activo"]:
+                yield from funcion(*args, **kwargs)
+                return
+            medicion = inicio_medicion(modulo, nombre, filas_argumentos(args, kwargs))
+            medicion["filas_salida"] = 0
+            generador = funcion(*args, **kwargs)
+            error = None
+            try:
+                while True:
+                    try:
+                        valor = next(generador)
+                    except StopIteration:
+                        break
+                    finally:
+                        pausa_medicion(medicion)
+                    conteo = filas(valor)
+                    medicion["filas_salida"] += 1 if conteo is None else conteo
+                    yield valor
+                    reanudacion_medicion(medicion)
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                # tambien si quien consume los valores deja el generador a medias (close() o GeneratorExit)
+                generador.close()
+                fin_medicion(medicion, error)
+        return generador_medido
+
+    @functools.wraps(funcion)
+    def funcion_medida(*args, **kwargs):
+        if not ESTADO_METRICAS["activo"]:
+            return funcion(*args, **kwargs)
+        medicion = inicio_medicion(modulo, nombre, filas_argumentos(args, kwargs), perfil=True)
+        try:
+            resultado = funcion(*args, **kwargs)
+        except Exception as e:
+            pausa_medicion(medicion)
+            fin_medicion(medicion, e)
+            raise
+        pausa_medicion(medicion)
+        medicion["filas_salida"] = filas(resultado)
+        fin_medicion(medicion)
+        return resultado
+    return funcion_medida
+
+
+def instrumentar_modulo(espacio_nombres):
+    """
+    Aplica `medir_etapa` a todas las funciones definidas en un módulo. Se llama al final del módulo con `globals()`,
+    de forma que las llamadas entre funciones del propio módulo y las de los módulos que las importan pasan por
+    las funciones instrumentadas. Cada módulo de `src/` salvo este (y `main.py`) termina con esta llamada; mientras
+    la medición no está activa, las funciones instrumentadas llaman directamente a las originales.
+
+    Args:
+        espacio_nombres (dict): Las variables globales del módulo (`globals()`).
+
+    Returns:
+        None: La función sustituye las funciones del módulo por sus versiones instrumentadas.
+    """
+    modulo = espacio_nombres["__name__"]
+    for nombre, valor in list(espacio_nombres.items()):
+        if inspect.isfunction(valor) and valor.__module__ == modulo and not nombre.startswith("_"):
+            espacio_nombres[nombre] = medir_etapa(valor)
+
+
+def informe_metricas():
+    """
+    Devuelve el informe de las métricas acumuladas desde `iniciar_metricas`, con las etapas ordenadas de mayor a
+    menor tiempo total.
+
+    El tiempo propio de una etapa es su tiempo sin el de las funciones instrumentadas a las que llama en el mismo hilo, 
+    e incluye las esperas (red, base de datos o etapas de otros hilos); el tiempo de CPU del hilo no las incluye, así 
+    que una etapa con mucho más tiempo total que de CPU está esperando.
+
+    Returns:
+        dict: El inicio y la duración de la ejecución, el pico de memoria del proceso, los perfiles guardados y las
+              métricas de cada etapa: llamadas, errores, segundos (total, propios, máximo de una llamada y de CPU),
+              filas de entrada y de salida, filas por segundo y picos de memoria.
+    """
+    with LOCK_METRICAS:
+        inicio = ESTADO_METRICAS["inicio"]
+        etapas = [dict(metricas) for metricas in METRICAS_ETAPAS.values()]
+        perfiles = list(PERFILES_GUARDADOS)
+
+    for metricas in etapas:
+        filas_etapa = max(metricas["filas_entrada"] or 0, metricas["filas_salida"] or 0)
+        metricas["filas_por_segundo"] = round(filas_etapa / metricas["segundos"], 1) if filas_etapa and metricas["segundos"] > 0 else None
+        for clave in ("segundos", "segundos_propios", "segundos_max", "segundos_cpu"):
+            metricas[clave] = round(metricas[clave], 6)
+    etapas.sort(key=lambda metricas: metricas["segundos"], reverse=True)
+
+    return {
+        "inicio": datetime.fromtimestamp(inicio).isoformat() if inicio else None,
+        "duracion_segundos": round(time.time() - inicio, 6) if inicio else None,
+        "rss_pico_bytes": rss_pico(),
+        "perfil": ESTADO_METRICAS["perfil"],
+        "perfiles": perfiles,
+        "etapas": etapas,
+    }
+
+
+def guardar_informe_json(informe, ruta):
+    """
+    Guarda el informe de una ejecución en formato JSON.
+
+    Args:
+        informe (dict): El informe (ver `informe_metricas`).
+        ruta (str): La ruta del archivo.
+
+    Returns:
+        None: La función escribe el archivo.
+    """
+    # se importa aqui porque soporte_almacenamiento importa este modulo
+    from src.soporte_almacenamiento import escritura_atomica
+    escritura_atomica(ruta, json.dumps(informe, ensure_ascii=False, indent=2))
+
+
+def etiqueta_prometheus(valor):
+    """
+    Escapa el valor de una etiqueta de Prometheus.
+
+    Returns:
+        str: El valor escapado.
+    """
+    return str(valor).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def texto_prometheus(informe):
+    """
+    Convierte el informe de una ejecución al formato de texto de Prometheus, con una métrica por cada medida y una
+    serie por etapa (etiquetas `modulo` y `etapa`).
+
+    Args:
+        informe (dict): El informe (ver `informe_metricas`).
+
+    Returns:
+        str: El texto de las métricas.
+    """
+    lineas = []
+
+    def metrica(nombre, ayuda, muestras):
+        muestras = [(etiquetas, valor) for etiquetas, valor in muestras if valor is not None]
+        if not muestras:
+            return
+        nombre = f"{PREFIJO_PROMETHEUS}_{nombre}"
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} gauge")
+        for etiquetas, valor in muestras:
+            texto_etiquetas = ",".join(f'{clave}="{etiqueta_prometheus(v)}"' for clave, v in etiquetas.items())
+            lineas.append(f"{nombre}{{{texto_etiquetas}}} {valor}" if texto_etiquetas else f"{nombre} {valor}")
+
+    metrica("ejecucion_duracion_segundos", "Duracion de la ejecucion.", [({}, informe["duracion_segundos"])])
+    metrica("ejecucion_rss_pico_bytes", "Pico de memoria residente del proceso.", [({}, informe["rss_pico_bytes"])])
+
+    medidas = [
+        ("llamadas", "etapa_llamadas", "Numero de llamadas de la etapa."),
+        ("errores", "etapa_errores", "Numero de llamadas de la etapa que han fallado."),
+        ("segundos", "etapa_duracion_segundos", "Tiempo total de la etapa, incluidas las etapas a las que llama."),
+        ("segundos_propios", "etapa_duracion_propia_segundos", "Tiempo de la etapa sin el de las etapas a las que llama."),
+        ("segundos_max", "etapa_duracion_max_segundos", "Tiempo de la llamada mas lenta de la etapa."),
+        ("segundos_cpu", "etapa_cpu_segundos", "Tiempo de CPU del hilo de la etapa, incluidas las etapas a las que llama."),
+        ("filas_entrada", "etapa_filas_entrada", "Filas de entrada de la etapa."),
+        ("filas_salida", "etapa_filas_salida", "Filas de salida de la etapa."),
+        ("filas_por_segundo", "etapa_filas_por_segundo", "Filas procesadas por segundo en la etapa."),
+        ("memoria_pico_bytes", "etapa_memoria_pico_bytes", "Pico de memoria reservada durante la etapa (tracemalloc)."),
+        ("rss_pico_bytes", "etapa_rss_pico_bytes", "Pico de memoria residente del proceso al terminar la etapa."),
+    ]
+    for clave, nombre, ayuda in medidas:
+        metrica(nombre, ayuda, [({"modulo": etapa["modulo"], "etapa": etapa["etapa"]}, etapa[clave])
+                                for etapa in informe["etapas"]])
+
+    return "\n".join(lineas) + "\n"
+
+
+def guardar_informe_prometheus(informe, ruta):
+    """
+    Guarda el informe de una ejecución en formato de texto de Prometheus, por ejemplo en la carpeta del
+    "textfile collector" de node_exporter (con extensión ".prom").
+
+    Args:
+        informe (dict): El informe (ver `informe_metricas`).
+        ruta (str): La ruta del archivo.
+
+    Returns:
+        None: La función escribe el archivo.
+    """
+    # se importa aqui porque soporte_almacenamiento importa este modulo
+    from src.soporte_almacenamiento import escritura_atomica
+    escritura_atomica(ruta, texto_prometheus(informe))
@@ -0,0 +1,74 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from src.soporte_metricas import instrumentar_modulo
+
+def ejecutar_grafo_tareas(tareas, dependencias, max_hilos=4):
+    """
+    Ejecuta un conjunto de tareas en paralelo respetando las dependencias entre ellas: cada tarea se lanza en cuanto
+    han terminado todas las tareas de las que depende, de forma que las tareas independientes se ejecutan a la vez
+    y el tiempo total se aproxima al de la cadena de dependencias más larga.
+
+    Cada tarea recibe como único argumento el diccionario con los resultados de las tareas ya terminadas,
+    por lo que puede usar los resultados de sus dependencias.
+
+    Args:
+        tareas (dict): Un diccionario nombre -> función de la tarea.
+        dependencias (dict): Un diccionario nombre -> lista de los nombres de las tareas de las que depende.
+                             Las tareas que no aparecen no tienen dependencias.
+        max_hilos (int, optional): El número máximo de tareas que se ejecutan a la vez. Por defecto es 4.
+
+    Returns:
+        dict: Un diccionario nombre -> resultado de cada tarea.
+
+    Raises:
+        ValueError: Si alguna dependencia no corresponde a ninguna tarea o si hay dependencias circulares.
+        Exception: La excepción de la primera tarea que falle. Las tareas pendientes no se llegan a lanzar.
+    """
+    dependencias = {nombre: set(dependencias.get(nombre, [])) for nombre in tareas}
+    for nombre, deps in dependencias.items():
+        if not deps <= tareas.keys():
+            raise ValueError(f"La tarea '{nombre}' depende de tareas que no existen: {sorted(deps - tareas.keys())}")
+
+    pendientes = dict(tareas)
+    en_curso = {}
+    resultados = {}
+
+    with ThreadPoolExecutor(max_workers=max_hilos) as executor:
+        while pendientes or en_curso:
+            # lanza las tareas cuyas dependencias ya han terminado
+            for nombre in [nombre for nombre in pendientes if dependencias[nombre] <= resultados.keys()]:
+                en_curso[executor.submit(pendientes.pop(nombre), resultados)] = nombre
+
+            if not en_curso:
+                raise ValueError(f"Hay dependencias circulares entre las tareas: {sorted(pendientes)}")
+
+            terminadas, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in terminadas:
+                nombre = en_curso.pop(futuro)
+                if futuro.exception() is not None:
+                    # no se lanzan mas tareas; las que estan en curso terminan al cerrar el executor
+                    pendientes.clear()
+                    raise futuro.exception()
+                resultados[nombre] = futuro.result()
+
+    return resultados
+
+
+def resultado_futuro(valor):
+    """
+    Devuelve el valor de una entrada que puede estar todavía calculándose en otro hilo: si es un `Future`, espera 
+    a que termine y devuelve su resultado; si no, la devuelve tal cual. Permite pasar a una etapa el `Future` de otra 
+    que se ejecuta a la vez, de forma que solo espere a ella en el momento en que necesita su resultado.
+
+    Args:
+        valor (concurrent.futures.Future o cualquier objeto): La entrada.
+
+    Returns:
+        El resultado del `Future`, o `valor` si no es un `Future`.
+
+    Raises:
+        Exception: La excepción de la etapa que calcula el `Future`, si ha fallado.
+    """
+    return valor.result() if isinstance(valor, Future) else valor
+
+
+instrumentar_modulo(globals())
@@ -1,34 +1,188 @@
 import pandas as pd 
 import requests 
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime 
-import time
+from itertools import compress
+from src.soporte_almacenamiento import FORMATO_POR_DEFECTO, guardar_dataframe, leer_dataframe, ruta_formato
+import hashlib
+import json
+import lxml.html
+import os
+import queue
+import tempfile
+import threading
+from src.soporte_metricas import instrumentar_modulo
+
+# ijson permite leer los eventos de la API de uno en uno sin cargar el JSON completo en memoria
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+CLASES_HOTEL = ["title", "rate-details__price-wrapper", "ratings__score"]
+# formas de obtener el texto de los hoteles en `scrap_info_hoteles`
+MODOS_EXTRACCION = ("script", "html", "elementos")
+
+# devuelve en una sola llamada el texto renderizado (innerText, como `.text` de Selenium) de cada campo de cada hotel
+SCRIPT_TEXTOS_HOTELES = """
+var clases = arguments[0];
+return Array.from(document.getElementsByClassName('hotelblock')).map(function (bloque) {
+    return clases.map(function (clase) {
+        var elemento = bloque.getElementsByClassName(clase)[0];
+        return elemento ? elemento.innerText : null;
+    });
+});
+"""
+
+# codigos de estado de la API ante los que se reintenta la peticion (con espera exponencial entre intentos)
+ESTADOS_REINTENTO = (429, 500, 502, 503, 504)
+
+# sesion HTTP compartida por todas las peticiones a la API, creada la primera vez que se usa
+SESION_HTTP = None
+LOCK_SESION_HTTP = threading.Lock()
+
+ETIQUETAS_BLOQUE = {"address", "article", "aside", "br", "dd", "div", "dl", "dt", "footer", "form", "h1", "h2", "h3", "h4", 
+                    "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "p", "section", "table", "td", "th", "tr", "ul"}
+
+
+def crear_driver(ruta_driver=None, headless=True):
+    """
+    Crea una instancia de Chrome controlada por Selenium.
 
+    Args:
+        ruta_driver (str, optional): Ruta al ejecutable de chromedriver. Si es None, se descarga o se reutiliza 
+                                     con `ChromeDriverManager`. Por defecto es None.
+        headless (bool, optional): Si es True, el navegador se abre sin ventana. Por defecto es True.
 
-def scrap_info_hoteles(url, sleep_time=5):
+    Returns:
+        webdriver.Chrome: El driver creado.
+    """
+    service = Service(ruta_driver or ChromeDriverManager().install())  
+    options = Options() 
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1920,1080")
+    else:
+        options.add_argument("--start-maximized")  
+    return webdriver.Chrome(service=service, options=options)  
+
+
+def texto_renderizado(elemento):
+    """
+    Aproxima el texto que muestra el navegador para un elemento HTML (equivalente a `.text` en Selenium): 
+    los elementos de bloque empiezan en una línea nueva, los espacios se normalizan y se omiten las líneas vacías.
+
+    Args:
+        elemento (lxml.html.HtmlElement): El elemento del que se quiere obtener el texto.
+
+    Returns:
+        str: El texto del elemento, con una línea por bloque.
+    """
+    partes = []
+
+    def recorrer(nodo):
+        etiqueta = nodo.tag if isinstance(nodo.tag, str) else None
+        if etiqueta not in ("script", "style") and etiqueta is not None:
+            bloque = etiqueta in ETIQUETAS_BLOQUE
+            if bloque:
+                partes.append("\n")
+            partes.append(nodo.text or "")
+            for hijo in nodo:
+                recorrer(hijo)
+            if bloque:
+                partes.append("\n")
+        partes.append(nodo.tail or "")
+
+    recorrer(elemento)
+    partes[-1] = ""  # el texto que sigue al elemento no forma parte de el
+    lineas = (" ".join(linea.split()) for linea in "".join(partes).split("\n"))
+    return "\n".join(linea for linea in lineas if linea)
+
+
+def textos_hoteles_html(html):
+    """
+    Extrae del código HTML de la página el texto del título, el precio y la valoración de cada hotel (`hotelblock`), 
+    procesándolo en local con lxml.
+
+    Args:
+        html (str): El código HTML de la página.
+
+    Returns:
+        list: Una lista con, para cada hotel, una lista de tres textos (None si falta el elemento).
+    """
+    textos = []
+    for bloque in lxml.html.fromstring(html).find_class("hotelblock"):
+        campos = []
+        for clase in CLASES_HOTEL:
+            elementos = bloque.find_class(clase)
+            campos.append(texto_renderizado(elementos[0]) if elementos else None)
+        textos.append(campos)
+    return textos
+
+
+def parseo_hotel(texto_titulo, texto_precio, texto_estrellas):
+    """
+    Obtiene el nombre, el precio por noche y las estrellas de un hotel a partir del texto de sus elementos.
+
+    Args:
+        texto_titulo (str): El texto del elemento `title`.
+        texto_precio (str): El texto del elemento `rate-details__price-wrapper`.
+        texto_estrellas (str): El texto del elemento `ratings__score`.
+
+    Returns:
+        tuple: El nombre del hotel (str), el precio por noche (float) y las estrellas (float).
+    """
+    nombre = texto_titulo.split("\n")[0]
+    precio = float(texto_precio.split("\n")[1].replace("€", ""))
+    estrellas = float(texto_estrellas.split("/")[0])
+    return nombre, precio, estrellas
+
+
+def scrap_info_hoteles(url, sleep_time=5, driver=None, modo_extraccion="script"):
     """
     Extrae información sobre hoteles desde una página web utilizando Selenium.
 
     Esta función navega a través de la página web de los hoteles y extrae información sobre el nombre del hotel, 
     el precio por noche, las estrellas y la fecha de reserva. Utiliza Selenium para interactuar con la página y 
-    obtiene los datos necesarios para crear un diccionario de resultados.
+    obtiene los datos necesarios para crear un diccionario de resultados. En lugar de esperar un tiempo fijo, 
+    espera a que los bloques de hoteles (`hotelblock`) con su precio estén cargados.
 
     Args:
         url (str): La URL de la página web de los hoteles a scrapear.
-        sleep_time (int, optional): El tiempo en segundos para esperar antes de comenzar a extraer la información. 
+        sleep_time (int, optional): El tiempo máximo en segundos que se espera a que carguen los hoteles. 
                                      Por defecto es 5 segundos.
+        driver (webdriver.Chrome, optional): Un driver ya abierto que se reutiliza y no se cierra al terminar. 
+                                             Si es None, se crea uno y se cierra al terminar. Por defecto es None.
+        modo_extraccion (str, optional): Cómo se obtiene el texto de cada hotel:
+            - "script": una sola llamada a `execute_script` devuelve el texto de todos los hoteles.
+            - "html": se descarga una vez el código de la página y se procesa en local con lxml (ver `textos_hoteles_html`).
+            - "elementos": una llamada a WebDriver por cada campo de cada hotel (comportamiento original).
+            Por defecto es "script".
 
     Returns:
         dict: Un diccionario con las claves "nombre_hotel", "estrellas", "precio_noche", y "fecha_reserva" 
               y sus correspondientes listas de datos extraídos de la página web.
 
     Raises:
-        Exception: Si ocurre un error al intentar extraer información de la página web.
+        ValueError: Si el modo de extracción no es válido.
+        TimeoutError: Si los hoteles no se cargan en `sleep_time` segundos.
+        RuntimeError: Si ocurre un error al intentar extraer información de la página web (el error original, por 
+                      ejemplo un `WebDriverException`, queda en `__cause__`).
     """
+    # comprueba el modo de extraccion antes de abrir el navegador
+    if modo_extraccion not in MODOS_EXTRACCION:
+        raise ValueError(f"Modo de extracción no válido: {modo_extraccion}. Debe ser uno de {list(MODOS_EXTRACCION)}.")
+
     dictio_scrap = {
         "nombre_hotel": [],  
         "estrellas": [],  
@@ -36,58 +190,311 @@ def scrap_info_hoteles(url, sleep_time=5):
         "fecha_reserva": []  
     }
     
-    service = Service(ChromeDriverManager().install())  
-    options = Options() 
-    options.add_argument("--start-maximized")  
-    driver = webdriver.Chrome(service=service, options=options)  
+    driver_propio = driver is None
+    if driver_propio:
+        driver = crear_driver()
 
-    driver.get(url) 
-    time.sleep(sleep_time)  
-    
     try:
-        hoteles = driver.find_elements(By.CLASS_NAME, "hotelblock")
-
-        for hotel in hoteles:
-            nombre = hotel.find_element(By.CLASS_NAME, "title").text.split("\n")[0]    
+        driver.get(url) 
+        WebDriverWait(driver, sleep_time).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, ".hotelblock .rate-details__price-wrapper")))
+
+        if modo_extraccion == "script":
+            textos = driver.execute_script(SCRIPT_TEXTOS_HOTELES, CLASES_HOTEL)
+        elif modo_extraccion == "html":
+            textos = textos_hoteles_html(driver.page_source)
+        else:
+            textos = [[hotel.find_element(By.CLASS_NAME, clase).text for clase in CLASES_HOTEL] 
+                      for hotel in driver.find_elements(By.CLASS_NAME, "hotelblock")]
+
+        for texto_titulo, texto_precio, texto_estrellas in textos:
+            nombre, precio, estrellas = parseo_hotel(texto_titulo, texto_precio, texto_estrellas)
             dictio_scrap["nombre_hotel"].append(nombre)  
-
-            precio_texto = hotel.find_element(By.CLASS_NAME, "rate-details__price-wrapper").text.split("\n")[1].replace("€", "")
-            precio = float(precio_texto)
             dictio_scrap["precio_noche"].append(precio)  
-
-            estrellas_texto = hotel.find_element(By.CLASS_NAME, "ratings__score").text.split("/")[0]
-            estrellas = float(estrellas_texto)
             dictio_scrap["estrellas"].append(estrellas)  
-
             dictio_scrap["fecha_reserva"].append(pd.Timestamp(datetime.now().date()))
 
+    except TimeoutException as e:
+        raise TimeoutError(f"No se han cargado los hoteles de {url} en {sleep_time} segundos.") from e
     except Exception as e:
-        print("Error al extraer la información:", e)
+        raise RuntimeError(f"Error al extraer la información de {url}: {e}") from e
 
-    driver.quit()  
+    finally:
+        if driver_propio:
+            driver.quit()  
     
     return dictio_scrap
 
 
-def scrap_info_eventos(url):
+def crear_pool_drivers(num_drivers=4, fabrica=None):
     """
-    Extrae información sobre eventos desde una API pública.
+    Crea un pool de navegadores que se reutilizan entre páginas y entre llamadas a `scrap_info_hoteles_varias_urls`, 
+    de forma que el coste de arrancar cada navegador se paga una sola vez por extracción. Los navegadores se crean 
+    cuando se necesitan, hasta `num_drivers`, y se cierran todos con `cerrar_pool_drivers`.
 
-    Esta función obtiene información sobre eventos en la ciudad de Madrid desde una API, incluyendo detalles como el 
-    nombre del evento, su URL, la dirección, el horario y las fechas de inicio y fin. Filtra los eventos para que 
-    solo incluya aquellos que ocurren en el rango de fechas especificado.
+    Args:
+        num_drivers (int, optional): El número máximo de navegadores abiertos a la vez. Por defecto es 4.
+        fabrica (callable, optional): La función sin argumentos que crea cada navegador. Por defecto se usa 
+                                      `crear_driver` con el chromedriver de `ChromeDriverManager`, que se obtiene 
+                                      una sola vez al crear el primer navegador.
+
+    Returns:
+        dict: El pool, con la cola de navegadores libres ("libres"), los navegadores creados ("drivers" y "creados"), 
+              el máximo de navegadores ("max_drivers"), la fábrica y su bloqueo.
+
+    Raises:
+        ValueError: Si `num_drivers` es menor que 1.
+    """
+    if num_drivers < 1:
+        raise ValueError("El pool necesita al menos un navegador.")
+    return {"libres": queue.Queue(), "drivers": [], "creados": 0, "max_drivers": num_drivers, "fabrica": fabrica,
+            "lock": threading.Lock()}
+
+
+def tomar_driver(pool_drivers):
+    """
+    Toma un navegador libre del pool. Si no hay ninguno libre y aún no se ha llegado al máximo, se crea uno nuevo; 
+    si se ha llegado, se espera a que otro hilo devuelva el suyo con `devolver_driver`.
 
     Args:
-        url (str): La URL de la API de eventos desde donde se extraerán los datos.
+        pool_drivers (dict): El pool de navegadores (ver `crear_pool_drivers`).
+
+    Returns:
+        webdriver.Chrome: El navegador.
+    """
+    # None en la cola avisa de que se ha descartado un navegador (ver `descartar_driver`) y se puede crear otro
+    try:
+        driver = pool_drivers["libres"].get_nowait()
+        if driver is not None:
+            return driver
+    except queue.Empty:
+        pass
+
+    # reserva el hueco del navegador nuevo; el navegador se arranca fuera del bloqueo para crear varios a la vez
+    with pool_drivers["lock"]:
+        if pool_drivers["creados"] >= pool_drivers["max_drivers"]:
+            reservado = False
+        else:
+            reservado = True
+            pool_drivers["creados"] += 1
+            if pool_drivers["fabrica"] is None:
+                ruta_driver = ChromeDriverManager().install()
+                pool_drivers["fabrica"] = lambda: crear_driver(ruta_driver)
+    if not reservado:
+        driver = pool_drivers["libres"].get()
+        return driver if driver is not None else tomar_driver(pool_drivers)
+
+    try:
+        driver = pool_drivers["fabrica"]()
+    except Exception:
+        with pool_drivers["lock"]:
+            pool_drivers["creados"] -= 1
+        raise
+    with pool_drivers["lock"]:
+        pool_drivers["drivers"].append(driver)
+    return driver
+
+
+def devolver_driver(pool_drivers, driver):
+    """
+    Devuelve un navegador al pool para que lo reutilice otra página.
+
+    Args:
+        pool_drivers (dict): El pool de navegadores.
+        driver (webdriver.Chrome): El navegador.
+
+    Returns:
+        None
+    """
+    pool_drivers["libres"].put(driver)
+
+
+def descartar_driver(pool_drivers, driver):
+    """
+    Cierra un navegador que ha fallado y lo quita del pool en lugar de devolverlo, de forma que el siguiente 
+    `tomar_driver` cree uno nuevo en su hueco (también el de un hilo que ya esté esperando un navegador libre).
+
+    Args:
+        pool_drivers (dict): El pool de navegadores.
+        driver (webdriver.Chrome): El navegador.
+
+    Returns:
+        None
+    """
+    with pool_drivers["lock"]:
+        if driver in pool_drivers["drivers"]:
+            pool_drivers["drivers"].remove(driver)
+            pool_drivers["creados"] -= 1
+    pool_drivers["libres"].put(None)
+    try:
+        driver.quit()
+    except Exception:
+        # el navegador puede estar ya cerrado o sin responder
+        pass
+
+
+def cerrar_pool_drivers(pool_drivers):
+    """
+    Cierra todos los navegadores del pool.
+
+    Args:
+        pool_drivers (dict): El pool de navegadores.
+
+    Returns:
+        None
+    """
+    with pool_drivers["lock"]:
+        drivers, pool_drivers["drivers"] = pool_drivers["drivers"], []
+        pool_drivers["libres"] = queue.Queue()
+        pool_drivers["creados"] = 0
+    for driver in drivers:
+        driver.quit()
+
+
+def scrap_info_hoteles_varias_urls(urls, num_drivers=4, sleep_time=5, pool_drivers=None, errores=None):
+    """
+    Extrae información sobre hoteles de varias páginas web (por ejemplo, distintas fechas o destinos) en paralelo, 
+    repartiéndolas entre los navegadores sin ventana de un pool (ver `crear_pool_drivers`).
+
+    Conviene crear el pool una vez por extracción y pasarlo en `pool_drivers`, para que los navegadores sigan abiertos 
+    entre llamadas; sin él, se crea un pool para esta llamada y se cierra al terminar.
+
+    Si falla alguna página, se informa de su error y se devuelven los datos de las demás. Un navegador que ha fallado 
+    (un `WebDriverException` que no es una espera agotada) se cierra y se quita del pool (ver `descartar_driver`) 
+    en lugar de devolverse para otra página.
+
+    Args:
+        urls (list): La lista de URLs a scrapear.
+        num_drivers (int, optional): El número máximo de páginas que se scrapean a la vez (y de navegadores del pool 
+                                     que se crea si no se indica `pool_drivers`). Por defecto es 4.
+        sleep_time (int, optional): El tiempo máximo en segundos que se espera a que carguen los hoteles de cada página. 
+                                     Por defecto es 5 segundos.
+        pool_drivers (dict, optional): El pool de navegadores que se reutiliza y no se cierra. Por defecto es None.
+        errores (dict, optional): Un diccionario en el que se guarda el error de cada página que ha fallado 
+                                  (URL -> excepción). Por defecto es None.
+
+    Returns:
+        dict: Un diccionario con las mismas claves que `scrap_info_hoteles` y los datos de las páginas extraídas, 
+              en el orden de la lista de URLs.
+
+    Raises:
+        RuntimeError: Si no se ha podido extraer ninguna de las páginas.
+    """
+    pool_propio = pool_drivers is None
+    if pool_propio:
+        pool_drivers = crear_pool_drivers(num_drivers)
+
+    def scrap(url):
+        driver = tomar_driver(pool_drivers)
+        try:
+            resultado = scrap_info_hoteles(url, sleep_time, driver)
+        except Exception as e:
+            # `scrap_info_hoteles` guarda el error del navegador en __cause__
+            if any(isinstance(error, WebDriverException) and not isinstance(error, TimeoutException) 
+                   for error in (e, e.__cause__)):
+                descartar_driver(pool_drivers, driver)
+            else:
+                devolver_driver(pool_drivers, driver)
+            raise
+        devolver_driver(pool_drivers, driver)
+        return resultado
+
+    resultados, errores_paginas = [], {}
+    try:
+        with ThreadPoolExecutor(max_workers=min(num_drivers, pool_drivers["max_drivers"])) as executor:
+            futuros = [executor.submit(scrap, url) for url in urls]
+        for url, futuro in zip(urls, futuros):
+            try:
+                resultados.append(futuro.result())
+            except Exception as e:
+                errores_paginas[url] = e
+    finally:
+        if pool_propio:
+            cerrar_pool_drivers(pool_drivers)
+
+    if errores is not None:
+        errores.update(errores_paginas)
+    if errores_paginas:
+        print(f"No se ha podido extraer la información de {len(errores_paginas)} de {len(urls)} páginas:")
+        for url, e in errores_paginas.items():
+            print(f"    {url}: {e}")
+        if not resultados:
+            raise RuntimeError("No se ha podido extraer la información de ninguna página.") from next(iter(errores_paginas.values()))
+
+    dictio_scrap = {"nombre_hotel": [], "estrellas": [], "precio_noche": [], "fecha_reserva": []}
+    for resultado in resultados:
+        for clave in dictio_scrap:
+            dictio_scrap[clave].extend(resultado[clave])
+    return dictio_scrap
+
+
+def lectura_eventos_json(fichero):
+    """
+    Recorre los eventos de la lista `@graph` de un JSON de la API de eventos. Si `ijson` está instalado, 
+    los eventos se leen de forma incremental, sin cargar el documento completo en memoria.
+
+    Args:
+        fichero (file): Un objeto tipo fichero en modo binario con el JSON (por ejemplo, `response.raw`).
+
+    Yields:
+        dict: Cada uno de los eventos.
+    """
+    if ijson is not None:
+        yield from ijson.items(fichero, "@graph.item", use_float=True)
+    else:
+        yield from json.load(fichero)["@graph"]
+
+
+def filtrado_lote_eventos(lote, fecha_inicio, fecha_fin, info_eventos):
+    """
+    Añade a `info_eventos` los eventos de un lote que coinciden con el rango de fechas indicado. Las fechas de 
+    inicio y fin de todo el lote se convierten a datetime de una vez y se filtran con una máscara booleana.
+
+    Args:
+        lote (list): Una lista de eventos (diccionarios) de la API.
+        fecha_inicio (pd.Timestamp): El inicio del rango de fechas.
+        fecha_fin (pd.Timestamp): El final del rango de fechas.
+        info_eventos (dict): El diccionario de listas al que se añaden los eventos seleccionados.
+
+    Returns:
+        None: Modifica `info_eventos` in-place.
+    """
+    fechas = pd.DataFrame([(evento.get("dtstart"), evento.get("dtend")) for evento in lote], columns=["dtstart", "dtend"], dtype=object)
+    start_date = pd.to_datetime(fechas["dtstart"], errors="coerce", format="ISO8601")
+    end_date = pd.to_datetime(fechas["dtend"], errors="coerce", format="ISO8601")
+    seleccion = ((start_date <= fecha_fin) & (end_date >= fecha_inicio)).to_numpy()
+
+    for evento in compress(lote, seleccion):
+        info_eventos["nombre_evento"].append(evento.get('title', None))
+        info_eventos["url_evento"].append(evento.get('link', None))
+        address = evento.get("address", {})
+        area = address.get("area", {}) 
+        info_eventos["codigo_postal"].append(area.get("postal-code", None))
+        info_eventos["direccion"].append(area.get("street-address", None))
+        info_eventos["horario"].append(evento.get("time", "") or None)
+        organizacion = evento.get('organization', {})
+        info_eventos["organizacion"].append(organizacion.get('organization-name', None))
+        info_eventos["inicio_evento"].append(evento.get("dtstart", None).split(" ")[0] if evento.get("dtstart") else None)
+        info_eventos["fin_evento"].append(evento.get("dtend", None).split(" ")[0] if evento.get("dtend") else None)
+        info_eventos["ciudad"].append("Madrid")
+
+
+def parseo_eventos(eventos, fecha_inicio="2025-03-01 00:00:00", fecha_fin="2025-03-02 23:59:00", tamano_lote=50000):
+    """
+    Selecciona los eventos que ocurren en un rango de fechas y extrae sus datos, procesándolos por lotes 
+    para que la memoria no dependa del número total de eventos.
+
+    Args:
+        eventos (iterable): Los eventos de la API (por ejemplo, los devueltos por `lectura_eventos_json`).
+        fecha_inicio (str, optional): El inicio del rango de fechas. Por defecto es "2025-03-01 00:00:00".
+        fecha_fin (str, optional): El final del rango de fechas. Por defecto es "2025-03-02 23:59:00".
+        tamano_lote (int, optional): El número de eventos de cada lote. Por defecto es 50000.
 
     Returns:
         dict: Un diccionario con las claves "nombre_evento", "url_evento", "codigo_postal", "direccion", 
               "horario", "organizacion", "inicio_evento", "fin_evento", y "ciudad", y sus correspondientes 
-              listas con los datos extraídos de la API.
+              listas con los datos de los eventos seleccionados.
     """
-    response = requests.get(url)
-    data = response.json() 
-
     info_eventos = {
         "nombre_evento": [],
         "url_evento": [],
@@ -99,93 +506,377 @@ def scrap_info_eventos(url):
         "fin_evento": [],
         "ciudad": []
     }
+    fecha_inicio, fecha_fin = pd.Timestamp(fecha_inicio), pd.Timestamp(fecha_fin)
+
+    lote = []
+    for evento in eventos:
+        lote.append(evento)
+        if len(lote) == tamano_lote:
+            filtrado_lote_eventos(lote, fecha_inicio, fecha_fin, info_eventos)
+            lote = []
+    if lote:
+        filtrado_lote_eventos(lote, fecha_inicio, fecha_fin, info_eventos)
 
-    for evento in data["@graph"]:
-        start_date = pd.to_datetime(evento.get('dtstart'))
-        end_date = pd.to_datetime(evento.get('dtend'))
-
-        if start_date <= pd.to_datetime("2025-03-02 23:59:00") and end_date >= pd.to_datetime("2025-03-01 00:00:00"):
-            info_eventos["nombre_evento"].append(evento.get('title', None))
-            info_eventos["url_evento"].append(evento.get('link', None))
-            address = evento.get("address", {})
-            area = address.get("area", {}) 
-            info_eventos["codigo_postal"].append(area.get("postal-code", None))
-            info_eventos["direccion"].append(area.get("street-address", None))
-            info_eventos["horario"].append(evento.get("time", "") or None)
-            organizacion = evento.get('organization', {})
-            info_eventos["organizacion"].append(organizacion.get('organization-name', None))
-            info_eventos["inicio_evento"].append(evento.get("dtstart", None).split(" ")[0] if evento.get("dtstart") else None)
-            info_eventos["fin_evento"].append(evento.get("dtend", None).split(" ")[0] if evento.get("dtend") else None)
-            info_eventos["ciudad"].append("Madrid")
-            
     return info_eventos
 
-def extraer_datos(url_selenium, url_api, archivo_salida_selenium, archivo_salida_api):
+
+def crear_sesion_http(reintentos=3, backoff=0.5, tamano_pool=10):
     """
-    Extrae datos sobre hoteles y eventos desde fuentes web y guarda los resultados en archivos.
+    Crea una sesión HTTP que reutiliza las conexiones (keep-alive) y reintenta automáticamente las peticiones GET 
+    que fallan por errores de conexión o por los códigos de estado de `ESTADOS_REINTENTO`, esperando entre 
+    intentos un tiempo que crece de forma exponencial.
 
-    Esta función utiliza dos funciones de scraping diferentes para obtener información sobre hoteles desde una página 
-    web con Selenium y sobre eventos desde una API pública. Los datos extraídos se guardan en archivos de salida 
-    (en formato Pickle) para ser utilizados posteriormente.
+    Args:
+        reintentos (int, optional): El número máximo de reintentos de cada petición. Por defecto es 3.
+        backoff (float, optional): El factor de espera entre reintentos, en segundos. Por defecto es 0.5.
+        tamano_pool (int, optional): El número de conexiones que se mantienen abiertas por servidor. Por defecto es 10.
+
+    Returns:
+        requests.Session: La sesión configurada.
+    """
+    retry = Retry(total=reintentos, backoff_factor=backoff, status_forcelist=ESTADOS_REINTENTO,
+                  allowed_methods=frozenset(["GET", "HEAD"]), raise_on_status=False)
+    adaptador = HTTPAdapter(max_retries=retry, pool_connections=tamano_pool, pool_maxsize=tamano_pool)
+    sesion = requests.Session()
+    sesion.mount("http://", adaptador)
+    sesion.mount("https://", adaptador)
+    return sesion
+
+
+def obtener_sesion_http():
+    """
+    Devuelve la sesión HTTP compartida del módulo, creándola con `crear_sesion_http` la primera vez.
+
+    Returns:
+        requests.Session: La sesión compartida.
+    """
+    global SESION_HTTP
+    with LOCK_SESION_HTTP:
+        if SESION_HTTP is None:
+            SESION_HTTP = crear_sesion_http()
+        return SESION_HTTP
+
+
+def rutas_cache_http(directorio_cache, url):
+    """
+    Calcula las rutas de los archivos de la caché HTTP de una URL: el cuerpo de la respuesta y sus metadatos.
 
-    Pasos realizados por la función:
-    1. Verifica que las URLs proporcionadas sean válidas y de tipo cadena.
-    2. Realiza el scraping de información sobre los hoteles utilizando la función `scrap_info_hoteles`.
-    3. Guarda los datos de los hoteles en el archivo especificado (`archivo_salida_selenium`).
-    4. Realiza el scraping de información sobre los eventos utilizando la función `scrap_info_eventos`.
-    5. Guarda los datos de los eventos en el archivo especificado (`archivo_salida_api`).
-    
     Args:
-        url_selenium (str): URL de la página web de los hoteles para realizar el scraping con Selenium.
-        url_api (str): URL de la API de eventos para realizar el scraping.
+        directorio_cache (str): La carpeta de la caché.
+        url (str): La URL cacheada.
+
+    Returns:
+        tuple: La ruta del cuerpo y la ruta del JSON de metadatos.
+    """
+    nombre = hashlib.sha256(url.encode()).hexdigest()[:32]
+    return os.path.join(directorio_cache, f"{nombre}.body"), os.path.join(directorio_cache, f"{nombre}.json")
+
+
+def lectura_metadatos_cache(ruta_metadatos):
+    """
+    Lee los metadatos de una entrada de la caché HTTP.
+
+    Args:
+        ruta_metadatos (str): La ruta del JSON de metadatos.
+
+    Returns:
+        dict: Los metadatos, o un diccionario vacío si no existen o no se pueden leer.
+    """
+    try:
+        with open(ruta_metadatos, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def guardar_metadatos_cache(ruta_metadatos, metadatos):
+    """
+    Guarda los metadatos de una entrada de la caché HTTP, escribiendo primero a un archivo temporal para que 
+    una ejecución interrumpida no deje el JSON a medias.
+
+    Args:
+        ruta_metadatos (str): La ruta del JSON de metadatos.
+        metadatos (dict): Los metadatos.
+
+    Returns:
+        None
+    """
+    temporal = f"{ruta_metadatos}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(metadatos, f, ensure_ascii=False, indent=2)
+    os.replace(temporal, ruta_metadatos)
+
+
+def descarga_condicional(url, directorio_cache, sesion=None, timeout=(10, 120)):
+    """
+    Descarga una URL usando una caché en disco con peticiones condicionales. Si la URL ya está en la caché, se 
+    envían las cabeceras `If-None-Match` e `If-Modified-Since` con el `ETag` y el `Last-Modified` guardados, y si el 
+    servidor responde `304 Not Modified` se usa el cuerpo cacheado sin volver a descargarlo. En otro caso, la 
+    respuesta se guarda en la caché junto con sus cabeceras.
+
+    Args:
+        url (str): La URL a descargar.
+        directorio_cache (str): La carpeta de la caché. Se crea si no existe.
+        sesion (requests.Session, optional): La sesión HTTP. Por defecto se usa la de `obtener_sesion_http`.
+        timeout (tuple, optional): Los tiempos máximos de conexión y de lectura, en segundos. Por defecto es (10, 120).
+
+    Returns:
+        tuple: La ruta del cuerpo de la respuesta en la caché, los metadatos de la entrada (dict) y un booleano 
+               que indica si el contenido ha cambiado desde la última descarga.
+
+    Raises:
+        requests.HTTPError: Si el servidor responde con un código de error.
+    """
+    sesion = sesion or obtener_sesion_http()
+    os.makedirs(directorio_cache, exist_ok=True)
+    ruta_cuerpo, ruta_metadatos = rutas_cache_http(directorio_cache, url)
+    metadatos = lectura_metadatos_cache(ruta_metadatos) if os.path.exists(ruta_cuerpo) else {}
+
+    cabeceras = {}
+    if metadatos.get("etag"):
+        cabeceras["If-None-Match"] = metadatos["etag"]
+    if metadatos.get("last_modified"):
+        cabeceras["If-Modified-Since"] = metadatos["last_modified"]
+
+    with sesion.get(url, headers=cabeceras, stream=True, timeout=timeout) as response:
+        if response.status_code == 304 and metadatos:
+            return ruta_cuerpo, metadatos, False
+        response.raise_for_status()
+
+        # descarga a un temporal en la misma carpeta y lo renombra al terminar
+        descriptor, temporal = tempfile.mkstemp(dir=directorio_cache, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as f:
+                for bloque in response.iter_content(chunk_size=1 << 20):
+                    f.write(bloque)
+            os.replace(temporal, ruta_cuerpo)
+        except BaseException:
+            os.remove(temporal)
+            raise
+
+        metadatos = {"url": url, "etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified"),
+                     "descarga": datetime.now().isoformat(timespec="seconds")}
+    guardar_metadatos_cache(ruta_metadatos, metadatos)
+    return ruta_cuerpo, metadatos, True
+
+
+def scrap_info_eventos(url, fecha_inicio="2025-03-01 00:00:00", fecha_fin="2025-03-02 23:59:00", sesion=None, timeout=(10, 120)):
+    """
+    Extrae información sobre eventos desde una API pública.
+
+    Esta función obtiene información sobre eventos en la ciudad de Madrid desde una API, incluyendo detalles como el 
+    nombre del evento, su URL, la dirección, el horario y las fechas de inicio y fin. Filtra los eventos para que 
+    solo incluya aquellos que ocurren en el rango de fechas especificado. La respuesta se procesa a medida que 
+    se descarga (ver `lectura_eventos_json` y `parseo_eventos`).
+
+    Args:
+        url (str): La URL de la API de eventos desde donde se extraerán los datos.
+        fecha_inicio (str, optional): El inicio del rango de fechas. Por defecto es "2025-03-01 00:00:00".
+        fecha_fin (str, optional): El final del rango de fechas. Por defecto es "2025-03-02 23:59:00".
+        sesion (requests.Session, optional): La sesión HTTP. Por defecto se usa la de `obtener_sesion_http`.
+        timeout (tuple, optional): Los tiempos máximos de conexión y de lectura, en segundos. Por defecto es (10, 120).
+
+    Returns:
+        dict: Un diccionario con las claves "nombre_evento", "url_evento", "codigo_postal", "direccion", 
+              "horario", "organizacion", "inicio_evento", "fin_evento", y "ciudad", y sus correspondientes 
+              listas con los datos extraídos de la API.
+    """
+    sesion = sesion or obtener_sesion_http()
+    with sesion.get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        return parseo_eventos(lectura_eventos_json(response.raw), fecha_inicio, fecha_fin)
+
+
+def extraccion_eventos_cache(url, archivo_salida_api, directorio_cache, fecha_inicio="2025-03-01 00:00:00", fecha_fin="2025-03-02 23:59:00", formato=FORMATO_POR_DEFECTO):
+    """
+    Obtiene el DataFrame de eventos usando la caché HTTP de `descarga_condicional`. Si la API responde que el 
+    contenido no ha cambiado y `archivo_salida_api` contiene los eventos ya procesados con el mismo rango de 
+    fechas, se devuelve ese archivo sin descargar ni procesar de nuevo la respuesta. En otro caso, se procesa 
+    el cuerpo cacheado y se guarda el resultado en `archivo_salida_api`.
+
+    Args:
+        url (str): La URL de la API de eventos.
+        archivo_salida_api (str): Ruta del archivo con los eventos procesados. Su extensión se ajusta a `formato`.
+        directorio_cache (str): La carpeta de la caché HTTP.
+        fecha_inicio (str, optional): El inicio del rango de fechas. Por defecto es "2025-03-01 00:00:00".
+        fecha_fin (str, optional): El final del rango de fechas. Por defecto es "2025-03-02 23:59:00".
+        formato (str, optional): El formato del archivo de eventos (ver `src/soporte_almacenamiento.py`). 
+                                 Por defecto es `FORMATO_POR_DEFECTO`.
+
+    Returns:
+        pd.DataFrame: El DataFrame de eventos.
+    """
+    archivo_salida_api = ruta_formato(archivo_salida_api, formato)
+    ruta_cuerpo, metadatos, modificado = descarga_condicional(url, directorio_cache)
+    procesado = {"archivo": os.path.abspath(archivo_salida_api), "fecha_inicio": fecha_inicio, "fecha_fin": fecha_fin}
+
+    if not modificado and metadatos.get("procesado") == procesado and os.path.exists(archivo_salida_api):
+        return leer_dataframe(archivo_salida_api)
+
+    with open(ruta_cuerpo, "rb") as f:
+        df_eventos = pd.DataFrame(parseo_eventos(lectura_eventos_json(f), fecha_inicio, fecha_fin))
+    try:
+        guardar_dataframe(df_eventos, archivo_salida_api)
+    except Exception as e:
+        raise FileNotFoundError(f"No se pudo guardar el archivo de salida de los eventos: {e}")
+
+    # se anota en la cache que archivo_salida_api corresponde a este contenido de la API
+    metadatos["procesado"] = procesado
+    guardar_metadatos_cache(rutas_cache_http(directorio_cache, url)[1], metadatos)
+    return df_eventos
+
+def extraccion_hoteles(url_selenium, archivo_salida_selenium, formato=FORMATO_POR_DEFECTO, num_drivers=4):
+    """
+    Extrae con Selenium los datos de los hoteles de la competencia y los guarda en un archivo. Las páginas se 
+    reparten entre un pool de navegadores que se crea una vez para toda la extracción y se cierra al terminar.
+
+    Args:
+        url_selenium (str o list): URL de la página web de los hoteles, o lista de URLs que se scrapean en paralelo 
+                                   con `scrap_info_hoteles_varias_urls`.
         archivo_salida_selenium (str): Ruta del archivo donde se guardarán los datos de los hoteles extraídos.
-        archivo_salida_api (str): Ruta del archivo donde se guardarán los datos de los eventos extraídos.
+        formato (str, optional): El formato del archivo de salida ("feather", "parquet" o "pickle"). 
+                                 Por defecto es `FORMATO_POR_DEFECTO`.
+        num_drivers (int, optional): El número máximo de navegadores del pool. Por defecto es 4.
 
     Returns:
-        tuple: Una tupla con dos DataFrames:
-            - El primer DataFrame contiene los datos de los hoteles.
-            - El segundo DataFrame contiene los datos de los eventos.
-    
+        pd.DataFrame: Los datos de los hoteles.
+
     Raises:
-        ValueError: Si las URLs proporcionadas no son válidas o no se puede acceder a ellas.
-        FileNotFoundError: Si no se pueden guardar los archivos de salida.
+        ValueError: Si la URL no es válida o no se puede acceder a ella.
+        FileNotFoundError: Si no se puede guardar el archivo de salida.
     """
-    
-    # verifica que las URLs de entrada sean validas
-    if not isinstance(url_selenium, str) or not isinstance(url_api, str):
+    urls_selenium = url_selenium if isinstance(url_selenium, list) else [url_selenium]
+    if not all(isinstance(url, str) for url in urls_selenium):
         raise ValueError("Las URLs proporcionadas deben ser de tipo cadena de texto.")
-    
-    # scraping de datos de los hoteles
+
+    pool_drivers = crear_pool_drivers(min(num_drivers, len(urls_selenium)) or 1)
     try:
-        dictio_final_hoteles = scrap_info_hoteles(url_selenium, sleep_time=5)
+        dictio_final_hoteles = scrap_info_hoteles_varias_urls(urls_selenium, num_drivers, sleep_time=5, pool_drivers=pool_drivers)
     except Exception as e:
         raise ValueError(f"Error al extraer datos de los hoteles: {e}")
+    finally:
+        cerrar_pool_drivers(pool_drivers)
 
     df_hoteles_competencia = pd.DataFrame(dictio_final_hoteles)
     
-    # guardar los datos de los hoteles en un archivo Pickle
+    # guardar los datos de los hoteles en el formato indicado
     try:
-        df_hoteles_competencia.to_pickle(archivo_salida_selenium)
+        guardar_dataframe(df_hoteles_competencia, ruta_formato(archivo_salida_selenium, formato))
     except Exception as e:
         raise FileNotFoundError(f"No se pudo guardar el archivo de salida de los hoteles: {e}")
 
-    # scraping de datos de los eventos
+    return df_hoteles_competencia
+
+
+def extraccion_eventos(url_api, archivo_salida_api, fecha_inicio="2025-03-01 00:00:00", fecha_fin="2025-03-02 23:59:00", directorio_cache_http=None, formato=FORMATO_POR_DEFECTO):
+    """
+    Extrae de la API los eventos del rango de fechas indicado y los guarda en un archivo.
+
+    Si se indica `directorio_cache_http`, los eventos se obtienen con `extraccion_eventos_cache`: cuando la API 
+    responde que el contenido no ha cambiado desde la última ejecución, se reutiliza `archivo_salida_api` sin 
+    volver a descargar ni procesar la respuesta.
+
+    Args:
+        url_api (str): URL de la API de eventos.
+        archivo_salida_api (str): Ruta del archivo donde se guardarán los datos de los eventos extraídos.
+        fecha_inicio (str, optional): El inicio del rango de fechas de los eventos. Por defecto es "2025-03-01 00:00:00".
+        fecha_fin (str, optional): El final del rango de fechas de los eventos. Por defecto es "2025-03-02 23:59:00".
+        directorio_cache_http (str, optional): La carpeta de la caché HTTP de la API de eventos. Por defecto es None 
+                                               (sin caché).
+        formato (str, optional): El formato del archivo de salida ("feather", "parquet" o "pickle"). 
+                                 Por defecto es `FORMATO_POR_DEFECTO`.
+
+    Returns:
+        pd.DataFrame: Los datos de los eventos.
+
+    Raises:
+        ValueError: Si la URL no es válida o no se puede acceder a ella.
+        FileNotFoundError: Si no se puede guardar el archivo de salida.
+    """
+    if not isinstance(url_api, str):
+        raise ValueError("Las URLs proporcionadas deben ser de tipo cadena de texto.")
+
+    # scraping de datos de los eventos, usando la cache HTTP si se ha indicado
+    if directorio_cache_http is not None:
+        try:
+            return extraccion_eventos_cache(url_api, archivo_salida_api, directorio_cache_http, fecha_inicio, fecha_fin, formato)
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Error al extraer datos de los eventos: {e}")
+
     try:
-        dictio_final_eventos = scrap_info_eventos(url_api)
+        dictio_final_eventos = scrap_info_eventos(url_api, fecha_inicio, fecha_fin)
     except Exception as e:
         raise ValueError(f"Error al extraer datos de los eventos: {e}")
 
     df_eventos = pd.DataFrame(dictio_final_eventos)
     
-    # guardar los datos de los eventos en un archivo Pickle
+    # guardar los datos de los eventos en el formato indicado
     try:
-        df_eventos.to_pickle(archivo_salida_api)
+        guardar_dataframe(df_eventos, ruta_formato(archivo_salida_api, formato))
     except Exception as e:
         raise FileNotFoundError(f"No se pudo guardar el archivo de salida de los eventos: {e}")
 
-    return df_hoteles_competencia, df_eventos
+    return df_eventos
+
+
+def extraer_datos(url_selenium, url_api, archivo_salida_selenium, archivo_salida_api, fecha_inicio="2025-03-01 00:00:00", fecha_fin="2025-03-02 23:59:00", directorio_cache_http=None, formato=FORMATO_POR_DEFECTO):
+    """
+    Extrae datos sobre hoteles y eventos desde fuentes web y guarda los resultados en archivos.
+
+    Esta función utiliza dos funciones de scraping diferentes para obtener información sobre hoteles desde una página 
+    web con Selenium y sobre eventos desde una API pública. Los datos extraídos se guardan en archivos de salida 
+    (por defecto en formato Feather, ver `src/soporte_almacenamiento.py`) para ser utilizados posteriormente.
+    La extensión de los archivos de salida se ajusta al formato elegido.
+
+    Pasos realizados por la función:
+    1. Verifica que las URLs proporcionadas sean válidas y de tipo cadena.
+    2. Realiza el scraping de información sobre los hoteles y lo guarda en `archivo_salida_selenium` 
+       (ver `extraccion_hoteles`).
+    3. Realiza el scraping de información sobre los eventos y lo guarda en `archivo_salida_api` 
+       (ver `extraccion_eventos`).
 
+    Las dos extracciones se ejecutan una detrás de otra; `main.py` las lanza por separado para ejecutarlas a la vez 
+    que la lectura y limpieza de las reservas.
+
+    Si se indica `directorio_cache_http`, los eventos se obtienen con `extraccion_eventos_cache`: cuando la API 
+    responde que el contenido no ha cambiado desde la última ejecución, se reutiliza `archivo_salida_api` sin 
+    volver a descargar ni procesar la respuesta.
+    
+    Args:
+        url_selenium (str o list): URL de la página web de los hoteles para realizar el scraping con Selenium, o lista 
+                                   de URLs que se scrapean en paralelo con `scrap_info_hoteles_varias_urls`.
+        url_api (str): URL de la API de eventos para realizar el scraping.
+        archivo_salida_selenium (str): Ruta del archivo donde se guardarán los datos de los hoteles extraídos.
+        archivo_salida_api (str): Ruta del archivo donde se guardarán los datos de los eventos extraídos.
+        fecha_inicio (str, optional): El inicio del rango de fechas de los eventos. Por defecto es "2025-03-01 00:00:00".
+        fecha_fin (str, optional): El final del rango de fechas de los eventos. Por defecto es "2025-03-02 23:59:00".
+        directorio_cache_http (str, optional): La carpeta de la caché HTTP de la API de eventos. Por defecto es None 
+                                               (sin caché).
+        formato (str, optional): El formato de los archivos de salida ("feather", "parquet" o "pickle"). 
+                                 Por defecto es `FORMATO_POR_DEFECTO`.
 
+    Returns:
+        tuple: Una tupla con dos DataFrames:
+            - El primer DataFrame contiene los datos de los hoteles.
+            - El segundo DataFrame contiene los datos de los eventos.
+    
+    Raises:
+        ValueError: Si las URLs proporcionadas no son válidas o no se puede acceder a ellas.
+        FileNotFoundError: Si no se pueden guardar los archivos de salida.
+    """
+    
+    # verifica que las URLs de entrada sean validas
+    urls_selenium = url_selenium if isinstance(url_selenium, list) else [url_selenium]
+    if not all(isinstance(url, str) for url in urls_selenium) or not isinstance(url_api, str):
+        raise ValueError("Las URLs proporcionadas deben ser de tipo cadena de texto.")
+    
+    df_hoteles_competencia = extraccion_hoteles(url_selenium, archivo_salida_selenium, formato)
+    df_eventos = extraccion_eventos(url_api, archivo_salida_api, fecha_inicio, fecha_fin, directorio_cache_http, formato)
 
+    return df_hoteles_competencia, df_eventos
 
 
+instrumentar_modulo(globals())
@@ -0,0 +1,40 @@
+"""
+Pruebas de la caché de etapas: la versión de una etapa depende de los módulos de `src/` que usa y, al reutilizar
+un resultado cacheado, se vuelven a escribir los archivos de salida de la etapa.
+"""
+import os
+
+import pandas as pd
+
+import src.soporte_limpieza_transf as soporte_limpieza_transf
+from src.soporte_almacenamiento import guardar_dataframe, leer_dataframe
+from src.soporte_cache import ejecutar_etapa, modulos_dependencias
+
+
+def test_version_incluye_modulos_importados():
+    nombres = [modulo.__name__ for modulo in modulos_dependencias(soporte_limpieza_transf)]
+    assert nombres[0] == "src.soporte_limpieza_transf"
+    assert {"src.soporte_almacenamiento", "src.soporte_claves", "src.soporte_planificacion"} <= set(nombres)
+    assert "pandas" not in nombres
+
+
+def test_acierto_vuelve_a_escribir_la_salida(tmp_path):
+    archivo_salida = str(tmp_path / "salida.feather")
+    llamadas = []
+
+    def etapa(valor):
+        llamadas.append(valor)
+        df = pd.DataFrame({"valor": [valor]})
+        guardar_dataframe(df, archivo_salida)
+        return df
+
+    def salida(df):
+        guardar_dataframe(df, archivo_salida)
+
+    primero = ejecutar_etapa(str(tmp_path / "cache"), "etapa", etapa, 1, salida=salida)
+    os.remove(archivo_salida)
+    segundo = ejecutar_etapa(str(tmp_path / "cache"), "etapa", etapa, 1, salida=salida)
+
+    assert llamadas == [1]
+    pd.testing.assert_frame_equal(segundo, primero)
+    pd.testing.assert_frame_equal(leer_dataframe(archivo_salida), primero)
@@ -0,0 +1,170 @@
+"""
+Comprueba que las cargas por columnas (COPY y execute_values) envían las mismas filas que el constructor original
+con `iterrows`, usando los datos de `data/`. No necesita base de datos: se capturan los DataFrames que se pasan a
+`carga_tabla` y `carga_dimension` y los id de las claves foráneas se resuelven con diccionarios.
+"""
+import csv
+import math
+import os
+
+import pandas as pd
+import pytest
+
+import src.soporte_carga as soporte_carga
+from src.soporte_carga import buffer_csv_dataframe, filas_dataframe
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data")
+
+
+@pytest.fixture(scope="module")
+def datos():
+    df = pd.read_pickle(os.path.join(DATA, "reservas_hoteles_limpio.pickle"))
+    df_eventos = pd.read_pickle(os.path.join(DATA, "datos_extraidos", "tabla_eventos.pickle"))
+    df_hoteles_competencia = pd.read_pickle(os.path.join(DATA, "datos_extraidos", "nombre_estrellas_precio.pickle"))
+    return df, df_eventos, df_hoteles_competencia
+
+
+@pytest.fixture
+def ids(datos, monkeypatch):
+    """
+    Sustituye la resolución de claves en la base de datos por diccionarios y devuelve los id usados.
+    """
+    df, _, df_hoteles_competencia = datos
+    nombres_hoteles = pd.concat([df["nombre_hotel"], df_hoteles_competencia["nombre_hotel"]]).unique()
+    ids = {
+        "ciudad": {"Madrid": 1},
+        "hoteles": {nombre: i + 1 for i, nombre in enumerate(nombres_hoteles)},
+        "clientes": dict(zip(df["mail"], df["id_cliente"])),
+    }
+    monkeypatch.setattr(soporte_carga, "resolucion_claves", lambda cur, tabla, valores: valores.map(ids[tabla]))
+    return ids
+
+
+@pytest.fixture
+def cargas(monkeypatch):
+    """
+    Captura los DataFrames que se cargarían en cada tabla.
+    """
+    cargas = {}
+    monkeypatch.setattr(soporte_carga, "carga_tabla", lambda conn, cur, tabla, dataframe, *args, **kwargs: cargas.setdefault(tabla, dataframe))
+    monkeypatch.setattr(soporte_carga, "carga_dimension", lambda conn, cur, tabla, dataframe, *args, **kwargs: cargas.setdefault(tabla, dataframe))
+    return cargas
+
+
+def filas_originales(tabla, df, df_eventos, df_hoteles_competencia, ids):
+    """
+    Construye las filas de una tabla como el constructor original con `iterrows`.
+    """
+    filas = []
+    if tabla == "ciudad":
+        tabla_ciudad = pd.DataFrame(df["ciudad"].unique(), columns=["nombre_ciudad"])
+        filas = [[row["nombre_ciudad"]] for indice, row in tabla_ciudad.iterrows()]
+    elif tabla == "eventos":
+        df_evento = df_eventos[["nombre_evento", "url_evento", "codigo_postal", "direccion", "horario", "inicio_evento", "fin_evento", "organizacion", "ciudad"]].drop_duplicates()
+        for _, row in df_evento.iterrows():
+            codigo_postal = int(row["codigo_postal"]) if pd.notna(row["codigo_postal"]) else None
+            filas.append([row["nombre_evento"], row["url_evento"], codigo_postal, row["direccion"], row["horario"],
+                          pd.to_datetime(row["inicio_evento"]), pd.to_datetime(row["fin_evento"]), row["organizacion"],
+                          int(ids["ciudad"].get(row["ciudad"]))])
+    elif tabla == "hoteles":
+        df_propios = df[df["competencia"] == False][["nombre_hotel", "estrellas", "competencia", "ciudad"]].drop_duplicates()
+        df_competencia = df_hoteles_competencia[["nombre_hotel", "estrellas"]].assign(competencia=True, ciudad="Madrid")
+        df_hoteles = pd.concat([df_propios, df_competencia], ignore_index=True)
+        for _, row in df_hoteles.iterrows():
+            filas.append([row["nombre_hotel"], row["estrellas"], row["competencia"], int(ids["ciudad"].get(row["ciudad"]))])
+    elif tabla == "clientes":
+        for _, row in df[["id_cliente", "nombre", "apellido", "mail"]].drop_duplicates().iterrows():
+            filas.append([row["id_cliente"], row["nombre"], row["apellido"], row["mail"]])
+    else:
+        columnas = ["id_reserva", "fecha_reserva", "inicio_estancia", "final_estancia", "precio_noche", "mail", "nombre_hotel"]
+        for _, row in df[columnas].iterrows():
+            filas.append([row["id_reserva"], row["fecha_reserva"], row["inicio_estancia"], row["final_estancia"],
+                          row["precio_noche"], ids["clientes"].get(row["mail"]), ids["hoteles"].get(row["nombre_hotel"])])
+    return filas
+
+
+def normalizacion(valor):
+    """
+    Convierte un valor a un tipo nativo comparable; los NaN del constructor original se cargan como NULL.
+    """
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)) or valor is pd.NA or valor is pd.NaT:
+        return None
+    if hasattr(valor, "item"):
+        valor = valor.item()
+    if isinstance(valor, pd.Timestamp):
+        valor = valor.to_pydatetime()
+    return valor
+
+
+def campo_csv_igual(campo, valor):
+    """
+    Comprueba si un campo del CSV de COPY representa el mismo valor que el constructor original.
+    """
+    valor = normalizacion(valor)
+    if valor is None:
+        return campo == "\\N"
+    if isinstance(valor, bool):
+        return campo == str(valor)
+    if isinstance(valor, (int, float)):
+        return float(campo) == float(valor)
+    if hasattr(valor, "year"):
+        return pd.Timestamp(campo) == pd.Timestamp(valor)
+    return campo == str(valor)
+
+
+def cargas_nuevas(datos):
+    df, df_eventos, df_hoteles_competencia = datos
+    soporte_carga.creacion_tabla_ciudad(None, None, df)
+    soporte_carga.creacion_tabla_eventos(None, None, df_eventos)
+    soporte_carga.creacion_tabla_hoteles(None, None, df, df_hoteles_competencia)
+    soporte_carga.creacion_tabla_clientes(None, None, df)
+    soporte_carga.creacion_tabla_reservas(None, None, df)
+
+
+@pytest.mark.parametrize("tabla", ["ciudad", "eventos", "hoteles", "clientes", "reservas"])
+def test_execute_values_mismas_filas_que_iterrows(tabla, datos, ids, cargas):
+    cargas_nuevas(datos)
+    originales = [tuple(map(normalizacion, fila)) for fila in filas_originales(tabla, *datos, ids)]
+    nuevas = [tuple(map(normalizacion, fila)) for fila in filas_dataframe(cargas[tabla])]
+    assert len(originales) > 0
+    assert nuevas == originales
+
+
+@pytest.mark.parametrize("tabla", ["ciudad", "eventos", "hoteles", "clientes", "reservas"])
+def test_copy_mismas_filas_que_iterrows(tabla, datos, ids, cargas):
+    cargas_nuevas(datos)
+    originales = filas_originales(tabla, *datos, ids)
+    nuevas = list(csv.reader(buffer_csv_dataframe(cargas[tabla])))
+    assert len(nuevas) == len(originales)
+    for campos, fila in zip(nuevas, originales):
+        assert len(campos) == len(fila)
+        assert all(campo_csv_igual(campo, valor) for campo, valor in zip(campos, fila)), (campos, fila)
+
+
+def test_dependencias_dimensiones_sin_claves_foraneas(datos, monkeypatch):
+    # sin claves foraneas declaradas, las cargas siguen esperando a las dimensiones cuyos id resuelven
+    class PoolFalso:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def getconn(self):
+            return type("ConexionFalsa", (), {"cursor": lambda self: type("CursorFalso", (), {"close": lambda self: None})()})()
+
+        def putconn(self, conn):
+            pass
+
+        def closeall(self):
+            pass
+
+    grafo = {}
+    monkeypatch.setattr(soporte_carga.pool, "ThreadedConnectionPool", PoolFalso)
+    monkeypatch.setattr(soporte_carga, "dependencias_tablas", lambda cur, tablas: {tabla: set() for tabla in tablas})
+    monkeypatch.setattr(soporte_carga, "ejecutar_grafo_tareas", lambda tareas, dependencias, max_conexiones: grafo.update(dependencias))
+
+    df, df_eventos, df_hoteles_competencia = datos
+    soporte_carga.crear_tablas("db", "usuario", "", "localhost", 5432, df, df_eventos, df_hoteles_competencia, particiones_reservas=2)
+
+    assert grafo["eventos"] == {"ciudad"}
+    assert grafo["hoteles"] == {"ciudad"}
+    assert grafo["clientes"] == set()
+    assert grafo["reservas_1"] == grafo["reservas_2"] == {"clientes", "hoteles"}
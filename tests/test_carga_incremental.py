@@ -0,0 +1,92 @@
+"""
+Pruebas de la carga incremental en un PostgreSQL desechable creado con pgserver (se omiten si no está instalado):
+volver a cargar filas modificadas las actualiza en lugar de duplicarlas.
+"""
+import os
+import re
+
+import pandas as pd
+import psycopg2
+import pytest
+
+from src.soporte_carga import carga_incremental, vaciado_cache_dimensiones
+
+pgserver = pytest.importorskip("pgserver")
+
+RAIZ = os.path.join(os.path.dirname(__file__), "..")
+
+
+@pytest.fixture(scope="module")
+def servidor(tmp_path_factory):
+    directorio = str(tmp_path_factory.mktemp("pg"))
+    servidor = pgserver.get_server(directorio, cleanup_mode="delete")
+    yield directorio
+    servidor.cleanup()
+
+
+@pytest.fixture
+def conexion(servidor):
+    # tablas vacias de `planteamiento_proyecto.md` en cada prueba
+    with open(os.path.join(RAIZ, "planteamiento_proyecto.md"), encoding="utf-8") as f:
+        sentencias = re.findall(r"CREATE TABLE .*?\n\);", f.read(), flags=re.DOTALL)
+    conn = psycopg2.connect(dbname="postgres", user="postgres", host=servidor)
+    cur = conn.cursor()
+    cur.execute("DROP TABLE IF EXISTS reservas, clientes, hoteles, eventos, ciudad CASCADE;\n" + "\n".join(sentencias))
+    conn.commit()
+    vaciado_cache_dimensiones()
+    yield conn, cur
+    cur.close()
+    conn.close()
+    vaciado_cache_dimensiones()
+
+
+def filas(cur, tabla, columnas, orden):
+    cur.execute(f"SELECT {', '.join(columnas)} FROM {tabla} ORDER BY {orden}")
+    return cur.fetchall()
+
+
+@pytest.mark.parametrize("metodo", ["copy", "execute_values"])
+@pytest.mark.parametrize("tabla, primera, segunda, orden", [
+    # clave primaria: INSERT ... ON CONFLICT DO UPDATE
+    ("clientes",
+     pd.DataFrame({"id_cliente": [1, 2, 3], "nombre": ["Ana", "Luis", "Eva"], "apellido": ["Gil", "Sanz", "Ruiz"],
+                   "mail": ["ana@x.es", "luis@x.es", "eva@x.es"]}),
+     pd.DataFrame({"id_cliente": [1, 2, 3, 4], "nombre": ["Ana", "Luis", "Eva", "Pablo"],
+                   "apellido": ["Gil", "Sanz Gil", "Ruiz", "Mora"], "mail": ["ana@x.es", "luis@x.es", "eva@x.es", "pablo@x.es"]}),
+     "id_cliente"),
+    # id SERIAL: UPDATE ... FROM e INSERT ... WHERE NOT EXISTS por la clave natural
+    ("hoteles",
+     pd.DataFrame({"nombre_hotel": ["Sol", "Luna", "Mar"], "competencia": [False, True, True], "estrellas": [3.0, 4.0, 5.0]}),
+     pd.DataFrame({"nombre_hotel": ["Sol", "Luna", "Mar", "Rio"], "competencia": [False, True, True, True],
+                   "estrellas": [3.0, 2.0, 5.0, 4.0]}),
+     "nombre_hotel"),
+], ids=["clientes", "hoteles"])
+def test_segunda_carga_actualiza_sin_duplicar(tabla, primera, segunda, orden, metodo, conexion, tmp_path):
+    conn, cur = conexion
+    estado = str(tmp_path / "estado")
+    carga_incremental(conn, cur, tabla, primera, estado, metodo)
+    # segunda ejecucion: una fila modificada y otra nueva
+    carga_incremental(conn, cur, tabla, segunda, estado, metodo)
+
+    esperado = [tuple(fila) for fila in segunda.sort_values(orden).itertuples(index=False)]
+    assert filas(cur, tabla, list(segunda.columns), orden) == esperado
+
+    # sin las huellas guardadas se vuelven a enviar todas las filas y tampoco se duplican
+    carga_incremental(conn, cur, tabla, segunda, str(tmp_path / "estado_vacio"), metodo)
+    assert filas(cur, tabla, list(segunda.columns), orden) == esperado
+
+
+def test_id_hoteles_estables_entre_cargas(conexion, tmp_path):
+    # los id SERIAL de los hoteles no cambian al volver a cargarlos, aunque lleguen en otro orden o con otros datos
+    conn, cur = conexion
+    hoteles = pd.DataFrame({"nombre_hotel": ["Sol", "Luna", "Mar"], "competencia": [False, True, True], "estrellas": [3.0, 4.0, 5.0]})
+    carga_incremental(conn, cur, "hoteles", hoteles, str(tmp_path / "estado"), "copy")
+    antes = dict(filas(cur, "hoteles", ["nombre_hotel", "id_hotel"], "id_hotel"))
+
+    otra_ejecucion = pd.concat([hoteles.iloc[::-1].assign(estrellas=2.0), pd.DataFrame({"nombre_hotel": ["Rio"],
+                                "competencia": [True], "estrellas": [4.0]})], ignore_index=True)
+    carga_incremental(conn, cur, "hoteles", otra_ejecucion, str(tmp_path / "estado_nuevo"), "copy")
+    despues = dict(filas(cur, "hoteles", ["nombre_hotel", "id_hotel"], "id_hotel"))
+
+    assert {nombre: despues[nombre] for nombre in antes} == antes
+    assert despues["Rio"] not in antes.values()
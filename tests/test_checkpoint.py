@@ -0,0 +1,77 @@
+"""
+Pruebas del checkpoint: el resultado de cada etapa se escribe una sola vez y se reutiliza al reanudar, y la carga por
+lotes solo se reanuda con los mismos datos.
+"""
+import os
+import time
+
+import pandas as pd
+import pytest
+
+import src.soporte_carga as soporte_carga
+from src.soporte_almacenamiento import esperar_escrituras, guardar_dataframe, leer_dataframe
+from src.soporte_carga import carga_checkpoint
+from src.soporte_checkpoint import etapa_checkpoint, etapa_completada, inicio_checkpoint, lectura_manifiesto, ruta_etapa
+
+
+def etapa(llamadas):
+    llamadas.append(1)
+    return pd.DataFrame({"valor": [1, 2, 3]})
+
+
+def test_resultado_solo_en_el_archivo_de_salida(tmp_path):
+    directorio, salida, llamadas = str(tmp_path / "ck"), str(tmp_path / "salida.feather"), []
+    inicio_checkpoint(directorio, {})
+    etapa_checkpoint(directorio, "transformacion", etapa, llamadas, segundo_plano=True, ruta_resultado=salida)
+    esperar_escrituras()
+    # la etapa se marca en el callback de la escritura, que puede terminar justo despues
+    for _ in range(100):
+        if etapa_completada(directorio, "transformacion"):
+            break
+        time.sleep(0.01)
+
+    # el manifiesto apunta al archivo de salida y no hay copia en el checkpoint
+    assert not os.path.exists(ruta_etapa(directorio, "transformacion"))
+    assert lectura_manifiesto(directorio)["etapas"]["transformacion"]["archivo"] == salida
+
+    inicio_checkpoint(directorio, {}, reanudar=True)
+    resultado = etapa_checkpoint(directorio, "transformacion", etapa, llamadas, ruta_resultado=salida)
+    assert len(llamadas) == 1
+    pd.testing.assert_frame_equal(resultado, leer_dataframe(salida))
+
+
+def test_politica_omitir_guarda_en_el_checkpoint(tmp_path):
+    directorio, salida = str(tmp_path / "ck"), str(tmp_path / "salida.feather")
+    anterior = pd.DataFrame({"valor": [9]})
+    guardar_dataframe(anterior, salida)
+    inicio_checkpoint(directorio, {})
+    etapa_checkpoint(directorio, "transformacion", etapa, [], ruta_resultado=salida, politica_resultado="omitir")
+
+    pd.testing.assert_frame_equal(leer_dataframe(salida), anterior)
+    assert len(leer_dataframe(ruta_etapa(directorio, "transformacion"))) == 3
+
+
+def test_carga_no_se_reanuda_con_otros_datos(tmp_path, monkeypatch):
+    checkpoint = {"directorio": str(tmp_path), "nombre": "reservas", "tamano_lote": 2}
+    df = pd.DataFrame({"id_reserva": ["a", "b", "c", "d"], "precio_noche": [10.0, 20.0, 30.0, 40.0]})
+    cargados = []
+    # el lote en duda al reanudar se fusiona en lugar de insertarse
+    monkeypatch.setattr(soporte_carga, "fusion_lote", lambda conn, cur, tabla, lote, metodo: cargados.extend(lote["id_reserva"]))
+
+    def carga_falla(conn, cur, tabla, lote, metodo):
+        if len(cargados) == 2:
+            raise RuntimeError("conexión perdida")
+        cargados.extend(lote["id_reserva"])
+
+    with pytest.raises(RuntimeError):
+        carga_checkpoint(None, None, "reservas", df, checkpoint, funcion_carga=carga_falla)
+
+    # mismo número de filas, otro contenido
+    otros = df.assign(precio_noche=df["precio_noche"] * 2)
+    with pytest.raises(ValueError, match="otros datos"):
+        carga_checkpoint(None, None, "reservas", otros, checkpoint, funcion_carga=carga_falla)
+
+    # el mismo contenido, con otro índice, continúa desde el primer lote sin confirmar
+    carga_checkpoint(None, None, "reservas", df.set_axis([7, 8, 9, 10]), checkpoint,
+                     funcion_carga=lambda conn, cur, tabla, lote, metodo: cargados.extend(lote["id_reserva"]))
+    assert cargados == ["a", "b", "c", "d"]
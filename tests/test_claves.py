@@ -0,0 +1,26 @@
+"""
+Pruebas de la asignación de id enteros a los clientes por mail.
+"""
+import pandas as pd
+
+from src.soporte_claves import claves_persistentes, ids_claves
+from src.soporte_limpieza_transf import asignar_id_clientes_por_mail
+
+
+def test_mails_nulos_comparten_id():
+    df = pd.DataFrame({"mail": ["a@x.com", None, "b@x.com", None, "a@x.com"]})
+    asignar_id_clientes_por_mail(df)
+
+    # las reservas sin mail tienen un id como el resto, que se puede cargar en la clave primaria de clientes
+    assert df["id_cliente"].tolist() == [1, 2, 3, 2, 1]
+    assert df["id_cliente"].dtype == "int64"
+
+
+def test_mails_nulos_conservan_id_entre_ejecuciones(tmp_path):
+    directorio_claves = str(tmp_path)
+    primera, _ = claves_persistentes(pd.Series(["a@x.com", None]), "clientes", directorio_claves)
+    segunda, claves = claves_persistentes(pd.Series([None, "c@x.com", "a@x.com"]), "clientes", directorio_claves)
+
+    assert primera.tolist() == [1, 2]
+    assert segunda.tolist() == [2, 3, 1]
+    assert ids_claves(pd.Series([None, "c@x.com", "d@x.com"]), claves).tolist() == [2, 3, pd.NA]
@@ -0,0 +1,110 @@
+"""
+Pruebas de la limpieza y transformación de las reservas con los datos de `data/`.
+"""
+import os
+
+import pandas as pd
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pytest
+
+from src.soporte_limpieza_transf import TIPOS_COLUMNAS, limpieza_transformacion, limpieza_transformacion_por_lotes
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data")
+ARCHIVO_RESERVAS = os.path.join(DATA, "reservas_hoteles.parquet")
+
+
+@pytest.fixture(scope="module")
+def df_hoteles_competencia():
+    return pd.read_pickle(os.path.join(DATA, "datos_extraidos", "nombre_estrellas_precio.pickle"))
+
+
+def limpieza(archivo_entrada, df_hoteles_competencia, tmp_path, **kwargs):
+    return limpieza_transformacion(archivo_entrada, df_hoteles_competencia, str(tmp_path / "salida"), **kwargs)
+
+
+def test_id_hotel_guardado_como_double(df_hoteles_competencia, tmp_path):
+    # un archivo con id_hotel como double (por ejemplo, escrito desde una columna con nulos) se lee con su propio tipo
+    df = pd.read_parquet(ARCHIVO_RESERVAS)
+    df["id_hotel"] = df["id_hotel"].astype("float64")
+    archivo_double = str(tmp_path / "reservas_double.parquet")
+    df.to_parquet(archivo_double)
+
+    esperado = limpieza(ARCHIVO_RESERVAS, df_hoteles_competencia, tmp_path)
+    resultado = limpieza(archivo_double, df_hoteles_competencia, tmp_path)
+
+    pd.testing.assert_frame_equal(resultado, esperado)
+
+
+@pytest.fixture
+def archivo_id_hotel_nulos(tmp_path):
+    # algunas reservas propias sin id_hotel, guardado como entero con nulos
+    df = pd.read_parquet(ARCHIVO_RESERVAS)
+    df["id_hotel"] = df["id_hotel"].astype("Int64")
+    df.loc[df.index[df["competencia"] == False][:25], "id_hotel"] = pd.NA
+    archivo = str(tmp_path / "reservas_nulos.parquet")
+    df.to_parquet(archivo)
+    return archivo
+
+
+@pytest.mark.parametrize("nulos", [False, True])
+def test_varios_procesos_mismo_resultado(nulos, df_hoteles_competencia, archivo_id_hotel_nulos, tmp_path):
+    archivo_entrada = archivo_id_hotel_nulos if nulos else ARCHIVO_RESERVAS
+    serie = limpieza(archivo_entrada, df_hoteles_competencia, tmp_path)
+    paralelo = limpieza(archivo_entrada, df_hoteles_competencia, tmp_path, num_procesos=2)
+
+    # ninguna fila se pierde al repartir por hotel
+    assert len(paralelo) == len(serie)
+    pd.testing.assert_frame_equal(paralelo, serie)
+
+
+@pytest.fixture(scope="module")
+def carpeta_particionada(tmp_path_factory):
+    carpeta = str(tmp_path_factory.mktemp("reservas_particionadas"))
+    ds.write_dataset(pq.read_table(ARCHIVO_RESERVAS), carpeta, format="parquet", partitioning=["competencia", "id_hotel"],
+                     partitioning_flavor="hive")
+    return carpeta
+
+
+@pytest.mark.parametrize("particionado", [False, True])
+@pytest.mark.parametrize("argumentos", [
+    {},
+    {"filtros": [("competencia", "==", False), ("fecha_reserva", ">=", "2025-02-05")]},
+    {"clave_duplicados": ["id_reserva"], "columnas": None},
+], ids=["completo", "filtros", "clave_id_reserva"])
+def test_motor_polars_mismo_resultado(argumentos, particionado, df_hoteles_competencia, carpeta_particionada, tmp_path):
+    pytest.importorskip("polars")
+    archivo_entrada = carpeta_particionada if particionado else ARCHIVO_RESERVAS
+    informe_pandas, informe_polars = {}, {}
+    df_pandas = limpieza(archivo_entrada, df_hoteles_competencia, tmp_path, informe_duplicados=informe_pandas, **argumentos)
+    df_polars = limpieza(archivo_entrada, df_hoteles_competencia, tmp_path, informe_duplicados=informe_polars, motor="polars",
+                         **argumentos)
+
+    pd.testing.assert_frame_equal(df_polars, df_pandas)
+    assert informe_polars == informe_pandas
+
+
+@pytest.mark.parametrize("nulos", [False, True])
+def test_lotes_mismo_resultado(nulos, df_hoteles_competencia, archivo_id_hotel_nulos, tmp_path):
+    # con lotes pequeños algunos lotes no tienen nulos o categorias que otros si tienen; los tipos no deben cambiar
+    archivo_entrada = archivo_id_hotel_nulos if nulos else ARCHIVO_RESERVAS
+    esperado = limpieza(archivo_entrada, df_hoteles_competencia, tmp_path)
+    ruta = limpieza_transformacion_por_lotes(archivo_entrada, df_hoteles_competencia, str(tmp_path / "lotes.parquet"),
+                                             tamano_lote=4000)
+
+    pd.testing.assert_frame_equal(pd.read_parquet(ruta), esperado.reset_index(drop=True))
+
+
+def test_lotes_plan_tipos(df_hoteles_competencia, tmp_path):
+    ruta = limpieza_transformacion_por_lotes(ARCHIVO_RESERVAS, df_hoteles_competencia, str(tmp_path / "lotes.parquet"),
+                                             tamano_lote=4000)
+    df = pd.read_parquet(ruta)
+
+    # cada columna del plan tiene el tipo compacto, no el que pandas infiere al leer un lote
+    for columna, tipo in TIPOS_COLUMNAS.items():
+        if tipo == "categoria":
+            assert isinstance(df[columna].dtype, pd.CategoricalDtype), columna
+        elif tipo == "entero":
+            assert df[columna].dtype.itemsize < 8, columna
+        elif tipo == "booleano":
+            assert pd.api.types.is_bool_dtype(df[columna]), columna
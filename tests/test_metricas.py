@@ -0,0 +1,48 @@
+"""
+Pruebas de la medición de las funciones generadoras instrumentadas.
+"""
+import pytest
+
+from src.soporte_metricas import PILA_HILO, finalizar_metricas, iniciar_metricas, medir_etapa
+
+
+def lotes(cerrados):
+    try:
+        for i in range(10):
+            yield i
+    finally:
+        cerrados.append(True)
+
+
+@pytest.fixture
+def metricas():
+    iniciar_metricas()
+    yield
+    finalizar_metricas()
+
+
+def etapa(nombre):
+    return next(etapa for etapa in finalizar_metricas()["etapas"] if etapa["etapa"] == nombre)
+
+
+def test_generador_cerrado_a_medias(metricas):
+    cerrados = []
+    generador = medir_etapa(lotes)(cerrados)
+    next(generador)
+    next(generador)
+    generador.close()
+
+    # la llamada se registra aunque no se consuman todos los valores, y el generador original se cierra
+    assert cerrados == [True]
+    assert PILA_HILO.pila == []
+    assert etapa("lotes")["llamadas"] == 1
+    assert etapa("lotes")["filas_salida"] == 2
+
+
+def test_generador_con_error(metricas):
+    generador = medir_etapa(lotes)([])
+    next(generador)
+    with pytest.raises(ValueError):
+        generador.throw(ValueError("lote no válido"))
+
+    assert etapa("lotes")["errores"] == 1
@@ -0,0 +1,281 @@
+"""
+Pruebas del scraping de hoteles que no necesitan navegador: el pool de drivers se prueba con drivers falsos y la
+extracción de los textos con una página HTML estática. La caché HTTP de la API de eventos se prueba con una sesión
+falsa que anota las cabeceras de cada petición.
+"""
+import io
+import json
+import os
+import threading
+import time
+
+import pytest
+import requests
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+import src.soporte_scrapeo as soporte_scrapeo
+from src.soporte_scrapeo import (cerrar_pool_drivers, crear_pool_drivers, descarga_condicional, descartar_driver,
+                                 extraccion_eventos_cache, parseo_hotel, scrap_info_hoteles, scrap_info_hoteles_varias_urls,
+                                 textos_hoteles_html, tomar_driver)
+
+PAGINA_HOTELES = """
+<html><body>
+  <div class="hotelblock">
+    <div class="title"><h3>Hotel Uno</h3><p>Madrid centro</p></div>
+    <div class="rate-details__price-wrapper"><p>Desde</p><p>120€</p></div>
+    <div class="ratings__score">4.5/5</div>
+  </div>
+  <div class="hotelblock">
+    <div class="title"><h3>Hotel Dos</h3></div>
+    <div class="rate-details__price-wrapper"><p>Desde</p><p>89.5€</p></div>
+    <div class="ratings__score">3.8/5</div>
+  </div>
+</body></html>
+"""
+
+
+def fabrica_drivers():
+    """
+    Devuelve una fábrica de drivers falsos y la lista de los drivers creados.
+    """
+    creados = []
+
+    class DriverFalso:
+        def __init__(self):
+            self.cerrado = False
+            self.paginas = []
+
+        def quit(self):
+            self.cerrado = True
+
+    def fabrica():
+        driver = DriverFalso()
+        creados.append(driver)
+        return driver
+    return fabrica, creados
+
+
+@pytest.fixture
+def paginas(monkeypatch):
+    """
+    Sustituye el scraping de cada página por uno falso que anota qué driver la ha procesado y cuántas páginas se
+    procesan a la vez.
+    """
+    estado = {"a_la_vez": 0, "max_a_la_vez": 0}
+    lock = threading.Lock()
+
+    def scrap(url, sleep_time, driver):
+        with lock:
+            estado["a_la_vez"] += 1
+            estado["max_a_la_vez"] = max(estado["max_a_la_vez"], estado["a_la_vez"])
+        time.sleep(0.01)
+        driver.paginas.append(url)
+        with lock:
+            estado["a_la_vez"] -= 1
+        return {"nombre_hotel": [url], "estrellas": [4.0], "precio_noche": [100.0], "fecha_reserva": [None]}
+
+    monkeypatch.setattr(soporte_scrapeo, "scrap_info_hoteles", scrap)
+    return estado
+
+
+def test_pool_reutiliza_drivers_entre_llamadas(paginas):
+    fabrica, creados = fabrica_drivers()
+    pool_drivers = crear_pool_drivers(3, fabrica)
+    urls = [f"https://hoteles.test/{i}" for i in range(20)]
+
+    primero = scrap_info_hoteles_varias_urls(urls, num_drivers=3, pool_drivers=pool_drivers)
+    segundo = scrap_info_hoteles_varias_urls(urls[:5], num_drivers=3, pool_drivers=pool_drivers)
+
+    # los resultados siguen el orden de las URLs y los drivers no se cierran ni se vuelven a crear entre llamadas
+    assert primero["nombre_hotel"] == urls
+    assert segundo["nombre_hotel"] == urls[:5]
+    assert 1 <= len(creados) <= 3
+    assert paginas["max_a_la_vez"] <= 3
+    assert sum(len(driver.paginas) for driver in creados) == 25
+    assert not any(driver.cerrado for driver in creados)
+
+    cerrar_pool_drivers(pool_drivers)
+    assert all(driver.cerrado for driver in creados)
+
+
+def test_pool_propio_se_cierra_al_terminar(paginas, monkeypatch):
+    fabrica, creados = fabrica_drivers()
+    monkeypatch.setattr(soporte_scrapeo, "crear_pool_drivers", lambda num_drivers: crear_pool_drivers(num_drivers, fabrica))
+
+    resultado = scrap_info_hoteles_varias_urls(["a", "b", "c"], num_drivers=2)
+
+    assert resultado["nombre_hotel"] == ["a", "b", "c"]
+    assert 1 <= len(creados) <= 2
+    assert all(driver.cerrado for driver in creados)
+
+
+def test_pool_devuelve_el_driver_si_falla_una_pagina(monkeypatch):
+    fabrica, creados = fabrica_drivers()
+    pool_drivers = crear_pool_drivers(1, fabrica)
+
+    def scrap(url, sleep_time, driver):
+        raise RuntimeError("página caída")
+    monkeypatch.setattr(soporte_scrapeo, "scrap_info_hoteles", scrap)
+
+    with pytest.raises(RuntimeError):
+        scrap_info_hoteles_varias_urls(["a"], num_drivers=1, pool_drivers=pool_drivers)
+    assert pool_drivers["libres"].qsize() == 1
+    cerrar_pool_drivers(pool_drivers)
+
+
+def test_pagina_fallida_no_descarta_las_demas(paginas, monkeypatch):
+    fabrica, creados = fabrica_drivers()
+    pool_drivers = crear_pool_drivers(1, fabrica)
+    scrap_falso = soporte_scrapeo.scrap_info_hoteles
+
+    def scrap(url, sleep_time, driver):
+        if url == "caida":
+            raise RuntimeError("navegador sin respuesta") from WebDriverException("chrome not reachable")
+        if url == "lenta":
+            raise TimeoutError("sin hoteles") from TimeoutException()
+        return scrap_falso(url, sleep_time, driver)
+    monkeypatch.setattr(soporte_scrapeo, "scrap_info_hoteles", scrap)
+
+    errores = {}
+    resultado = scrap_info_hoteles_varias_urls(["a", "caida", "b", "lenta", "c"], num_drivers=1, pool_drivers=pool_drivers,
+                                               errores=errores)
+
+    # se conservan las paginas extraidas y se informa de las que han fallado
+    assert resultado["nombre_hotel"] == ["a", "b", "c"]
+    assert set(errores) == {"caida", "lenta"}
+    # el navegador caido se cierra y se sustituye por otro; una espera agotada no descarta el navegador
+    assert len(creados) == 2
+    assert creados[0].cerrado and creados[0].paginas == ["a"]
+    assert not creados[1].cerrado and creados[1].paginas == ["b", "c"]
+    assert pool_drivers["drivers"] == [creados[1]] and pool_drivers["creados"] == 1
+    cerrar_pool_drivers(pool_drivers)
+
+
+def test_driver_descartado_libera_su_hueco():
+    # un hilo que espera un navegador libre no se queda bloqueado si el unico navegador se descarta
+    fabrica, creados = fabrica_drivers()
+    pool_drivers = crear_pool_drivers(1, fabrica)
+    driver = tomar_driver(pool_drivers)
+    tomados = []
+    hilo = threading.Thread(target=lambda: tomados.append(tomar_driver(pool_drivers)), daemon=True)
+    hilo.start()
+    time.sleep(0.05)
+    assert not tomados
+
+    descartar_driver(pool_drivers, driver)
+    hilo.join(timeout=5)
+
+    assert driver.cerrado
+    assert tomados == [creados[1]] and pool_drivers["drivers"] == [creados[1]]
+    cerrar_pool_drivers(pool_drivers)
+
+
+def test_ninguna_pagina_extraida(monkeypatch):
+    fabrica, _ = fabrica_drivers()
+    monkeypatch.setattr(soporte_scrapeo, "scrap_info_hoteles", lambda url, sleep_time, driver: 1 / 0)
+
+    with pytest.raises(RuntimeError, match="ninguna página") as excinfo:
+        scrap_info_hoteles_varias_urls(["a", "b"], num_drivers=2, pool_drivers=crear_pool_drivers(2, fabrica))
+    assert isinstance(excinfo.value.__cause__, ZeroDivisionError)
+
+
+def test_textos_hoteles_html_pagina_estatica():
+    textos = textos_hoteles_html(PAGINA_HOTELES)
+    assert [parseo_hotel(*campos) for campos in textos] == [("Hotel Uno", 120.0, 4.5), ("Hotel Dos", 89.5, 3.8)]
+
+
+def test_modo_extraccion_no_valido(monkeypatch):
+    # el modo se comprueba antes de crear o usar ningun navegador
+    monkeypatch.setattr(soporte_scrapeo, "crear_driver", lambda *args, **kwargs: pytest.fail("no debe abrir un navegador"))
+    with pytest.raises(ValueError, match="Modo de extracción no válido"):
+        scrap_info_hoteles("https://hoteles.test", modo_extraccion="elemento")
+
+
+@pytest.mark.parametrize("error, tipo", [
+    (TimeoutException("sin hoteles"), TimeoutError),
+    (WebDriverException("navegador caído"), RuntimeError),
+], ids=["timeout", "webdriver"])
+def test_errores_de_la_pagina_conservan_la_causa(error, tipo):
+    class DriverRoto:
+        def get(self, url):
+            raise error
+
+    with pytest.raises(tipo, match="hoteles.test") as excinfo:
+        scrap_info_hoteles("https://hoteles.test", driver=DriverRoto())
+    assert excinfo.value.__cause__ is error
+
+
+URL_EVENTOS = "https://eventos.test/api.json"
+CABECERAS_CACHE = {"ETag": '"v1"', "Last-Modified": "Sat, 01 Mar 2025 08:00:00 GMT"}
+
+
+def respuesta_eventos(*titulos):
+    eventos = [{"title": titulo, "link": f"https://eventos.test/{titulo}", "dtstart": "2025-03-01 10:00:00.0",
+                "dtend": "2025-03-01 12:00:00.0"} for titulo in titulos]
+    return json.dumps({"@graph": eventos}).encode()
+
+
+class SesionFalsa:
+    """
+    Sesión HTTP que responde con la siguiente respuesta de la lista (código, cuerpo, cabeceras) y anota las cabeceras
+    de cada petición.
+    """
+    def __init__(self, *respuestas):
+        self.respuestas = list(respuestas)
+        self.peticiones = []
+
+    def get(self, url, headers=None, stream=False, timeout=None):
+        self.peticiones.append(dict(headers or {}))
+        codigo, cuerpo, cabeceras = self.respuestas.pop(0)
+        respuesta = requests.Response()
+        respuesta.status_code, respuesta.url, respuesta.raw = codigo, url, io.BytesIO(cuerpo)
+        respuesta.headers.update(cabeceras)
+        return respuesta
+
+
+def test_descarga_condicional_guarda_y_reutiliza_el_cuerpo(tmp_path):
+    cache = str(tmp_path / "cache")
+    cuerpo = respuesta_eventos("concierto")
+    sesion = SesionFalsa((200, cuerpo, CABECERAS_CACHE), (304, b"", {}), (200, b"nuevo", {"ETag": '"v2"'}))
+
+    # 200 con ETag: se guardan el cuerpo y sus metadatos, sin cabeceras condicionales en la primera peticion
+    ruta, metadatos, cambiado = descarga_condicional(URL_EVENTOS, cache, sesion)
+    assert cambiado and sesion.peticiones[0] == {}
+    with open(ruta, "rb") as f:
+        assert f.read() == cuerpo
+    assert metadatos["etag"] == '"v1"' and metadatos["last_modified"] == CABECERAS_CACHE["Last-Modified"]
+    assert os.path.exists(os.path.splitext(ruta)[0] + ".json")
+
+    # segunda peticion condicional; 304 devuelve el cuerpo cacheado sin cambios
+    ruta_304, metadatos_304, cambiado = descarga_condicional(URL_EVENTOS, cache, sesion)
+    assert sesion.peticiones[1] == {"If-None-Match": '"v1"', "If-Modified-Since": CABECERAS_CACHE["Last-Modified"]}
+    assert not cambiado and ruta_304 == ruta and metadatos_304 == metadatos
+    with open(ruta, "rb") as f:
+        assert f.read() == cuerpo
+
+    # un 200 posterior sustituye el cuerpo y el ETag
+    _, metadatos, cambiado = descarga_condicional(URL_EVENTOS, cache, sesion)
+    assert cambiado and metadatos["etag"] == '"v2"' and metadatos["last_modified"] is None
+    with open(ruta, "rb") as f:
+        assert f.read() == b"nuevo"
+
+
+def test_extraccion_eventos_cache_no_procesa_si_no_cambia(tmp_path, monkeypatch):
+    cache, salida = str(tmp_path / "cache"), str(tmp_path / "eventos.parquet")
+    sesion = SesionFalsa((200, respuesta_eventos("concierto", "teatro"), CABECERAS_CACHE), (304, b"", {}),
+                         (200, respuesta_eventos("museo"), {"ETag": '"v2"'}))
+    monkeypatch.setattr(soporte_scrapeo, "obtener_sesion_http", lambda: sesion)
+
+    primero = extraccion_eventos_cache(URL_EVENTOS, salida, cache, formato="parquet")
+    assert primero["nombre_evento"].tolist() == ["concierto", "teatro"]
+
+    # con 304 se lee el archivo ya procesado, sin volver a procesar la respuesta
+    parseo = soporte_scrapeo.parseo_eventos
+    monkeypatch.setattr(soporte_scrapeo, "parseo_eventos", lambda *args, **kwargs: pytest.fail("no debe procesar"))
+    segundo = extraccion_eventos_cache(URL_EVENTOS, salida, cache, formato="parquet")
+    assert sesion.peticiones[1]["If-None-Match"] == '"v1"'
+    assert segundo["nombre_evento"].tolist() == ["concierto", "teatro"]
+
+    monkeypatch.setattr(soporte_scrapeo, "parseo_eventos", parseo)
+    tercero = extraccion_eventos_cache(URL_EVENTOS, salida, cache, formato="parquet")
+    assert tercero["nombre_evento"].tolist() == ["museo"]